@@ -0,0 +1,127 @@
+"""
+Benchmark: many wastepickers accepting the same pickup request at once.
+
+For each round a fresh pending request is created and CONCURRENCY threads
+call POST /pickup-requests/<id>/accept simultaneously, each as a different
+wastepicker, against an app built by create_app() on a temporary SQLite
+database, so it runs with the same engine profile (WAL, busy timeout, pool)
+as the server. Reports throughput and latency, plus how many rounds ended
+with exactly one consistent winner; tests/test_accept_contention.py asserts
+that property.
+
+Usage:
+    python benchmarks/bench_accept_contention.py [rounds] [concurrency]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import threading
+import time
+from collections import Counter
+from src.app import create_app
+from src.models.user import db, User
+from src.models.pickup_request import PickupRequest
+from src.models.wastepicker_stats import WastepickerStats
+from src.services.batching import LatencyRecorder
+
+ROUNDS = 20
+CONCURRENCY = 200
+
+
+def make_app(database_path):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}'})
+
+
+def seed(app, concurrency):
+    with app.app_context():
+        requester = User(username='requester', email='requester@example.com', password_hash='x')
+        wastepickers = [
+            User(username=f'picker{i}', email=f'picker{i}@example.com', password_hash='x',
+                 user_type='wastepicker')
+            for i in range(concurrency)
+        ]
+        db.session.add(requester)
+        db.session.add_all(wastepickers)
+        db.session.commit()
+        return requester.id, [wastepicker.id for wastepicker in wastepickers]
+
+
+def run_round(app, requester_id, wastepicker_ids, latency=None):
+    """
+    One round of simultaneous accepts on a new pending request.
+
+    Returns:
+        (Counter of response status codes, whether exactly one consistent winner emerged, seconds taken)
+    """
+    with app.app_context():
+        pickup_request = PickupRequest(requester_id=requester_id, pickup_address='1 Test Street',
+                                       pickup_latitude=-26.2, pickup_longitude=28.0,
+                                       payment_amount=25.0, estimated_weight=3.0)
+        db.session.add(pickup_request)
+        db.session.commit()
+        request_id = pickup_request.id
+
+    barrier = threading.Barrier(len(wastepicker_ids))
+    responses = [None] * len(wastepicker_ids)
+
+    def accept(index, wastepicker_id):
+        client = app.test_client()
+        barrier.wait()
+        started = time.perf_counter()
+        response = client.post(f'/api/pickup-requests/{request_id}/accept',
+                               json={'wastepicker_id': wastepicker_id})
+        if latency is not None:
+            latency.record(time.perf_counter() - started)
+        responses[index] = (wastepicker_id, response.status_code)
+
+    threads = [threading.Thread(target=accept, args=(index, wastepicker_id))
+               for index, wastepicker_id in enumerate(wastepicker_ids)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    winners = [wastepicker_id for wastepicker_id, status in responses if status == 200]
+    with app.app_context():
+        stored = db.session.get(PickupRequest, request_id)
+        consistent = len(winners) == 1 and stored.status == 'accepted' and stored.wastepicker_id == winners[0]
+        if consistent:
+            winner_stats = db.session.get(WastepickerStats, winners[0])
+            assigned = PickupRequest.query.filter_by(wastepicker_id=winners[0]).count()
+            consistent = winner_stats is not None and winner_stats.total_pickups == assigned
+    return Counter(status for _, status in responses), consistent, elapsed
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else CONCURRENCY
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+        requester_id, wastepicker_ids = seed(app, concurrency)
+        latency = LatencyRecorder()
+
+        statuses = Counter()
+        failures = 0
+        total_elapsed = 0.0
+        for _ in range(rounds):
+            round_statuses, consistent, elapsed = run_round(app, requester_id, wastepicker_ids, latency)
+            statuses.update(round_statuses)
+            failures += not consistent
+            total_elapsed += elapsed
+
+    attempts = rounds * concurrency
+    print(f'{rounds} rounds x {concurrency} concurrent accepts')
+    print(f'  responses:   {dict(sorted(statuses.items()))}')
+    print(f'  throughput:  {attempts / total_elapsed:.0f} accept attempts/s')
+    print(f'  latency:     {latency.percentiles()}')
+    print(f'  rounds with exactly one consistent winner: {rounds - failures}/{rounds}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
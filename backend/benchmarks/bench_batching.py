@@ -0,0 +1,84 @@
+"""
+Benchmark: one classifier call per image vs coalesced classify_batch calls.
+
+Uses MockAIWasteClassifier with a simulated per-call overhead and per-image cost,
+so no API key or network access is needed. Both modes share the same cap on
+concurrent backend calls, as a real vision API rate limit would impose.
+
+Usage:
+    python benchmarks/bench_batching.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.services.mock_ai_classifier import MockAIWasteClassifier
+from src.services.batching import ClassificationCoalescer, LatencyRecorder
+
+CALL_OVERHEAD = 0.200      # seconds per API round trip
+PER_IMAGE_COST = 0.020     # seconds per image in a call
+BACKEND_CONCURRENCY = 4    # concurrent calls the backend accepts
+REQUESTS = 400
+CONCURRENCY = 32
+
+
+class LimitedBackend:
+    """Wraps the classifier so at most BACKEND_CONCURRENCY calls run at once."""
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.slots = threading.BoundedSemaphore(BACKEND_CONCURRENCY)
+        self.calls = 0
+
+    def classify_waste(self, image_path):
+        with self.slots:
+            self.calls += 1
+            return self.classifier.classify_waste(image_path)
+
+    def classify_batch(self, image_paths):
+        with self.slots:
+            self.calls += 1
+            return self.classifier.classify_batch(image_paths)
+
+
+def run(label, classify):
+    latency = LatencyRecorder()
+
+    def one(i):
+        started = time.monotonic()
+        classify(f'image-{i}.jpg')
+        latency.record(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(one, range(REQUESTS)))
+    elapsed = time.monotonic() - started
+
+    p = latency.percentiles()
+    print(f"{label:<28} {REQUESTS / elapsed:>8.1f} img/s   p50 {p['p50']:>7.1f}ms   p90 {p['p90']:>7.1f}ms   p99 {p['p99']:>7.1f}ms")
+
+
+def main():
+    classifier = MockAIWasteClassifier(latency=CALL_OVERHEAD, per_image_latency=PER_IMAGE_COST)
+    print(f"{REQUESTS} requests from {CONCURRENCY} concurrent clients, "
+          f"{CALL_OVERHEAD * 1000:.0f}ms per call + {PER_IMAGE_COST * 1000:.0f}ms per image, "
+          f"{BACKEND_CONCURRENCY} concurrent backend calls\n")
+
+    backend = LimitedBackend(classifier)
+    run('single-image calls', backend.classify_waste)
+    print(f"{'':<28} {backend.calls} backend calls")
+
+    for batch_size, wait_ms in [(4, 10), (8, 10), (16, 25)]:
+        backend = LimitedBackend(classifier)
+        coalescer = ClassificationCoalescer(backend, max_batch_size=batch_size, max_wait_ms=wait_ms,
+                                            max_concurrent_batches=BACKEND_CONCURRENCY)
+        run(f'coalesced (M={batch_size}, N={wait_ms}ms)', coalescer.classify)
+        stats = coalescer.stats()
+        print(f"{'':<28} {backend.calls} backend calls, batch sizes {stats['batch_size_histogram']}")
+
+
+if __name__ == '__main__':
+    main()
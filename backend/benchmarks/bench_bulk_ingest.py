@@ -0,0 +1,107 @@
+"""
+Benchmark: bulk pickup request ingestion against one POST per request.
+
+Submits ROWS pickup requests to POST /api/pickup-requests/bulk as a JSON
+array and as NDJSON through the Flask test client on a temporary SQLite
+database, and times SINGLE_ROWS of them through POST /api/pickup-requests
+for comparison. Peak Python memory while ingesting is measured with
+tracemalloc, excluding the request body itself.
+
+Usage:
+    python benchmarks/bench_bulk_ingest.py [rows]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from flask import Flask
+from src.models.user import db, User
+from src.models.pickup_request import PickupRequest
+from src.routes.pickup_requests import pickup_requests_bp
+
+ROWS = 10000
+SINGLE_ROWS = 500
+
+
+def make_rows(rng, count, requester_id):
+    return [{
+        'requester_id': requester_id,
+        'pickup_address': f'{index} Bulk Street',
+        'pickup_latitude': -26.2 + rng.uniform(-0.2, 0.2),
+        'pickup_longitude': 28.05 + rng.uniform(-0.2, 0.2),
+        'waste_category': rng.choice(['recyclable', 'organic', 'mixed']),
+        'estimated_weight': round(rng.uniform(1, 40), 1),
+        'pickup_date': '2026-11-02T09:00:00Z'
+    } for index in range(count)]
+
+
+def timed_bulk(client, body, content_type):
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.post('/api/pickup-requests/bulk', data=body, content_type=content_type, buffered=False)
+    results = 0
+    summary = None
+    for line in response.response:
+        for text in line.decode().splitlines():
+            result = json.loads(text)
+            if 'summary' in result:
+                summary = result['summary']
+            else:
+                results += 1
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, results, summary
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    rng = random.Random(3)
+
+    directory = tempfile.mkdtemp()
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    db.init_app(app)
+    app.register_blueprint(pickup_requests_bp, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+        requester = User(username='ngo', email='ngo@example.com', password_hash='x')
+        db.session.add(requester)
+        db.session.commit()
+        requester_id = requester.id
+
+    client = app.test_client()
+    rows = make_rows(rng, row_count, requester_id)
+    ok = True
+
+    started = time.perf_counter()
+    for row in rows[:SINGLE_ROWS]:
+        client.post('/api/pickup-requests', json=row)
+    single = time.perf_counter() - started
+    print(f'POST /pickup-requests: {SINGLE_ROWS} rows in {single:.2f} s '
+          f'({single / SINGLE_ROWS * 1000:.2f} ms/row, ~{single / SINGLE_ROWS * row_count:.1f} s for {row_count})')
+
+    for label, body, content_type in (
+        ('JSON array', json.dumps(rows).encode(), 'application/json'),
+        ('NDJSON', '\n'.join(json.dumps(row) for row in rows).encode(), 'application/x-ndjson'),
+    ):
+        elapsed, peak, results, summary = timed_bulk(client, body, content_type)
+        print(f'POST /pickup-requests/bulk ({label}): {row_count} rows in {elapsed:.2f} s '
+              f'({elapsed / row_count * 1000:.3f} ms/row), peak {peak / 1024 / 1024:.1f} MB, '
+              f'body {len(body) / 1024 / 1024:.1f} MB')
+        ok = ok and results == row_count and summary is not None and summary['created'] == row_count
+
+    with app.app_context():
+        stored = db.session.query(PickupRequest).count()
+    expected = SINGLE_ROWS + 2 * row_count
+    print(f'stored rows: {stored}/{expected}')
+    return 0 if ok and stored == expected else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark: mixed read/write load on SQLite, default vs tuned engine profile.
+
+Runs THREADS worker threads for DURATION seconds against a temporary SQLite
+file, each with its own app context and session, the way the threaded server
+handles requests. Each operation is a read (a pickup listing page plus a user
+lookup) or, with probability WRITE_RATIO, a write (a status change with its
+ledger entry, or a new pickup request), committed on its own.
+
+The "default" profile is Flask-SQLAlchemy's out of the box setup: rollback
+journal, the driver's 5 s lock timeout and a 5+10 connection pool. "tuned"
+is src.database.engine: WAL, synchronous=NORMAL, busy_timeout, mmap and
+cache pragmas, and a larger pool. Locked errors are operations that failed
+with "database is locked".
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [threads] [duration_seconds]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import threading
+import time
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from src.models.user import db, User, PointsLedgerEntry
+from src.models.pickup_request import PickupRequest
+from src.database.engine import apply_sqlite_pragmas, configure_database
+from src.database.migrations import migrate
+from src.services.batching import LatencyRecorder
+
+THREADS = 16
+DURATION = 10
+WRITE_RATIO = 0.3
+USERS = 200
+PICKUPS = 20000
+
+
+def make_app(path, tuned):
+    app = Flask(__name__)
+    url = f'sqlite:///{path}'
+    if tuned:
+        configure_database(app, url)
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = url
+    db.init_app(app)
+    with app.app_context():
+        if tuned:
+            apply_sqlite_pragmas(db.engine)
+        migrate()
+    return app
+
+
+def seed(app, rng):
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'user{index}', 'email': f'user{index}@example.com', 'password_hash': 'x'}
+            for index in range(USERS)
+        ])
+        db.session.execute(PickupRequest.__table__.insert(), [{
+            'requester_id': rng.randint(1, USERS), 'pickup_address': f'{index} Load Street',
+            'pickup_latitude': -26.2 + rng.uniform(-0.2, 0.2), 'pickup_longitude': 28.05 + rng.uniform(-0.2, 0.2),
+            'status': rng.choice(['pending', 'accepted', 'in_progress']), 'estimated_weight': rng.uniform(1, 30)
+        } for index in range(PICKUPS)])
+        db.session.commit()
+
+
+def read(rng):
+    PickupRequest.query.filter_by(status=rng.choice(['pending', 'accepted'])).order_by(
+        PickupRequest.created_at.desc(), PickupRequest.id.desc()
+    ).limit(20).all()
+    db.session.get(User, rng.randint(1, USERS))
+    db.session.commit()
+
+
+def write(rng):
+    if rng.random() < 0.7:
+        pickup_id = rng.randint(1, PICKUPS)
+        PickupRequest.query.filter_by(id=pickup_id).update(
+            {PickupRequest.status: 'completed'}, synchronize_session=False
+        )
+        db.session.add(PointsLedgerEntry(user_id=rng.randint(1, USERS), pickup_request_id=pickup_id,
+                                         points=50, recycled_weight=5.0))
+    else:
+        db.session.add(PickupRequest(requester_id=rng.randint(1, USERS), pickup_address='New Street',
+                                     pickup_latitude=-26.2, pickup_longitude=28.05))
+    db.session.commit()
+
+
+def run_profile(name, tuned, threads, duration):
+    directory = tempfile.mkdtemp()
+    app = make_app(os.path.join(directory, 'bench.db'), tuned)
+    seed(app, random.Random(1))
+
+    reads, writes = LatencyRecorder(), LatencyRecorder()
+    counts = {'reads': 0, 'writes': 0, 'locked': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                is_write = rng.random() < WRITE_RATIO
+                started = time.perf_counter()
+                try:
+                    write(rng) if is_write else read(rng)
+                except OperationalError as e:
+                    db.session.rollback()
+                    with lock:
+                        counts['locked' if 'locked' in str(e) else 'errors'] += 1
+                    continue
+                (writes if is_write else reads).record(time.perf_counter() - started)
+                with lock:
+                    counts['writes' if is_write else 'reads'] += 1
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    with app.app_context():
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.engine.dispose()
+
+    print(f'{name} profile ({journal_mode} journal), {threads} threads for {duration} s')
+    print(f'  reads:  {counts["reads"] / duration:8.0f}/s  latency {reads.percentiles()}')
+    print(f'  writes: {counts["writes"] / duration:8.0f}/s  latency {writes.percentiles()}')
+    print(f'  locked: {counts["locked"]}  other errors: {counts["errors"]}')
+    return counts
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else THREADS
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else DURATION
+
+    run_profile('default', False, threads, duration)
+    tuned = run_profile('tuned', True, threads, duration)
+    return 0 if tuned['locked'] == 0 and tuned['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark: dispatch solver on 50k open pickup requests x 5k wastepickers.
+
+Points are drawn around a few metro centres (plus a uniform rural scatter)
+so both dense and sparse areas are exercised. Times the candidate search
+and the greedy assignment separately, and checks a sample of requests
+against a brute-force nearest-wastepicker search.
+
+Usage:
+    python benchmarks/bench_dispatch.py [requests] [wastepickers]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from src.services import dispatch
+from src.services.geo import distances_from
+
+REQUESTS = 50000
+WASTEPICKERS = 5000
+# (latitude, longitude, spread in degrees, share of points)
+METROS = [
+    (-26.20, 28.05, 0.25, 0.45),   # Johannesburg
+    (-33.92, 18.42, 0.15, 0.25),   # Cape Town
+    (-29.86, 31.02, 0.12, 0.20),   # Durban
+]
+SAMPLE = 200
+
+
+def synthetic_points(count, rng):
+    lats, lons = [], []
+    for lat, lon, spread, share in METROS:
+        size = int(count * share)
+        lats.append(rng.normal(lat, spread, size))
+        lons.append(rng.normal(lon, spread, size))
+    rural = count - sum(len(part) for part in lats)
+    lats.append(rng.uniform(-34.5, -22.5, rural))
+    lons.append(rng.uniform(17.0, 32.5, rural))
+    return np.concatenate(lats), np.concatenate(lons)
+
+
+def main():
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    wastepicker_count = int(sys.argv[2]) if len(sys.argv) > 2 else WASTEPICKERS
+    rng = np.random.default_rng(42)
+
+    request_lats, request_lons = synthetic_points(request_count, rng)
+    wastepicker_lats, wastepicker_lons = synthetic_points(wastepicker_count, rng)
+    weights = rng.choice([np.nan, 2.0, 5.0, 12.0], request_count)
+    categories = rng.choice(['recyclable', 'organic', 'mixed', 'hazardous', None], request_count)
+    capacities = rng.integers(0, dispatch.MAX_ACTIVE_PICKUPS + 1, wastepicker_count)
+
+    started = time.perf_counter()
+    requests, wastepickers, distances = dispatch.candidate_pairs(
+        request_lats, request_lons, wastepicker_lats, wastepicker_lons
+    )
+    candidates_done = time.perf_counter()
+    plan = dispatch.solve_dispatch(request_lats, request_lons, weights, categories,
+                                   wastepicker_lats, wastepicker_lons, capacities)
+    solved = time.perf_counter()
+
+    # Every sampled request's candidates must be its true nearest wastepickers
+    mismatches = 0
+    for request in rng.choice(request_count, SAMPLE, replace=False):
+        all_distances = distances_from(request_lats[request], request_lons[request],
+                                       wastepicker_lats, wastepicker_lons, fast=True)
+        nearest = np.sort(all_distances[all_distances <= dispatch.DISPATCH_RADIUS_KM])[:dispatch.CANDIDATES_PER_REQUEST]
+        found = np.sort(distances[requests == request])
+        mismatches += not np.allclose(nearest, found)
+
+    per_wastepicker = np.bincount(plan.wastepicker_indices, minlength=wastepicker_count)
+    print(f'{request_count} requests x {wastepicker_count} wastepickers')
+    print(f'  candidate search: {(candidates_done - started) * 1000:8.1f} ms  ({len(requests)} pairs)')
+    print(f'  full solve:       {(solved - candidates_done) * 1000:8.1f} ms  (search + costs + greedy)')
+    print(f'  assigned:         {len(plan.request_indices)} of {request_count} '
+          f'(capacity {int(np.clip(capacities, 0, None).sum())})')
+    print(f'  mean distance:    {plan.distances.mean() if len(plan.distances) else 0:.2f} km')
+    print(f'  over capacity:    {int((per_wastepicker > capacities).sum())} wastepickers')
+    print(f'  brute-force check: {SAMPLE - mismatches}/{SAMPLE} sampled requests match')
+    return 1 if mismatches or (per_wastepicker > capacities).any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: shared vectorized geo module vs the old per-row haversine loop.
+
+Usage:
+    python benchmarks/bench_geo.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import time
+import numpy as np
+from src.services import geo
+
+SIZES = [1_000, 100_000, 1_000_000]
+ORIGIN = (-26.2041, 28.0473)  # Johannesburg
+RADIUS_KM = 25
+
+
+def per_row_distance(lat1, lon1, lat2, lon2):
+    """The haversine previously copy-pasted into each route module."""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    return c * 6371
+
+
+def per_row_radius(latitudes, longitudes):
+    matches = []
+    for i, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        distance = per_row_distance(ORIGIN[0], ORIGIN[1], lat, lon)
+        if distance <= RADIUS_KM:
+            matches.append((i, distance))
+    matches.sort(key=lambda x: x[1])
+    return matches
+
+
+def timed(func, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'points':>10} {'per-row loop':>14} {'distances_from':>15} {'equirect':>10} {'radius query':>13} {'speedup':>8}")
+    for size in SIZES:
+        # Points spread over South Africa
+        lats = rng.uniform(-34.8, -22.1, size)
+        lons = rng.uniform(16.5, 32.9, size)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+
+        loop_ms, loop_matches = timed(lambda: per_row_radius(lat_list, lon_list), repeat=1 if size > 100_000 else 3)
+        batch_ms, _ = timed(lambda: geo.distances_from(ORIGIN[0], ORIGIN[1], lats, lons))
+        fast_ms, _ = timed(lambda: geo.distances_from(ORIGIN[0], ORIGIN[1], lats, lons, fast=True))
+        radius_ms, (indices, _) = timed(lambda: geo.points_within_radius(ORIGIN[0], ORIGIN[1], lats, lons, RADIUS_KM))
+
+        assert sorted(indices.tolist()) == sorted(i for i, _ in loop_matches)
+        print(f"{size:>10,} {loop_ms:>12.2f}ms {batch_ms:>13.2f}ms {fast_ms:>8.2f}ms {radius_ms:>11.2f}ms {loop_ms / radius_ms:>7.0f}x")
+
+    # Accuracy of the equirectangular fast path at its cut-off distance
+    lats = rng.uniform(-34.8, -22.1, 10_000)
+    lons = rng.uniform(16.5, 32.9, 10_000)
+    bearings = rng.uniform(0, 2 * math.pi, 10_000)
+    offset = geo.EQUIRECTANGULAR_MAX_KM / geo.KM_PER_DEGREE
+    end_lats = lats + offset * np.cos(bearings)
+    end_lons = lons + offset * np.sin(bearings) / np.cos(np.radians(lats))
+    exact = np.array([per_row_distance(a, b, c, d) for a, b, c, d in zip(lats, lons, end_lats, end_lons)])
+    approx = np.array([geo.distances_from(a, b, [c], [d], fast=True)[0] for a, b, c, d in zip(lats, lons, end_lats, end_lons)])
+    print(f"equirectangular max relative error at ~{geo.EQUIRECTANGULAR_MAX_KM:.0f}km: {np.max(np.abs(approx - exact) / exact):.2e}")
+
+
+if __name__ == '__main__':
+    main()
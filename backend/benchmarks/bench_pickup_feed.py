@@ -0,0 +1,179 @@
+"""
+Load test: idle subscribers on the pickup request event stream.
+
+Starts the pickup blueprint on a threaded Werkzeug server backed by a
+temporary SQLite database and opens SUBSCRIBERS concurrent
+GET /api/pickup-requests/stream connections around a few cities. It then
+creates pickup requests over HTTP and measures how long their events take
+to reach the subscribers in range. It also reports the per-publish fan-out
+cost of GeoPubSub alone with a much larger subscriber count.
+
+Usage:
+    python benchmarks/bench_pickup_feed.py [subscribers] [events]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+import random
+import resource
+import selectors
+import socket
+import tempfile
+import threading
+import time
+from flask import Flask
+from werkzeug.serving import make_server
+from src.models.user import db, User
+from src.routes.pickup_requests import pickup_requests_bp
+from src.services import geo
+from src.services.batching import LatencyRecorder
+from src.services.pubsub import GeoPubSub, pickup_feed
+
+SUBSCRIBERS = 2000
+EVENTS = 200
+IN_PROCESS_SUBSCRIBERS = 50000
+CITIES = [(-26.20, 28.05), (-33.92, 18.42), (-29.86, 31.02), (-25.75, 28.19)]
+RADIUS_KM = 10
+
+
+def random_point(rng, spread=0.2):
+    latitude, longitude = rng.choice(CITIES)
+    return latitude + rng.uniform(-spread, spread), longitude + rng.uniform(-spread, spread)
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_in_process(rng):
+    feed = GeoPubSub()
+    started = time.perf_counter()
+    for _ in range(IN_PROCESS_SUBSCRIBERS):
+        feed.subscribe(*random_point(rng), RADIUS_KM)
+    subscribed = time.perf_counter()
+
+    delivered = 0
+    publishes = 2000
+    for _ in range(publishes):
+        delivered += feed.publish('created', {'id': 0}, *random_point(rng))
+    published = time.perf_counter()
+
+    print(f'GeoPubSub alone, {IN_PROCESS_SUBSCRIBERS} subscribers')
+    print(f'  subscribe: {(subscribed - started) / IN_PROCESS_SUBSCRIBERS * 1e6:.1f} us each')
+    print(f'  publish:   {(published - subscribed) / publishes * 1e3:.3f} ms each, '
+          f'{delivered / publishes:.0f} deliveries per event on average')
+
+
+def open_stream(port, latitude, longitude):
+    connection = socket.create_connection(('127.0.0.1', port))
+    connection.sendall(
+        f'GET /api/pickup-requests/stream?latitude={latitude}&longitude={longitude}&radius={RADIUS_KM} '
+        f'HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n'.encode()
+    )
+    connection.setblocking(False)
+    return connection
+
+
+def main():
+    subscriber_count = int(sys.argv[1]) if len(sys.argv) > 1 else SUBSCRIBERS
+    event_count = int(sys.argv[2]) if len(sys.argv) > 2 else EVENTS
+    rng = random.Random(7)
+
+    bench_in_process(rng)
+
+    directory = tempfile.mkdtemp()
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    db.init_app(app)
+    app.register_blueprint(pickup_requests_bp, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+        requester = User(username='requester', email='requester@example.com', password_hash='x')
+        db.session.add(requester)
+        db.session.commit()
+        requester_id = requester.id
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # Server threads only hold an idle queue wait, so a small stack is plenty
+    threading.stack_size(512 * 1024)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    baseline_rss = rss_mb()
+
+    selector = selectors.DefaultSelector()
+    subscribers = []
+    started = time.perf_counter()
+    for index in range(subscriber_count):
+        latitude, longitude = random_point(rng)
+        connection = open_stream(port, latitude, longitude)
+        selector.register(connection, selectors.EVENT_READ, index)
+        subscribers.append((latitude, longitude))
+    while pickup_feed.stats()['subscribers'] < subscriber_count and time.perf_counter() - started < 60:
+        time.sleep(0.05)
+    connected = time.perf_counter()
+    subscribed = pickup_feed.stats()['subscribers']
+
+    latency = LatencyRecorder()
+    sent_at = {}
+    received = [0]
+    stop = threading.Event()
+
+    def read_streams():
+        buffers = {}
+        while not stop.is_set():
+            for key, _ in selector.select(timeout=0.1):
+                chunk = key.fileobj.recv(65536)
+                now = time.perf_counter()
+                *messages, buffers[key.data] = (buffers.get(key.data, b'') + chunk).split(b'\n\n')
+                for message in messages:
+                    for line in message.split(b'\n'):
+                        if line.startswith(b'data: '):
+                            latency.record(now - sent_at[json.loads(line[6:])['pickup_address']])
+                            received[0] += 1
+
+    reader = threading.Thread(target=read_streams)
+    reader.start()
+
+    expected = 0
+    client = app.test_client()
+    for index in range(event_count):
+        latitude, longitude = random_point(rng)
+        address = f'Load test {index}'
+        sent_at[address] = time.perf_counter()
+        client.post('/api/pickup-requests', json={
+            'requester_id': requester_id, 'pickup_address': address,
+            'pickup_latitude': latitude, 'pickup_longitude': longitude
+        })
+        expected += sum(
+            geo.haversine(latitude, longitude, sub_latitude, sub_longitude) <= RADIUS_KM
+            for sub_latitude, sub_longitude in subscribers
+        )
+        time.sleep(0.01)
+
+    deadline = time.perf_counter() + 10
+    while received[0] < expected and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    reader.join()
+    received = received[0]
+
+    print(f'HTTP event stream, {subscribed}/{subscriber_count} idle subscribers connected '
+          f'in {connected - started:.1f} s')
+    print(f'  threads:   {threading.active_count()}')
+    print(f'  max RSS:   {rss_mb():.0f} MB ({(rss_mb() - baseline_rss) * 1024 / max(subscribed, 1):.0f} KB '
+          f'per subscriber)')
+    print(f'  events:    {event_count} created, {received}/{expected} deliveries received')
+    print(f'  latency:   {latency.percentiles()} (create to client receipt)')
+
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    server.shutdown()
+    return 0 if received == expected and subscribed == subscriber_count else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
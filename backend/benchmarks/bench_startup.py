@@ -0,0 +1,79 @@
+"""
+Benchmark: cost of booting one app worker.
+
+Starts RUNS fresh interpreters that each import src.app and call
+create_app() against a temporary SQLite database, the way a pre-fork server
+boots or recycles a worker. Reports the wall time of the whole process and
+the per-phase timings create_app() records, for three cases: the first boot
+(schema created), a boot against an already migrated database, and a worker
+boot with MIGRATE_ON_STARTUP off (schema managed by `flask init-db`).
+
+Usage:
+    python benchmarks/bench_startup.py [runs]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+RUNS = 5
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+from src.app import create_app
+imported = time.perf_counter()
+app = create_app({{'SQLALCHEMY_DATABASE_URI': {uri!r}, 'MIGRATE_ON_STARTUP': {migrate!r}}})
+timings = dict(app.extensions['startup_timings'], import_app=round((imported - started) * 1000, 2))
+timings['heavy_modules'] = sorted(name for name in ('requests', 'bs4', 'src.services.mock_ai_classifier')
+                                  if name in sys.modules)
+print(json.dumps(timings))
+'''
+
+
+def boot(uri, migrate):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.format(uri=uri, migrate=migrate)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = round((time.perf_counter() - started) * 1000, 2)
+    return timings
+
+
+def report(label, runs):
+    phases = ['process', 'import_app', 'config', 'blueprints', 'database', 'services', 'total']
+    medians = {phase: statistics.median(run[phase] for run in runs) for phase in phases}
+    print(f'{label} (median of {len(runs)} runs, ms)')
+    print('  ' + '  '.join(f'{phase} {medians[phase]:.1f}' for phase in phases))
+    heavy = runs[-1]['heavy_modules']
+    print(f'  heavy modules loaded at startup: {", ".join(heavy) if heavy else "none"}')
+    return heavy
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+
+    first_boots = []
+    for _ in range(runs):
+        uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+        first_boots.append(boot(uri, True))
+    heavy = report('first boot, schema created', first_boots)
+
+    uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+    boot(uri, True)
+    heavy += report('boot against a migrated database', [boot(uri, True) for _ in range(runs)])
+    heavy += report('worker boot, MIGRATE_ON_STARTUP off', [boot(uri, False) for _ in range(runs)])
+    return 1 if heavy else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark: peak Python memory of streaming upload ingestion vs reading the whole body.
+
+Feeds synthetic PNG payloads of growing size, up to the largest upload the
+app accepts, through store_upload_stream and through a read-everything
+baseline, measuring peak allocations with tracemalloc. The streaming peak
+should stay at about UPLOAD_SPOOL_SIZE whatever the upload size.
+
+Usage:
+    python benchmarks/bench_upload_memory.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import io
+import tempfile
+import time
+import tracemalloc
+from src.services.uploads import MAX_UPLOAD_BYTES, store_upload_stream
+
+SIZES_MB = [1, 2, 5, MAX_UPLOAD_BYTES // (1024 * 1024)]
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+class SyntheticImageStream(io.RawIOBase):
+    """Readable stream of `size` bytes starting with a PNG signature, generated on the fly."""
+
+    def __init__(self, size, seed):
+        self.remaining = size
+        self.header = PNG_HEADER + seed.to_bytes(8, 'big')
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        if self.remaining <= 0:
+            return b''
+        if n is None or n < 0:
+            n = self.remaining
+        n = min(n, self.remaining)
+        if self.header:
+            chunk, self.header = self.header[:n], self.header[n:]
+            chunk += b'\0' * (n - len(chunk))
+        else:
+            chunk = b'\0' * n
+        self.remaining -= n
+        return chunk
+
+
+def read_whole_body(stream, upload_dir):
+    """Baseline: buffer the entire body before hashing and writing it."""
+    body = stream.read()
+    path = os.path.join(upload_dir, hashlib.sha256(body).hexdigest() + '.png')
+    with open(path, 'wb') as output:
+        output.write(body)
+    return path
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def main():
+    print(f"{'upload':>8} {'whole-body peak':>16} {'streaming peak':>15} {'streaming time':>15}")
+    with tempfile.TemporaryDirectory() as upload_dir:
+        for seed, size_mb in enumerate(SIZES_MB):
+            size = size_mb * 1024 * 1024
+            baseline_peak, _ = measure(lambda: read_whole_body(SyntheticImageStream(size, seed), upload_dir))
+            streaming_peak, elapsed = measure(lambda: store_upload_stream(
+                SyntheticImageStream(size, seed + 100), upload_dir, max_bytes=size
+            ))
+            print(f"{size_mb:>6}MB {baseline_peak:>14.1f}MB {streaming_peak:>13.2f}MB {elapsed * 1000:>13.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
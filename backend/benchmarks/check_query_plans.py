@@ -0,0 +1,55 @@
+"""
+Check that the hot API queries are served by indexes.
+
+Runs EXPLAIN QUERY PLAN on every query in src.database.query_plans.HOT_QUERIES,
+which are built by the routes' own query helpers, and exits non-zero if any
+of them reads a whole table. tests/test_query_plans.py runs the same check.
+Without an argument the check runs on a fresh temporary SQLite database built
+by migrate(), which catches a model index being removed or a route query
+changing shape; given the path of an existing SQLite database it checks that
+database as it is, which shows whether its migrations have been applied.
+
+Usage:
+    python benchmarks/check_query_plans.py [path/to/app.db]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+from flask import Flask
+from src.models.user import db
+from src.database.migrations import migrate
+from src.database.query_plans import check_query_plans
+
+
+def main():
+    app = Flask(__name__)
+    if len(sys.argv) > 1:
+        path = os.path.abspath(sys.argv[1])
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'plans.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+
+    with app.app_context():
+        if len(sys.argv) == 1:
+            migrate()
+        plans = check_query_plans()
+
+    failures = 0
+    for plan in plans:
+        status = 'FAIL' if plan.problems else 'ok'
+        failures += bool(plan.problems)
+        print(f'{status:4}  {plan.name}')
+        for step in plan.steps:
+            print(f'        {step}')
+        for problem in plan.problems:
+            if problem not in plan.steps:
+                print(f'        {problem}')
+    print(f'{len(plans) - failures}/{len(plans)} hot queries use an index')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,12 +2,13 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 
-from src.main import app
+from src.app import create_app
 from src.models.user import db, User
 from src.models.recycling_center import RecyclingCenter
 import json
 
 def create_sample_data():
+    app = create_app()
     with app.app_context():
         # Create sample users
         users_data = [
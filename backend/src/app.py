@@ -3,43 +3,188 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import time
+from typing import Any, Dict, Optional
+
+import click
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
-from src.routes.user import user_bp
-from src.routes.seed_petco_centres import seed_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(seed_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+from src.database.engine import apply_sqlite_pragmas, configure_database
+from src.services.uploads import MAX_UPLOAD_BYTES
+
+
+def register_blueprints(app: Flask) -> None:
+    """Mount every API blueprint under /api."""
+    from src.routes.user import user_bp
+    from src.routes.seed_petco_centres import seed_bp
+    from src.routes.pickup_requests import pickup_requests_bp
+    from src.routes.waste_identification import waste_identification_bp
+    from src.routes.recycyling_centers import recycling_centers_bp
+    from src.routes.dispatch import dispatch_bp
+
+    for blueprint in (user_bp, seed_bp, pickup_requests_bp, waste_identification_bp,
+                      recycling_centers_bp, dispatch_bp):
+        app.register_blueprint(blueprint, url_prefix='/api')
+
+
+def init_database(app: Flask, backfill: bool = False) -> None:
+    """
+    Create or migrate the schema.
+
+    Worker boot stops there: the one-off data backfills run once per database
+    as migrations. `flask init-db` passes backfill=True to run them again,
+    e.g. after rows were written around the ORM listeners.
+    """
+    from src.database.migrations import migrate
+    from src.models.recycling_center import backfill_center_materials
+    from src.models.waste_item import backfill_waste_rollups
+
+    with app.app_context():
+        # Creates missing tables and applies pending migrations
+        migrate()
+        if backfill:
+            # Keep the normalized materials table in step with legacy accepted_materials JSON
+            backfill_center_materials()
+            backfill_waste_rollups()
+
+
+def start_points_ledger_applier(app: Flask, interval: float) -> None:
+    """Fold completed-pickup points and weight from the ledger into user totals every `interval` seconds."""
+    from src.services.points_ledger import PointsLedgerApplier
+
+    if interval and 'points_ledger_applier' not in app.extensions:
+        app.extensions['points_ledger_applier'] = PointsLedgerApplier(interval)
+        app.extensions['points_ledger_applier'].start(app)
+
+
+def start_background_services(app: Flask) -> None:
+    """
+    Start the periodic jobs whose interval is set; each is kept in app.extensions.
+
+    Both are off by default, so scripts, CLI commands, the reloader's parent
+    process and a pre-fork master building the app start no threads. The
+    serving entrypoint below starts the ledger applier; other deployments
+    run `flask apply-points-ledger --interval N` as its own process.
+    """
+    from src.services.dispatch import DispatchScheduler
+
+    # Periodically suggest wastepickers for pending pickups
+    if app.config.get('DISPATCH_INTERVAL_SECONDS'):
+        app.extensions['dispatch_scheduler'] = DispatchScheduler(float(app.config['DISPATCH_INTERVAL_SECONDS']))
+        app.extensions['dispatch_scheduler'].start(app)
+
+    start_points_ledger_applier(app, float(app.config.get('POINTS_LEDGER_INTERVAL_SECONDS') or 0))
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Build the EcoConnect API app.
+
+    Args:
+        config: Values overriding the defaults and environment, e.g.
+            SQLALCHEMY_DATABASE_URI, MIGRATE_ON_STARTUP (False leaves the
+            schema to `flask init-db`), DISPATCH_INTERVAL_SECONDS or
+            POINTS_LEDGER_INTERVAL_SECONDS (0, the default, leaves the job off)
+
+    Returns:
+        The app, with per-phase startup times in milliseconds in
+        app.extensions['startup_timings']
+    """
+    timings = {}
+    started = phase_started = time.perf_counter()
+
+    def phase(name):
+        nonlocal phase_started
+        now = time.perf_counter()
+        timings[name] = round((now - phase_started) * 1000, 2)
+        phase_started = now
+
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Reject oversize request bodies before they are read
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_BYTES', MAX_UPLOAD_BYTES))
+    app.config['MIGRATE_ON_STARTUP'] = os.getenv('MIGRATE_ON_STARTUP', '1') != '0'
+    app.config['DISPATCH_INTERVAL_SECONDS'] = float(os.getenv('DISPATCH_INTERVAL_SECONDS', 0))
+    app.config['POINTS_LEDGER_INTERVAL_SECONDS'] = float(os.getenv('POINTS_LEDGER_INTERVAL_SECONDS', 0))
+    app.config.update(config or {})
+
+    # src/database/app.db unless DATABASE_URL (or the config) points elsewhere, e.g. Postgres
+    configure_database(app)
+    db.init_app(app)
+    with app.app_context():
+        # WAL, busy timeout and cache pragmas on every SQLite connection
+        apply_sqlite_pragmas(db.engine)
+    phase('config')
+
+    register_blueprints(app)
+    phase('blueprints')
+
+    if app.config['MIGRATE_ON_STARTUP']:
+        init_database(app)
+    phase('database')
+
+    start_background_services(app)
+    phase('services')
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create or migrate the schema and run the data backfills."""
+        init_database(app, backfill=True)
+
+    @app.cli.command('apply-points-ledger')
+    @click.option('--interval', type=float, default=0,
+                  help='Seconds between passes; 0 applies the pending entries once and exits.')
+    def apply_points_ledger_command(interval):
+        """Fold unapplied points ledger entries into user totals."""
+        from src.services.points_ledger import apply_points_ledger
+
+        while True:
+            click.echo(f'Applied {apply_points_ledger()}')
+            if not interval:
+                break
+            time.sleep(interval)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 2)
+    app.extensions['startup_timings'] = timings
+    app.logger.info('App created in %.1f ms: %s', timings['total'], timings)
+    return app
+
+
+_app = None
+
+def __getattr__(name):
+    # `from src.app import app` and `src.app:app` keep working, but the app is
+    # only built when first asked for, not as a side effect of the import
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 if __name__ == '__main__':
+    app = create_app()
+    # The debug reloader runs this file in a watcher process and a serving
+    # child; only the child, which handles requests, folds the ledger
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_points_ledger_applier(app, float(os.getenv('POINTS_LEDGER_INTERVAL_SECONDS', 5)))
     app.run(host='0.0.0.0', port=5000, debug=True)
-    print("ADMIN_SEED_TOKEN:", os.getenv("ADMIN_SEED_TOKEN"))
@@ -0,0 +1,102 @@
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), 'app.db')
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer instead of blocking it, and a writer waits up to busy_timeout
+# for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',     # Still durable across app crashes in WAL mode; fsyncs only at checkpoints
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,    # Negative means KiB, so 64 MiB per connection
+    'temp_store': 'MEMORY',
+}
+
+# Connections kept open per process; Flask's threaded server needs one per busy request
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+
+
+def database_url(url: Optional[str] = None) -> str:
+    """
+    The database to connect to: url, else DATABASE_URL, else the bundled SQLite file.
+
+    Heroku-style postgres:// URLs are rewritten to the postgresql:// scheme
+    SQLAlchemy expects.
+    """
+    url = url or os.getenv('DATABASE_URL')
+    if not url:
+        return f'sqlite:///{DEFAULT_SQLITE_PATH}'
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Pool settings for SQLALCHEMY_ENGINE_OPTIONS, by backend."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        if parsed.database in (None, '', ':memory:'):
+            # An in-memory database only exists on its one connection
+            return {}
+        return {'pool_size': POOL_SIZE, 'max_overflow': MAX_OVERFLOW, 'pool_timeout': 30}
+    return {
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'pool_timeout': 30,
+        # Drop connections the server or a proxy closed while idle
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+
+def configure_database(app, url: Optional[str] = None) -> None:
+    """
+    Set the database URI and pool options on a Flask app, before db.init_app().
+
+    Values already in app.config win.
+    """
+    uri = app.config.setdefault('SQLALCHEMY_DATABASE_URI', database_url(url))
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Run SQLITE_PRAGMAS (or pragmas) on each connection the engine opens.
+
+    Does nothing for other backends. Call before the engine's first connection
+    is made, e.g. right after db.init_app().
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def dialect_insert(table, dialect_name: str):
+    """
+    INSERT for the given backend that supports on_conflict_do_update/do_nothing.
+
+    SQLite (3.24+) and PostgreSQL share the ON CONFLICT syntax, so callers can
+    build one upsert for both.
+    """
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f'No upsert support for the {dialect_name} dialect')
+    return insert(table)
@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+# Models register their tables and indexes on db.metadata when imported
+from src.models import (  # noqa: F401
+    classification_job, pickup_request, pickup_suggestion, recycling_center, waste_item, wastepicker_stats
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+
+schema_version = db.Table(
+    'schema_version', db.metadata,
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+
+def create_indexes(*names: str) -> Callable:
+    """Migration step creating the named model indexes that do not exist yet."""
+    def apply(connection):
+        indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+        for name in names:
+            indexes[name].create(connection, checkfirst=True)
+    return apply
+
+
+def add_columns(table_name: str, *names: str) -> Callable:
+    """Migration step adding nullable model columns that a table created before them lacks."""
+    def apply(connection):
+        table = db.metadata.tables[table_name]
+        existing = {column['name'] for column in inspect(connection).get_columns(table_name)}
+        for name in names:
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(db.text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+    return apply
+
+
+def run_backfill(backfill: Callable) -> Callable:
+    """Migration step running a one-off data backfill, given a session, in the migration's transaction."""
+    def apply(connection):
+        # The session joins the migration's transaction; its commit() does not end it
+        with Session(bind=connection) as session:
+            backfill(session)
+    return apply
+
+
+# Applied once per database, in version order, and recorded in schema_version.
+# create_all() never alters a table that already exists, so an index declared
+# on a model later only reaches existing databases through a migration here.
+# Append new ones with the next version number; they add to the schema and
+# never drop or rewrite data.
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'Hot query path indexes', create_indexes(
+        'ix_pickup_requests_status_location',
+        'ix_pickup_requests_created',
+        'ix_pickup_requests_status_created',
+        'ix_pickup_requests_requester_created',
+        'ix_pickup_requests_wastepicker_created',
+        'ix_waste_items_user_created',
+        'ix_recycling_centers_active',
+        'ix_recycling_center_materials_material',
+        'ix_user_type_active',
+        'ix_pickup_suggestions_wastepicker_cost',
+        'ix_points_ledger_user_applied',
+        'ix_points_ledger_applied_id',
+    )),
+    Migration(2, 'Nearby pickup search without a status filter', create_indexes(
+        'ix_pickup_requests_location',
+    )),
+    Migration(3, 'Stored waste item thumbnails', add_columns('waste_items', 'thumbnail_path')),
+    Migration(4, 'Normalized recycling center materials', run_backfill(recycling_center.backfill_center_materials)),
+    Migration(5, 'Per-user waste category rollups', run_backfill(waste_item.backfill_waste_rollups)),
+]
+
+
+def applied_versions() -> Dict[int, datetime]:
+    """Versions recorded in schema_version, with when they were applied."""
+    if not inspect(db.engine).has_table('schema_version'):
+        return {}
+    with db.engine.connect() as connection:
+        rows = connection.execute(db.select(schema_version.c.version, schema_version.c.applied_at)).all()
+    return dict(rows)
+
+
+def migrate() -> List[int]:
+    """
+    Create missing tables, then apply pending migrations in version order.
+
+    Each migration runs in its own transaction together with its
+    schema_version row, so a failed migration leaves no record and is retried
+    on the next start. If another process applies the same version first, the
+    duplicate is rolled back.
+
+    Returns:
+        Versions applied by this call
+    """
+    db.create_all()
+    done = applied_versions()
+    applied = []
+    for migration in sorted(MIGRATIONS, key=lambda migration: migration.version):
+        if migration.version in done:
+            continue
+        try:
+            with db.engine.begin() as connection:
+                migration.apply(connection)
+                connection.execute(schema_version.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            continue
+        applied.append(migration.version)
+    return applied
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+
+from sqlalchemy.exc import OperationalError
+
+from src.models.user import db, User, with_points_totals
+from src.models.pickup_request import (
+    PickupRequest, nearby_pickups_query, pickup_listing_query, recent_pickups_query
+)
+from src.models.pickup_suggestion import wastepicker_suggestions_query
+from src.models.recycling_center import RecyclingCenter, active_centers_query
+from src.models.waste_item import WasteItem, recent_waste_items_query, waste_history_query
+from src.services import geo
+from src.services.dispatch import active_loads_query, available_wastepickers_query, pending_pickups_query
+from src.services.pagination import encode_cursor, keyset_query
+from src.services.points_ledger import unapplied_entries_query
+
+
+class QueryPlan(NamedTuple):
+    name: str
+    steps: List[str]     # EXPLAIN QUERY PLAN detail lines
+    problems: List[str]  # Steps reading a whole table without an index, or why it could not be explained
+
+
+def _since():
+    return datetime.utcnow() - timedelta(days=30)
+
+
+def _pickup_page(query, direction=None):
+    # A first page, or one past a cursor in the given direction, as keyset_page runs it
+    cursor = encode_cursor(datetime(2024, 1, 1), 1000, direction) if direction else None
+    return keyset_query(query, PickupRequest.created_at, PickupRequest.id, 20, cursor)[0]
+
+
+def _history_page(direction=None):
+    cursor = encode_cursor(datetime(2024, 1, 1), 1000, direction) if direction else None
+    return keyset_query(waste_history_query(1), WasteItem.created_at, WasteItem.id, 20, cursor)[0]
+
+
+# The queries the API runs on every request, built by the same helpers the
+# routes and services use, so a change to one of them is checked here too
+HOT_QUERIES: List[tuple] = [
+    ('pickup listing', lambda: _pickup_page(pickup_listing_query())),
+    ('pickup listing, next page', lambda: _pickup_page(pickup_listing_query(), 'next')),
+    ('pickup listing by status', lambda: _pickup_page(pickup_listing_query(status='pending'))),
+    ('pickup listing by status, previous page',
+        lambda: _pickup_page(pickup_listing_query(status='pending'), 'prev')),
+    ('pickup listing by requester', lambda: _pickup_page(pickup_listing_query(requester_id=1))),
+    ('pickup listing by wastepicker, next page',
+        lambda: _pickup_page(pickup_listing_query(wastepicker_id=1), 'next')),
+    ('nearby pending pickups', lambda: nearby_pickups_query(
+        pickup_listing_query(status='pending'), geo.bounding_box(-26.2, 28.05, 25))),
+    ('nearby pickups', lambda: nearby_pickups_query(
+        pickup_listing_query(), geo.bounding_box(-26.2, 28.05, 25))),
+    ('wastepicker 30-day pickups', lambda: recent_pickups_query(1, _since())),
+    ('dispatch pending pickups', pending_pickups_query),
+    ('dispatch wastepickers', available_wastepickers_query),
+    ('wastepicker active loads', active_loads_query),
+    ('wastepicker suggestions', lambda: wastepicker_suggestions_query(1)),
+    ('waste history', _history_page),
+    ('waste history, next page', lambda: _history_page('next')),
+    ('waste 30-day activity', lambda: recent_waste_items_query(1, _since())),
+    ('active recycling centers', lambda: active_centers_query().limit(20)),
+    ('nearby centers accepting a material', lambda: active_centers_query('plastic').filter(
+        RecyclingCenter.id.in_([1, 2, 3]))),
+    ('unapplied points ledger', unapplied_entries_query),
+    ('login with pending points', lambda: User.query.options(with_points_totals())
+        .filter_by(email='user@example.com')),
+]
+
+
+def explain(query) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for a query, in plan order (SQLite only)."""
+    statement = getattr(query, 'statement', query)
+    # Inlined values, since the plan can depend on them (e.g. LIMIT)
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans(queries: List[tuple] = None) -> List[QueryPlan]:
+    """
+    Explain each hot query and flag steps that scan a whole table.
+
+    A scan that walks an index in order ("SCAN t USING INDEX ...") is not
+    flagged; a bare "SCAN t" is.
+
+    Args:
+        queries: (name, callable returning a query) pairs; defaults to HOT_QUERIES
+
+    Returns:
+        One QueryPlan per query
+    """
+    plans = []
+    for name, build in queries or HOT_QUERIES:
+        try:
+            steps = explain(build())
+        except OperationalError as e:
+            # e.g. a table the migrations have not created yet
+            db.session.rollback()
+            plans.append(QueryPlan(name, [], [str(e.orig)]))
+            continue
+        scans = [step for step in steps if step.startswith('SCAN ') and ' USING ' not in step]
+        plans.append(QueryPlan(name, steps, scans))
+    return plans
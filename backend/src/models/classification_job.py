@@ -0,0 +1,26 @@
+from src.models.user import db
+
+class ClassificationJobRecord(db.Model):
+    """
+    Status and result of a queued waste classification.
+
+    Written by the worker process running the job, so a poll served by any
+    other process of the deployment still finds it.
+    """
+    __tablename__ = 'classification_jobs'
+    __table_args__ = (
+        # Finished jobs past their retention, pruned on submit
+        db.Index('ix_classification_jobs_finished', 'finished_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    result = db.Column(db.Text)  # JSON of the handler's return value
+    error = db.Column(db.Text)
+    # Unix timestamps, as kept by the in-memory ClassificationJob
+    created_at = db.Column(db.Float, nullable=False)
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<ClassificationJobRecord {self.id} - {self.status}>'
@@ -1,7 +1,20 @@
-from src.models.user import db
+from typing import Iterable, Optional
+from sqlalchemy.orm import load_only, selectinload
+from src.models.user import db, POINTS_TOTALS
 
 class PickupRequest(db.Model):
     __tablename__ = 'pickup_requests'
+    __table_args__ = (
+        # Serves the status filter plus the lat/lon bounding box of nearby-pickup searches
+        db.Index('ix_pickup_requests_status_location', 'status', 'pickup_latitude', 'pickup_longitude'),
+        # The same bounding box when no status is given
+        db.Index('ix_pickup_requests_location', 'pickup_latitude', 'pickup_longitude'),
+        # Newest-first listings and their keyset cursors, unfiltered and per filter column
+        db.Index('ix_pickup_requests_created', 'created_at', 'id'),
+        db.Index('ix_pickup_requests_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_pickup_requests_requester_created', 'requester_id', 'created_at', 'id'),
+        db.Index('ix_pickup_requests_wastepicker_created', 'wastepicker_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -26,23 +39,115 @@ class PickupRequest(db.Model):
     def __repr__(self):
         return f'<PickupRequest {self.id} - {self.status}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'requester_id': self.requester_id,
-            'wastepicker_id': self.wastepicker_id,
-            'pickup_address': self.pickup_address,
-            'pickup_latitude': self.pickup_latitude,
-            'pickup_longitude': self.pickup_longitude,
-            'waste_description': self.waste_description,
-            'waste_category': self.waste_category,
-            'estimated_weight': self.estimated_weight,
-            'pickup_date': self.pickup_date.isoformat() if self.pickup_date else None,
-            'status': self.status,
-            'special_instructions': self.special_instructions,
-            'payment_amount': self.payment_amount,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'requester': self.requester.to_dict() if self.requester else None,
-            'wastepicker': self.wastepicker.to_dict() if self.wastepicker else None
-        }
\ No newline at end of file
+    # Columns and relationships the API can return, in response order
+    FIELDS = (
+        'id', 'requester_id', 'wastepicker_id', 'pickup_address', 'pickup_latitude', 'pickup_longitude',
+        'waste_description', 'waste_category', 'estimated_weight', 'pickup_date', 'status',
+        'special_instructions', 'payment_amount', 'created_at', 'updated_at'
+    )
+    RELATIONSHIPS = ('requester', 'wastepicker')
+
+    @classmethod
+    def parse_fieldset(cls, fields: Optional[str], include: Optional[str]):
+        """
+        Parse comma-separated ?fields= and ?include= values.
+
+        Returns (None, None), meaning every column plus both users, when
+        neither is given. Otherwise unlisted relationships are left out and a
+        missing fields means every column.
+
+        Raises:
+            ValueError: If a name is not in FIELDS or RELATIONSHIPS
+        """
+        if fields is None and include is None:
+            return None, None
+        field_list = None if fields is None else [name.strip() for name in fields.split(',') if name.strip()]
+        include_list = [] if include is None else [name.strip() for name in include.split(',') if name.strip()]
+
+        unknown = [name for name in field_list or [] if name not in cls.FIELDS]
+        unknown += [name for name in include_list if name not in cls.RELATIONSHIPS]
+        if unknown:
+            raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+        return field_list, include_list
+
+    @classmethod
+    def loader_options(cls, fields: Optional[Iterable[str]] = None,
+                       include: Optional[Iterable[str]] = None) -> list:
+        """
+        Query options loading only what to_dict(fields, include) will read.
+
+        Selected relationships are fetched with one extra IN query each, however
+        many rows are loaded.
+        """
+        include = cls.RELATIONSHIPS if include is None else tuple(include)
+        options = []
+        if fields is not None:
+            # id and created_at are always loaded, they key listings and cursors
+            columns = {'id', 'created_at', *fields}
+            columns.update(f'{relationship}_id' for relationship in include)
+            options.append(load_only(*(getattr(cls, column) for column in cls.FIELDS if column in columns)))
+        # Embedded users show their points totals
+        options.extend(selectinload(getattr(cls, relationship)).undefer_group(POINTS_TOTALS)
+                       for relationship in include)
+        return options
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None, include: Optional[Iterable[str]] = None):
+        """
+        Serialize the request.
+
+        Args:
+            fields: Columns to return (default: all of FIELDS)
+            include: Related users to embed (default: requester and wastepicker)
+        """
+        fields = self.FIELDS if fields is None else [field for field in self.FIELDS if field in set(fields)]
+        include = self.RELATIONSHIPS if include is None else include
+
+        data = {}
+        for field in fields:
+            value = getattr(self, field)
+            if field in ('pickup_date', 'created_at', 'updated_at'):
+                value = value.isoformat() if value else None
+            data[field] = value
+        for relationship in include:
+            related = getattr(self, relationship)
+            data[relationship] = related.to_dict() if related else None
+        return data
+
+
+# Route queries, shared with src.database.query_plans so the plan check runs
+# the statements the API does
+
+def pickup_listing_query(status: Optional[str] = None, requester_id: Optional[int] = None,
+                         wastepicker_id: Optional[int] = None):
+    """Pickup requests matching the listing filters, unordered; falsy filters are left out."""
+    query = PickupRequest.query
+    if status:
+        query = query.filter_by(status=status)
+    if requester_id:
+        query = query.filter_by(requester_id=requester_id)
+    if wastepicker_id:
+        query = query.filter_by(wastepicker_id=wastepicker_id)
+    return query
+
+
+def nearby_pickups_query(query, bounding_box):
+    """
+    (id, pickup_latitude, pickup_longitude) of the rows of `query` inside a bounding box.
+
+    Args:
+        query: A pickup_listing_query()
+        bounding_box: (min_lat, max_lat, min_lon, max_lon), e.g. from geo.bounding_box
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box
+    return query.filter(
+        PickupRequest.pickup_latitude.between(min_lat, max_lat),
+        PickupRequest.pickup_longitude.between(min_lon, max_lon)
+    ).with_entities(PickupRequest.id, PickupRequest.pickup_latitude, PickupRequest.pickup_longitude)
+
+
+def recent_pickups_query(wastepicker_id: int, since):
+    """COUNT of a wastepicker's pickup requests created since a datetime."""
+    return db.session.query(db.func.count(PickupRequest.id)).filter(
+        PickupRequest.wastepicker_id == wastepicker_id,
+        PickupRequest.created_at >= since
+    )
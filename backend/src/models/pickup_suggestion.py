@@ -0,0 +1,40 @@
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+
+class PickupSuggestion(db.Model):
+    """Wastepicker suggested for a pending pickup request by the latest dispatch run."""
+    __tablename__ = 'pickup_suggestions'
+    __table_args__ = (
+        # A wastepicker's suggestions, cheapest first
+        db.Index('ix_pickup_suggestions_wastepicker_cost', 'wastepicker_id', 'cost'),
+    )
+
+    pickup_request_id = db.Column(db.Integer, db.ForeignKey('pickup_requests.id'), primary_key=True)
+    wastepicker_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    distance_km = db.Column(db.Float, nullable=False)
+    cost = db.Column(db.Float, nullable=False)
+    dispatch_run = db.Column(db.String(32), nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<PickupSuggestion {self.pickup_request_id} -> {self.wastepicker_id}>'
+
+    def to_dict(self):
+        return {
+            'pickup_request_id': self.pickup_request_id,
+            'wastepicker_id': self.wastepicker_id,
+            'distance_km': round(self.distance_km, 2),
+            'cost': round(self.cost, 3),
+            'dispatch_run': self.dispatch_run,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+def wastepicker_suggestions_query(wastepicker_id):
+    """(PickupSuggestion, PickupRequest) pairs for a wastepicker's still pending suggestions, cheapest first."""
+    return db.session.query(PickupSuggestion, PickupRequest).join(
+        PickupRequest, PickupRequest.id == PickupSuggestion.pickup_request_id
+    ).filter(
+        PickupSuggestion.wastepicker_id == wastepicker_id,
+        PickupRequest.status == 'pending'
+    ).order_by(PickupSuggestion.cost)
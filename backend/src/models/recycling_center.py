@@ -1,7 +1,42 @@
+import json
+from sqlalchemy.orm import validates
 from src.models.user import db
 
+
+def parse_materials(value):
+    """Normalize an accepted_materials JSON string or list into a set of lowercase names."""
+    if not value:
+        return set()
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return set()
+    if not isinstance(value, list):
+        return set()
+    return {str(material).strip().lower() for material in value if str(material).strip()}
+
+
+class RecyclingCenterMaterial(db.Model):
+    """One row per material a recycling center accepts, mirroring its accepted_materials JSON."""
+    __tablename__ = 'recycling_center_materials'
+    __table_args__ = (
+        db.Index('ix_recycling_center_materials_material', 'material', 'center_id'),
+    )
+
+    center_id = db.Column(db.Integer, db.ForeignKey('recycling_centers.id'), primary_key=True)
+    material = db.Column(db.String(50), primary_key=True)
+
+    def __repr__(self):
+        return f'<RecyclingCenterMaterial {self.center_id} - {self.material}>'
+
+
 class RecyclingCenter(db.Model):
     __tablename__ = 'recycling_centers'
+    __table_args__ = (
+        # Active-center listings and the spatial index load
+        db.Index('ix_recycling_centers_active', 'is_active', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -20,9 +55,32 @@ class RecyclingCenter(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    # Normalized copy of accepted_materials, kept in sync whenever the JSON column is assigned
+    materials = db.relationship('RecyclingCenterMaterial', cascade='all, delete-orphan', lazy=True)
+
     def __repr__(self):
         return f'<RecyclingCenter {self.name}>'
 
+    @validates('accepted_materials')
+    def _sync_materials(self, key, value):
+        wanted = parse_materials(value)
+        current = {row.material: row for row in self.materials}
+        for material, row in current.items():
+            if material not in wanted:
+                self.materials.remove(row)
+        for material in sorted(wanted - set(current)):
+            self.materials.append(RecyclingCenterMaterial(material=material))
+        return value
+
+    @classmethod
+    def accepts_material(cls, material):
+        """SQL predicate matching centers that accept the given material."""
+        return cls.id.in_(
+            db.select(RecyclingCenterMaterial.center_id).where(
+                RecyclingCenterMaterial.material == material.strip().lower()
+            )
+        )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -42,3 +100,36 @@ class RecyclingCenter(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+def active_centers_query(material_type=None):
+    """Active recycling centers, narrowed to those accepting material_type when given."""
+    query = RecyclingCenter.query.filter_by(is_active=True)
+    if material_type:
+        query = query.filter(RecyclingCenter.accepts_material(material_type))
+    return query
+
+
+def backfill_center_materials(session=None):
+    """
+    Populate recycling_center_materials for centers written before the table existed.
+
+    Only centers with a non-empty accepted_materials JSON and no material rows
+    are touched. Runs once per database as a migration, and again on
+    `flask init-db`.
+
+    Args:
+        session: Session to run in; defaults to db.session
+    """
+    session = session or db.session
+    centers = session.query(RecyclingCenter).filter(
+        ~RecyclingCenter.materials.any(),
+        RecyclingCenter.accepted_materials.isnot(None),
+        RecyclingCenter.accepted_materials.notin_(['', '[]'])
+    ).all()
+    for center in centers:
+        # Re-assigning the JSON runs the validator that rebuilds the material rows
+        center.accepted_materials = center.accepted_materials
+    if centers:
+        session.commit()
+    return len(centers)
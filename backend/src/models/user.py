@@ -1,8 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import deferred, undefer_group
 
 db = SQLAlchemy()
 
+# Deferred group holding a user's folded points and weight together with the
+# ledger entries not applied yet; load it with with_points_totals()
+POINTS_TOTALS = 'points_totals'
+
 class User(db.Model):
+    __table_args__ = (
+        # Active wastepickers, as loaded by dispatch runs
+        db.Index('ix_user_type_active', 'user_type', 'is_active'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -16,8 +26,8 @@ class User(db.Model):
     user_type = db.Column(db.String(20), default='household')  # household, wastepicker, admin
     is_active = db.Column(db.Boolean, default=True)
     profile_image = db.Column(db.String(300))
-    total_recycled_weight = db.Column(db.Float, default=0.0)
-    points = db.Column(db.Integer, default=0)
+    total_recycled_weight = deferred(db.Column(db.Float, default=0.0), group=POINTS_TOTALS)
+    points = deferred(db.Column(db.Integer, default=0), group=POINTS_TOTALS)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
@@ -38,8 +48,61 @@ class User(db.Model):
             'user_type': self.user_type,
             'is_active': self.is_active,
             'profile_image': self.profile_image,
-            'total_recycled_weight': self.total_recycled_weight,
-            'points': self.points,
+            # Folded totals plus ledger entries the applier has not reached yet
+            'total_recycled_weight': (self.total_recycled_weight or 0.0) + self.unapplied_recycled_weight,
+            'points': (self.points or 0) + self.unapplied_points,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+
+class PointsLedgerEntry(db.Model):
+    """
+    Append-only record of points and recycled weight earned by a user.
+
+    Status changes insert entries instead of updating the hot user row;
+    services.points_ledger folds them into User totals in batches and marks
+    them applied.
+    """
+    __tablename__ = 'points_ledger'
+    __table_args__ = (
+        # Unapplied entries of one user, summed on every user read
+        db.Index('ix_points_ledger_user_applied', 'user_id', 'applied'),
+        # Oldest unapplied entries, taken by the applier
+        db.Index('ix_points_ledger_applied_id', 'applied', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    pickup_request_id = db.Column(db.Integer, db.ForeignKey('pickup_requests.id'))
+    points = db.Column(db.Integer, nullable=False, default=0)
+    recycled_weight = db.Column(db.Float, nullable=False, default=0.0)
+    applied = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<PointsLedgerEntry {self.user_id} +{self.points}>'
+
+
+def _unapplied_sum(column):
+    return db.column_property(
+        db.select(db.func.coalesce(db.func.sum(column), 0))
+        .where(PointsLedgerEntry.user_id == User.id, PointsLedgerEntry.applied.is_(False))
+        .correlate_except(PointsLedgerEntry)
+        .scalar_subquery(),
+        deferred=True,
+        group=POINTS_TOTALS
+    )
+
+
+# Deferred together with the folded columns: user lookups that never show
+# totals skip the ledger subqueries, and whenever they are loaded, folded and
+# pending amounts come from one SELECT, so a concurrent apply is never
+# double counted
+User.unapplied_points = _unapplied_sum(PointsLedgerEntry.points)
+User.unapplied_recycled_weight = _unapplied_sum(PointsLedgerEntry.recycled_weight)
+
+
+def with_points_totals():
+    """Loader option fetching the points totals in the same SELECT as the user rows."""
+    return undefer_group(POINTS_TOTALS)
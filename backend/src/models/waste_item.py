@@ -1,11 +1,19 @@
+from sqlalchemy import event
 from src.models.user import db
+from src.models.recycling_center import RecyclingCenter
+from src.database.engine import dialect_insert
 
 class WasteItem(db.Model):
     __tablename__ = 'waste_items'
+    __table_args__ = (
+        # Serves per-user history pages (keyset on created_at, id) and the 30-day activity count
+        db.Index('ix_waste_items_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     image_path = db.Column(db.String(300))
+    thumbnail_path = db.Column(db.String(300))  # Static URL of the preview; None when none could be made
     identified_type = db.Column(db.String(100), nullable=False)
     confidence_score = db.Column(db.Float)
     material_category = db.Column(db.String(50))  # plastic, paper, glass, metal, organic, hazardous
@@ -26,6 +34,7 @@ class WasteItem(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'image_path': self.image_path,
+            'thumbnail_path': self.thumbnail_path,
             'identified_type': self.identified_type,
             'confidence_score': self.confidence_score,
             'material_category': self.material_category,
@@ -35,3 +44,122 @@ class WasteItem(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'recommended_center': self.recommended_center.to_dict() if self.recommended_center else None
         }
+
+
+class WasteCategoryRollup(db.Model):
+    """Per-user, per-category scan counters, incremented whenever a WasteItem is inserted."""
+    __tablename__ = 'waste_category_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    material_category = db.Column(db.String(50), primary_key=True)  # 'unknown' when not classified
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    recyclable_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<WasteCategoryRollup {self.user_id} - {self.material_category}>'
+
+
+@event.listens_for(WasteItem, 'after_insert')
+def _increment_category_rollup(mapper, connection, target):
+    """Fold a new WasteItem into its rollup row inside the same transaction."""
+    rollups = WasteCategoryRollup.__table__
+    category = target.material_category or 'unknown'
+    recyclable = 1 if target.recyclable else 0
+
+    # One upsert, so concurrent first scans of a category cannot both try to insert the row
+    connection.execute(
+        dialect_insert(rollups, connection.dialect.name)
+        .values(user_id=target.user_id, material_category=category, item_count=1, recyclable_count=recyclable)
+        .on_conflict_do_update(
+            index_elements=[rollups.c.user_id, rollups.c.material_category],
+            set_={
+                'item_count': rollups.c.item_count + 1,
+                'recyclable_count': rollups.c.recyclable_count + recyclable
+            }
+        )
+    )
+
+
+def waste_history_query(user_id):
+    """
+    A user's waste items for the history endpoint, unordered.
+
+    Only the columns the response uses, with the recommended center's
+    fields pulled in through an outer join, so a page is one query.
+    """
+    return db.session.query(
+        WasteItem.id,
+        WasteItem.identified_type,
+        WasteItem.confidence_score,
+        WasteItem.material_category,
+        WasteItem.recyclable,
+        WasteItem.disposal_method,
+        WasteItem.image_path,
+        WasteItem.thumbnail_path,
+        WasteItem.created_at,
+        RecyclingCenter.id.label('center_id'),
+        RecyclingCenter.name.label('center_name'),
+        RecyclingCenter.address.label('center_address')
+    ).outerjoin(RecyclingCenter, RecyclingCenter.id == WasteItem.recommended_center_id)\
+     .filter(WasteItem.user_id == user_id)
+
+
+def recent_waste_items_query(user_id, since):
+    """COUNT of a user's waste items created since a datetime."""
+    return db.session.query(db.func.count(WasteItem.id)).filter(
+        WasteItem.user_id == user_id,
+        WasteItem.created_at >= since
+    )
+
+
+def category_aggregates_query():
+    """GROUP BY over waste_items yielding (user_id, category, item_count, recyclable_count) rows."""
+    category = db.func.coalesce(WasteItem.material_category, 'unknown')
+    return db.session.query(
+        WasteItem.user_id,
+        category.label('material_category'),
+        db.func.count(WasteItem.id).label('item_count'),
+        db.func.sum(db.case((WasteItem.recyclable.is_(True), 1), else_=0)).label('recyclable_count')
+    ).group_by(WasteItem.user_id, category)
+
+
+def rebuild_waste_rollups():
+    """Recompute every rollup row from waste_items with one aggregate query."""
+    rollups = WasteCategoryRollup.__table__
+    db.session.execute(rollups.delete())
+    db.session.execute(rollups.insert().from_select(
+        ['user_id', 'material_category', 'item_count', 'recyclable_count'],
+        category_aggregates_query().statement
+    ))
+    db.session.commit()
+
+
+def backfill_waste_rollups(session=None) -> int:
+    """
+    Build the rollup rows missing for any (user, category) pair that has waste items.
+
+    Existing rows are left alone. It fills in pairs whose items predate the
+    rollups table or were written without the insert listener (e.g. bulk Core
+    inserts). Runs once per database as a migration, and again on
+    `flask init-db`.
+
+    Args:
+        session: Session to run in; defaults to db.session
+
+    Returns:
+        Number of rollup rows created
+    """
+    session = session or db.session
+    rollups = WasteCategoryRollup.__table__
+    category = db.func.coalesce(WasteItem.material_category, 'unknown')
+    has_rollup = db.select(rollups.c.user_id).where(
+        rollups.c.user_id == WasteItem.user_id,
+        rollups.c.material_category == category
+    ).exists()
+    missing = category_aggregates_query().filter(~has_rollup)
+    result = session.execute(rollups.insert().from_select(
+        ['user_id', 'material_category', 'item_count', 'recyclable_count'],
+        missing.statement
+    ))
+    session.commit()
+    return result.rowcount
@@ -0,0 +1,191 @@
+from typing import Iterable, Optional, Tuple
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.database.engine import dialect_insert
+
+class WastepickerStats(db.Model):
+    """
+    Running pickup counters for one wastepicker.
+
+    Kept in step with pickup_requests by record_pickup_change() in the same
+    transaction as every status or assignment change, and rebuildable from
+    pickup_requests with rebuild_wastepicker_stats().
+    """
+    __tablename__ = 'wastepicker_stats'
+
+    wastepicker_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_pickups = db.Column(db.Integer, nullable=False, default=0)
+    completed_pickups = db.Column(db.Integer, nullable=False, default=0)
+    active_pickups = db.Column(db.Integer, nullable=False, default=0)  # in_progress
+    total_earnings = db.Column(db.Float, nullable=False, default=0.0)
+    total_weight_collected = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def __repr__(self):
+        return f'<WastepickerStats {self.wastepicker_id}>'
+
+
+COUNTER_COLUMNS = ['total_pickups', 'completed_pickups', 'active_pickups',
+                   'total_earnings', 'total_weight_collected']
+
+
+def pickup_contribution(status: Optional[str], payment_amount: Optional[float],
+                        estimated_weight: Optional[float]) -> dict:
+    """What one pickup in the given state adds to its wastepicker's counters."""
+    completed = status == 'completed'
+    return {
+        'total_pickups': 1,
+        'completed_pickups': 1 if completed else 0,
+        'active_pickups': 1 if status == 'in_progress' else 0,
+        'total_earnings': (payment_amount or 0.0) if completed else 0.0,
+        'total_weight_collected': (estimated_weight or 0.0) if completed else 0.0
+    }
+
+
+def stats_aggregate_query():
+    """One conditional-aggregate pass over pickup_requests, grouped by wastepicker."""
+    completed = PickupRequest.status == 'completed'
+    return db.session.query(
+        PickupRequest.wastepicker_id,
+        db.func.count(PickupRequest.id).label('total_pickups'),
+        db.func.sum(db.case((completed, 1), else_=0)).label('completed_pickups'),
+        db.func.sum(db.case((PickupRequest.status == 'in_progress', 1), else_=0)).label('active_pickups'),
+        db.func.coalesce(db.func.sum(db.case((completed, PickupRequest.payment_amount), else_=0.0)), 0.0)
+            .label('total_earnings'),
+        db.func.coalesce(db.func.sum(db.case((completed, PickupRequest.estimated_weight), else_=0.0)), 0.0)
+            .label('total_weight_collected')
+    ).filter(PickupRequest.wastepicker_id.isnot(None)).group_by(PickupRequest.wastepicker_id)
+
+
+def _insert_from_aggregate(wastepicker_id: Optional[int] = None):
+    aggregate = stats_aggregate_query()
+    if wastepicker_id is not None:
+        aggregate = aggregate.filter(PickupRequest.wastepicker_id == wastepicker_id)
+    db.session.execute(WastepickerStats.__table__.insert().from_select(
+        ['wastepicker_id'] + COUNTER_COLUMNS, aggregate.statement
+    ))
+
+
+def counter_state(pickup_request: PickupRequest) -> tuple:
+    """The fields of a pickup that its wastepicker's counters depend on."""
+    return (pickup_request.wastepicker_id, pickup_request.status,
+            pickup_request.payment_amount, pickup_request.estimated_weight)
+
+
+def record_pickup_change(before: tuple, after: tuple):
+    """
+    Move a pickup's contribution between counters rows.
+
+    Call after changing a PickupRequest and before committing, with its
+    counter_state() from before and after the change. Counters rows that do
+    not exist yet are built from pickup_requests instead, so they start out
+    complete.
+    """
+    record_pickup_changes([(before, after)])
+
+
+def record_pickup_changes(changes: Iterable[Tuple[tuple, tuple]]):
+    """
+    record_pickup_change() for many pickups, with one UPDATE per wastepicker touched.
+
+    Args:
+        changes: (before, after) counter_state() pairs
+    """
+    changes = [(before, after) for before, after in changes if before != after]
+    if not changes:
+        return
+
+    # The aggregate used to create missing rows must see these changes
+    db.session.flush()
+
+    deltas = {}
+    for before, after in changes:
+        for sign, (wastepicker_id, status, payment_amount, estimated_weight) in ((-1, before), (1, after)):
+            if wastepicker_id is None:
+                continue
+            totals = deltas.setdefault(wastepicker_id, dict.fromkeys(COUNTER_COLUMNS, 0))
+            for column, value in pickup_contribution(status, payment_amount, estimated_weight).items():
+                totals[column] += sign * value
+
+    apply_counter_deltas(deltas)
+
+
+def apply_counter_deltas(deltas: dict):
+    """
+    Add per-wastepicker counter deltas ({wastepicker_id: {column: delta}}) with one UPDATE each.
+
+    Pickup changes must already be flushed: pickers without a counters row
+    get one built from pickup_requests, which then already includes them.
+    """
+    stats = WastepickerStats.__table__
+    for wastepicker_id, totals in deltas.items():
+        if not any(totals.values()):
+            continue
+        result = db.session.execute(
+            stats.update()
+            .where(stats.c.wastepicker_id == wastepicker_id)
+            .values({column: stats.c[column] + delta for column, delta in totals.items()})
+        )
+        if result.rowcount == 0:
+            _upsert_from_aggregate(wastepicker_id, totals)
+
+
+def _upsert_from_aggregate(wastepicker_id: int, totals: dict):
+    """
+    Create a missing counters row from pickup_requests in one statement.
+
+    If a concurrent transaction created the row first, its aggregate could
+    not see this transaction's uncommitted changes, so the deltas are added
+    to it instead of failing on the primary key.
+    """
+    stats = WastepickerStats.__table__
+    aggregate = stats_aggregate_query().filter(PickupRequest.wastepicker_id == wastepicker_id)
+    insert = dialect_insert(stats, db.session.get_bind().dialect.name).from_select(
+        ['wastepicker_id'] + COUNTER_COLUMNS, aggregate.statement
+    )
+    db.session.execute(insert.on_conflict_do_update(
+        index_elements=[stats.c.wastepicker_id],
+        set_={
+            **{column: stats.c[column] + delta for column, delta in totals.items()},
+            'updated_at': db.func.current_timestamp()
+        }
+    ))
+
+
+def get_wastepicker_counters(wastepicker_id: int) -> WastepickerStats:
+    """
+    Counters for a wastepicker, without writing anything.
+
+    Pickers whose row has not been created yet (it is made on their first
+    pickup change) get a detached WastepickerStats computed from
+    pickup_requests, all zeros when they have no pickups.
+    """
+    stats = db.session.get(WastepickerStats, wastepicker_id)
+    if stats is not None:
+        return stats
+    counters = dict.fromkeys(COUNTER_COLUMNS, 0)
+    row = stats_aggregate_query().filter(PickupRequest.wastepicker_id == wastepicker_id).first()
+    if row is not None:
+        counters.update({column: getattr(row, column) or 0 for column in COUNTER_COLUMNS})
+    return WastepickerStats(wastepicker_id=wastepicker_id, **counters)
+
+
+def rebuild_wastepicker_stats(wastepicker_id: Optional[int] = None) -> int:
+    """
+    Recompute counters rows from pickup_requests, for one wastepicker or all of them.
+
+    Returns:
+        Number of counters rows written
+    """
+    stats = WastepickerStats.__table__
+    delete = stats.delete()
+    if wastepicker_id is not None:
+        delete = delete.where(stats.c.wastepicker_id == wastepicker_id)
+    db.session.execute(delete)
+    _insert_from_aggregate(wastepicker_id)
+    db.session.commit()
+
+    count = db.session.query(db.func.count(WastepickerStats.wastepicker_id))
+    if wastepicker_id is not None:
+        count = count.filter(WastepickerStats.wastepicker_id == wastepicker_id)
+    return count.scalar()
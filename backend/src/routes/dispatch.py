@@ -0,0 +1,206 @@
+from flask import Blueprint, request, jsonify, current_app
+from src.models.user import db, User
+from src.models.pickup_request import PickupRequest
+from src.models.pickup_suggestion import wastepicker_suggestions_query
+from src.services import geo
+from src.services.cache import LRUCache
+from src.services.dispatch import run_dispatch
+from src.services.routing import PICKUP_WINDOW_MINUTES, ROUTE_TIME_BUDGET_MS, plan_route
+from datetime import datetime, timedelta
+import os
+import time
+
+dispatch_bp = Blueprint('dispatch', __name__)
+
+# Planned routes keyed by wastepicker, start point and the exact set of assigned
+# stops, so any accept, cancel or completion yields a new key. The TTL bounds
+# how stale the ETAs, which are relative to planning time, can get.
+route_cache = LRUCache(maxsize=1024, ttl=int(os.getenv('ROUTE_CACHE_TTL', 300)))
+MAX_ROUTE_TIME_BUDGET_MS = 2000
+
+@dispatch_bp.route('/admin/dispatch/run', methods=['POST'])
+def run_dispatch_now():
+    """Match all pending pickup requests to nearby wastepickers and store the suggestions"""
+    admin_token = current_app.config.get('ADMIN_SEED_TOKEN') or os.getenv('ADMIN_SEED_TOKEN')
+    if not admin_token or request.headers.get('X-ADMIN-TOKEN') != admin_token:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    try:
+        radius = request.args.get('radius', type=float)
+        summary = run_dispatch(radius) if radius else run_dispatch()
+
+        return jsonify({
+            'success': True,
+            'data': summary
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@dispatch_bp.route('/wastepicker/<int:wastepicker_id>/suggestions', methods=['GET'])
+def get_wastepicker_suggestions(wastepicker_id):
+    """Get the pending pickup requests the latest dispatch run suggested for a wastepicker"""
+    try:
+        fields, include = PickupRequest.parse_fieldset(request.args.get('fields'), request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    try:
+        wastepicker = User.query.filter_by(
+            id=wastepicker_id,
+            user_type='wastepicker'
+        ).first()
+
+        if not wastepicker:
+            return jsonify({
+                'success': False,
+                'error': 'Wastepicker not found'
+            }), 404
+
+        # Requests accepted since the run are skipped
+        suggestions = wastepicker_suggestions_query(wastepicker_id).options(
+            *PickupRequest.loader_options(fields, include)
+        ).all()
+
+        suggestions_data = []
+        for suggestion, pickup_request in suggestions:
+            req_dict = pickup_request.to_dict(fields, include)
+            req_dict['distance'] = round(suggestion.distance_km, 2)
+            req_dict['dispatch_run'] = suggestion.dispatch_run
+            suggestions_data.append(req_dict)
+
+        return jsonify({
+            'success': True,
+            'data': suggestions_data,
+            'total': len(suggestions_data)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@dispatch_bp.route('/wastepicker/<int:wastepicker_id>/route', methods=['GET'])
+def get_wastepicker_route(wastepicker_id):
+    """
+    Get a visiting order for a wastepicker's accepted and in-progress pickups
+
+    Starts from ?latitude=&longitude= when given, otherwise from the
+    wastepicker's stored location. ?budget_ms= sets the optimization time
+    budget.
+    """
+    try:
+        wastepicker = User.query.filter_by(
+            id=wastepicker_id,
+            user_type='wastepicker'
+        ).first()
+
+        if not wastepicker:
+            return jsonify({
+                'success': False,
+                'error': 'Wastepicker not found'
+            }), 404
+
+        latitude = request.args.get('latitude', default=wastepicker.latitude, type=float)
+        longitude = request.args.get('longitude', default=wastepicker.longitude, type=float)
+        if latitude is None or longitude is None:
+            return jsonify({
+                'success': False,
+                'error': 'Wastepicker location unknown; pass latitude and longitude'
+            }), 400
+        budget_ms = min(request.args.get('budget_ms', default=ROUTE_TIME_BUDGET_MS, type=float),
+                        MAX_ROUTE_TIME_BUDGET_MS)
+
+        stops = db.session.query(
+            PickupRequest.id, PickupRequest.pickup_address, PickupRequest.pickup_latitude,
+            PickupRequest.pickup_longitude, PickupRequest.pickup_date, PickupRequest.status
+        ).filter(
+            PickupRequest.wastepicker_id == wastepicker_id,
+            PickupRequest.status.in_(['accepted', 'in_progress'])
+        ).order_by(PickupRequest.id).all()
+
+        cache_key = (
+            wastepicker_id, round(latitude, 4), round(longitude, 4),
+            tuple((stop.id, stop.pickup_latitude, stop.pickup_longitude, stop.pickup_date) for stop in stops)
+        )
+        route = route_cache.get(cache_key)
+        if route is not None:
+            return jsonify({
+                'success': True,
+                'data': dict(route, cached=True)
+            })
+
+        started = time.perf_counter()
+        distances = geo.distance_matrix(
+            [latitude] + [stop.pickup_latitude for stop in stops],
+            [longitude] + [stop.pickup_longitude for stop in stops],
+            [latitude] + [stop.pickup_latitude for stop in stops],
+            [longitude] + [stop.pickup_longitude for stop in stops]
+        )
+
+        # pickup_date becomes an arrival window in minutes from now
+        planned_at = datetime.utcnow()
+        windows = [None]
+        for stop in stops:
+            if stop.pickup_date is None:
+                windows.append(None)
+                continue
+            target = (stop.pickup_date.replace(tzinfo=None) - planned_at).total_seconds() / 60
+            windows.append((target - PICKUP_WINDOW_MINUTES, target + PICKUP_WINDOW_MINUTES))
+        matrix_built = time.perf_counter()
+
+        plan = plan_route(distances, windows, time_budget_ms=budget_ms)
+        solved = time.perf_counter()
+
+        route_stops = []
+        previous = 0
+        for position, (index, arrival, late) in enumerate(zip(plan.order, plan.arrivals, plan.late_minutes)):
+            stop = stops[index - 1]
+            route_stops.append({
+                'position': position + 1,
+                'pickup_request_id': stop.id,
+                'pickup_address': stop.pickup_address,
+                'pickup_latitude': stop.pickup_latitude,
+                'pickup_longitude': stop.pickup_longitude,
+                'pickup_date': stop.pickup_date.isoformat() if stop.pickup_date else None,
+                'status': stop.status,
+                'distance_from_previous': round(float(distances[previous][index]), 2),
+                'estimated_arrival': (planned_at + timedelta(minutes=arrival)).isoformat(),
+                'late_minutes': round(late, 1)
+            })
+            previous = index
+
+        route = {
+            'wastepicker_id': wastepicker_id,
+            'start': {'latitude': latitude, 'longitude': longitude},
+            'planned_at': planned_at.isoformat(),
+            'stops': route_stops,
+            'total_distance': round(plan.distance_km, 2),
+            'initial_distance': round(plan.initial_distance_km, 2),
+            'total_minutes': round(plan.duration_minutes, 1),
+            'improvement_passes': plan.improvement_passes,
+            'timing_ms': {
+                'matrix': round((matrix_built - started) * 1000, 2),
+                'solve': round((solved - matrix_built) * 1000, 2)
+            }
+        }
+        route_cache.set(cache_key, route)
+
+        return jsonify({
+            'success': True,
+            'data': dict(route, cached=False)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -1,21 +1,43 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from src.models.user import db
-from src.models.pickup_request import PickupRequest
-from src.models.user import User
+from src.models.pickup_request import PickupRequest, nearby_pickups_query, pickup_listing_query, recent_pickups_query
+from src.models.user import User, PointsLedgerEntry
+from src.models.wastepicker_stats import (
+    counter_state, get_wastepicker_counters, rebuild_wastepicker_stats, record_pickup_change,
+    record_pickup_changes
+)
+from src.services import geo
+from src.services.points_ledger import POINTS_PER_KG, record_completions
+from src.services.pickup_ingest import BULK_MAX_BYTES, ingest_pickup_requests, iter_json_array, iter_ndjson
+from src.services.pagination import InvalidCursor, keyset_page, keyset_pagination
+from src.services.pubsub import pickup_feed
 from datetime import datetime
-import math
+import json
+import os
 
 pickup_requests_bp = Blueprint('pickup_requests', __name__)
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on the earth"""
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # Radius of earth in kilometers
-    return c * r
+# Seconds between keep-alive comments on idle event streams
+FEED_HEARTBEAT_SECONDS = 15
+MAX_FEED_RADIUS_KM = 100
+
+# Bulk bodies with these content types are read as one JSON object per line
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+PICKUP_STATUSES = ['pending', 'accepted', 'in_progress', 'completed', 'cancelled']
+# Statuses a batch transition cannot move a request out of
+FINAL_STATUSES = ('completed', 'cancelled')
+MAX_BATCH_TRANSITIONS = 500
+
+def publish_pickup_event(event_type, pickup_request, data=None):
+    """Push a committed pickup request change to feed subscribers near it."""
+    pickup_feed.publish(
+        event_type,
+        data if data is not None else {'id': pickup_request.id, 'status': pickup_request.status},
+        pickup_request.pickup_latitude,
+        pickup_request.pickup_longitude
+    )
 
 @pickup_requests_bp.route('/pickup-requests', methods=['POST'])
 def create_pickup_request():
@@ -60,9 +82,12 @@ def create_pickup_request():
         db.session.add(pickup_request)
         db.session.commit()
         
+        pickup_data = pickup_request.to_dict()
+        publish_pickup_event('created', pickup_request, pickup_data)
+        
         return jsonify({
             'success': True,
-            'data': pickup_request.to_dict(),
+            'data': pickup_data,
             'message': 'Pickup request created successfully'
         }), 201
         
@@ -73,9 +98,65 @@ def create_pickup_request():
             'error': str(e)
         }), 500
 
+@pickup_requests_bp.route('/pickup-requests/bulk', methods=['POST'])
+def bulk_create_pickup_requests():
+    """
+    Create many pickup requests from a JSON array or NDJSON body
+    
+    Send Content-Type application/x-ndjson for one JSON object per line;
+    any other body must be a JSON array of objects. Rows take the same fields
+    as POST /pickup-requests and are inserted BULK_CHUNK_SIZE at a time, each
+    chunk in its own transaction.
+    
+    The response is NDJSON streamed while the body is read: one
+    {"index", "success", "id" | "error"} line per row in input order, then
+    a {"summary"} line. A body that cannot be read to the end (malformed,
+    or over BULK_MAX_BYTES rather than the app-wide upload limit) ends with
+    an error line for the row it stopped at; a failure after the stream has
+    started ends it with a {"success": false, "error"} line.
+    """
+    # The body is streamed, so this route takes more than the app-wide limit
+    request.max_content_length = current_app.config.get('BULK_MAX_CONTENT_LENGTH') or BULK_MAX_BYTES
+    try:
+        if request.mimetype in NDJSON_MIMETYPES:
+            rows = iter_ndjson(request.stream)
+        else:
+            rows = iter_json_array(request.stream)
+    except RequestEntityTooLarge:
+        return jsonify({
+            'success': False,
+            'error': f'Body exceeds the {request.max_content_length // (1024 * 1024)}MB bulk limit'
+        }), 413
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    def results():
+        try:
+            for result in ingest_pickup_requests(rows):
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            # The status line is already sent, so the error goes in the body
+            db.session.rollback()
+            yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+    
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson')
+
 @pickup_requests_bp.route('/pickup-requests', methods=['GET'])
 def get_pickup_requests():
-    """Get pickup requests with optional filtering"""
+    """
+    Get pickup requests with optional filtering
+    
+    With latitude/longitude the nearest `limit` requests are returned.
+    Otherwise requests are listed newest first; passing `cursor` (empty for
+    the first page) pages through them by (created_at, id) using the
+    returned next_cursor/prev_cursor.
+    
+    `fields` (comma-separated columns) and `include` (requester, wastepicker)
+    trim each item; without either, items carry every column and both users.
+    """
     try:
         # Get query parameters
         status = request.args.get('status')
@@ -85,55 +166,133 @@ def get_pickup_requests():
         longitude = request.args.get('longitude', type=float)
         radius = request.args.get('radius', default=25, type=float)  # Default 25km radius
         limit = request.args.get('limit', default=50, type=int)
+        cursor = request.args.get('cursor')
+        pagination = None
+        
+        # Sparse fieldsets: load and return only the requested columns and users
+        try:
+            fields, include = PickupRequest.parse_fieldset(request.args.get('fields'), request.args.get('include'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        loader_options = PickupRequest.loader_options(fields, include)
         
         # Build query
-        query = PickupRequest.query
-        
-        if status:
-            query = query.filter_by(status=status)
-        if requester_id:
-            query = query.filter_by(requester_id=requester_id)
-        if wastepicker_id:
-            query = query.filter_by(wastepicker_id=wastepicker_id)
-        
-        # Get requests
-        requests = query.order_by(PickupRequest.created_at.desc()).limit(limit).all()
-        
-        # Convert to dict and add distance if location provided
-        requests_data = []
-        for req in requests:
-            req_dict = req.to_dict()
+        query = pickup_listing_query(status, requester_id, wastepicker_id)
+        
+        if latitude is not None and longitude is not None:
+            # Let the database discard everything outside the radius' bounding box
+            candidates = nearby_pickups_query(query, geo.bounding_box(latitude, longitude, radius)).all()
             
-            # Calculate distance if user location provided
-            if latitude and longitude:
-                distance = calculate_distance(
-                    latitude, longitude, 
-                    req.pickup_latitude, req.pickup_longitude
-                )
+            # Exact distance check and nearest-first ordering on the candidates only,
+            # so the limit applies to requests that are actually within the radius
+            indices, distances = geo.points_within_radius(
+                latitude, longitude,
+                [candidate.pickup_latitude for candidate in candidates],
+                [candidate.pickup_longitude for candidate in candidates],
+                radius
+            )
+            nearest = [
+                (candidates[index].id, float(distance))
+                for index, distance in zip(indices[:limit], distances[:limit])
+            ]
+            
+            requests = {
+                req.id: req for req in
+                PickupRequest.query.options(*loader_options)
+                                   .filter(PickupRequest.id.in_([request_id for request_id, _ in nearest])).all()
+            } if nearest else {}
+            
+            requests_data = []
+            for request_id, distance in nearest:
+                req_dict = requests[request_id].to_dict(fields, include)
                 req_dict['distance'] = round(distance, 2)
-                
-                # Filter by radius
-                if distance <= radius:
-                    requests_data.append(req_dict)
-            else:
                 requests_data.append(req_dict)
-        
-        # Sort by distance if location provided
-        if latitude and longitude:
-            requests_data.sort(key=lambda x: x.get('distance', float('inf')))
-        
-        return jsonify({
+        elif cursor is not None:
+            page = keyset_page(query.options(*loader_options), PickupRequest.created_at, PickupRequest.id,
+                               limit, cursor)
+            requests_data = [req.to_dict(fields, include) for req in page.items]
+            pagination = keyset_pagination(page, limit)
+        else:
+            requests = query.options(*loader_options).order_by(PickupRequest.created_at.desc()).limit(limit).all()
+            requests_data = [req.to_dict(fields, include) for req in requests]
+        
+        response = {
             'success': True,
             'data': requests_data,
             'total': len(requests_data)
-        })
+        }
+        if pagination is not None:
+            response['pagination'] = pagination
+        return jsonify(response)
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@pickup_requests_bp.route('/pickup-requests/stream', methods=['GET'])
+def stream_pickup_requests():
+    """
+    Server-sent events feed of pickup requests created or changing status near a location
+    
+    Takes latitude, longitude and radius (km, default 25) like the listing
+    endpoint. Events are named 'created' or after the request's new status,
+    e.g. 'accepted'. A 'created' event's data is the whole pickup request as
+    JSON; status events carry only {"id", "status"}, so clients refetch the
+    request if they need more. Idle streams get a keep-alive comment every
+    FEED_HEARTBEAT_SECONDS.
+    """
+    latitude = request.args.get('latitude', type=float)
+    longitude = request.args.get('longitude', type=float)
+    radius = request.args.get('radius', default=25, type=float)
+    
+    if latitude is None or longitude is None:
+        return jsonify({
+            'success': False,
+            'error': 'latitude and longitude are required'
+        }), 400
+    if radius <= 0 or radius > MAX_FEED_RADIUS_KM:
+        return jsonify({
+            'success': False,
+            'error': f'radius must be between 0 and {MAX_FEED_RADIUS_KM} km'
+        }), 400
+    
+    subscription = pickup_feed.subscribe(latitude, longitude, radius)
+    
+    def events():
+        yield 'retry: 5000\n\n'
+        while True:
+            event = subscription.next_event(timeout=FEED_HEARTBEAT_SECONDS)
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the client disconnects, even if the stream never started
+    response.call_on_close(lambda: pickup_feed.unsubscribe(subscription))
+    return response
+
+@pickup_requests_bp.route('/pickup-requests/stream/stats', methods=['GET'])
+def get_pickup_stream_stats():
+    """Get subscriber and delivery counters for this process' pickup feed"""
+    return jsonify({
+        'success': True,
+        'data': pickup_feed.stats()
+    })
+
 @pickup_requests_bp.route('/pickup-requests/<int:request_id>', methods=['GET'])
 def get_pickup_request(request_id):
     """Get a specific pickup request"""
@@ -176,21 +335,50 @@ def accept_pickup_request(request_id):
                 'error': 'Invalid wastepicker ID'
             }), 400
         
-        # Get the pickup request
-        pickup_request = PickupRequest.query.get_or_404(request_id)
+        # Current assignee and amounts, for the counters; read without locking
+        current = db.session.query(
+            PickupRequest.wastepicker_id, PickupRequest.payment_amount, PickupRequest.estimated_weight
+        ).filter(PickupRequest.id == request_id).first()
+        
+        if current is None:
+            return jsonify({
+                'success': False,
+                'error': 'Pickup request not found'
+            }), 404
         
-        if pickup_request.status != 'pending':
+        if current.wastepicker_id is None:
+            same_assignee = PickupRequest.wastepicker_id.is_(None)
+        else:
+            same_assignee = PickupRequest.wastepicker_id == current.wastepicker_id
+        
+        # Accept the request in one conditional UPDATE, so when several
+        # wastepickers race for the same request exactly one matches the row
+        accepted = PickupRequest.query.filter(
+            PickupRequest.id == request_id,
+            PickupRequest.status == 'pending',
+            same_assignee
+        ).update({
+            PickupRequest.wastepicker_id: wastepicker_id,
+            PickupRequest.status: 'accepted',
+            PickupRequest.updated_at: db.func.current_timestamp()
+        }, synchronize_session=False)
+        
+        if accepted != 1:
+            db.session.rollback()
             return jsonify({
                 'success': False,
                 'error': 'Pickup request is not available for acceptance'
             }), 400
         
-        # Accept the request
-        pickup_request.wastepicker_id = wastepicker_id
-        pickup_request.status = 'accepted'
-        
+        record_pickup_change(
+            (current.wastepicker_id, 'pending', current.payment_amount, current.estimated_weight),
+            (wastepicker_id, 'accepted', current.payment_amount, current.estimated_weight)
+        )
         db.session.commit()
         
+        pickup_request = db.session.get(PickupRequest, request_id)
+        publish_pickup_event('accepted', pickup_request)
+        
         return jsonify({
             'success': True,
             'data': pickup_request.to_dict(),
@@ -217,25 +405,40 @@ def update_pickup_status(request_id):
                 'error': 'Status is required'
             }), 400
         
-        valid_statuses = ['pending', 'accepted', 'in_progress', 'completed', 'cancelled']
-        if new_status not in valid_statuses:
+        if new_status not in PICKUP_STATUSES:
             return jsonify({
                 'success': False,
-                'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'
+                'error': f'Invalid status. Must be one of: {", ".join(PICKUP_STATUSES)}'
             }), 400
         
         pickup_request = PickupRequest.query.get_or_404(request_id)
-        pickup_request.status = new_status
+        # As in the batch path, completed and cancelled requests stay that way,
+        # so a completion is credited once
+        if pickup_request.status in FINAL_STATUSES and pickup_request.status != new_status:
+            return jsonify({
+                'success': False,
+                'error': f'Pickup request is already {pickup_request.status}'
+            }), 400
         
-        # If completed, update user's recycled weight and points
-        if new_status == 'completed' and pickup_request.estimated_weight:
-            requester = User.query.get(pickup_request.requester_id)
-            if requester:
-                requester.total_recycled_weight += pickup_request.estimated_weight
-                requester.points += int(pickup_request.estimated_weight * 10)  # 10 points per kg
+        before = counter_state(pickup_request)
+        pickup_request.status = new_status
+        record_pickup_change(before, counter_state(pickup_request))
+        
+        # If newly completed, credit the requester's recycled weight and points.
+        # The ledger entry is folded into the user row later by the applier.
+        if new_status == 'completed' and before[1] != 'completed' and pickup_request.estimated_weight:
+            db.session.add(PointsLedgerEntry(
+                user_id=pickup_request.requester_id,
+                pickup_request_id=pickup_request.id,
+                recycled_weight=pickup_request.estimated_weight,
+                points=int(pickup_request.estimated_weight * POINTS_PER_KG)
+            ))
         
         db.session.commit()
         
+        if new_status != before[1]:
+            publish_pickup_event(new_status, pickup_request)
+        
         return jsonify({
             'success': True,
             'data': pickup_request.to_dict(),
@@ -249,6 +452,156 @@ def update_pickup_status(request_id):
             'error': str(e)
         }), 500
 
+@pickup_requests_bp.route('/pickup-requests/status', methods=['PUT'])
+def batch_update_pickup_status():
+    """
+    Update the status of many pickup requests in one transaction
+    
+    Body: {"transitions": [{"id": 1, "status": "completed"}, ...]}, or
+    {"ids": [...], "status": "..."} to move them all to one status. With
+    wastepicker_id every request must be assigned to that wastepicker.
+    Completed and cancelled requests cannot be moved again. Either every
+    transition is applied or, with the reasons per id, none is.
+    
+    `fields` and `include` shape the returned requests as for listings;
+    related users are left out unless included.
+    """
+    try:
+        fields, include = PickupRequest.parse_fieldset(request.args.get('fields'), request.args.get('include'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object'
+            }), 400
+        
+        wastepicker_id = data.get('wastepicker_id')
+        if 'transitions' in data:
+            transitions = data['transitions']
+        elif isinstance(data.get('ids'), list):
+            transitions = [{'id': pickup_id, 'status': data.get('status')} for pickup_id in data['ids']]
+        else:
+            transitions = None
+        
+        if not isinstance(transitions, list) or not transitions:
+            return jsonify({
+                'success': False,
+                'error': 'transitions (or ids and status) are required'
+            }), 400
+        if len(transitions) > MAX_BATCH_TRANSITIONS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_BATCH_TRANSITIONS} transitions per request'
+            }), 400
+        
+        targets = {}
+        errors = []
+        for transition in transitions:
+            pickup_id = transition.get('id') if isinstance(transition, dict) else None
+            new_status = transition.get('status') if isinstance(transition, dict) else None
+            if isinstance(pickup_id, bool) or not isinstance(pickup_id, int):
+                errors.append({'id': pickup_id, 'error': 'Invalid id'})
+            elif pickup_id in targets:
+                errors.append({'id': pickup_id, 'error': 'Duplicate id'})
+            elif new_status not in PICKUP_STATUSES:
+                targets[pickup_id] = None
+                errors.append({'id': pickup_id, 'error': f'Invalid status. Must be one of: {", ".join(PICKUP_STATUSES)}'})
+            else:
+                targets[pickup_id] = new_status
+        
+        # Everything the transitions, counters and ledger depend on, in one query
+        current = {row.id: row for row in db.session.query(
+            PickupRequest.id, PickupRequest.status, PickupRequest.requester_id, PickupRequest.wastepicker_id,
+            PickupRequest.payment_amount, PickupRequest.estimated_weight,
+            PickupRequest.pickup_latitude, PickupRequest.pickup_longitude
+        ).filter(PickupRequest.id.in_(list(targets))).all()}
+        
+        for pickup_id, new_status in targets.items():
+            row = current.get(pickup_id)
+            if new_status is None:
+                continue
+            if row is None:
+                errors.append({'id': pickup_id, 'error': 'Pickup request not found'})
+            elif wastepicker_id is not None and row.wastepicker_id != wastepicker_id:
+                errors.append({'id': pickup_id, 'error': 'Pickup request is not assigned to this wastepicker'})
+            elif row.status in FINAL_STATUSES and row.status != new_status:
+                errors.append({'id': pickup_id, 'error': f'Pickup request is already {row.status}'})
+        
+        if errors:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid transitions; none were applied',
+                'errors': errors
+            }), 400
+        
+        # One conditional UPDATE per (from, to) status pair; a request whose
+        # status changed since it was read matches nothing and aborts the batch
+        groups = {}
+        for pickup_id, new_status in targets.items():
+            if current[pickup_id].status != new_status:
+                groups.setdefault((current[pickup_id].status, new_status), []).append(pickup_id)
+        
+        updated = 0
+        for (old_status, new_status), ids in groups.items():
+            updated += PickupRequest.query.filter(
+                PickupRequest.id.in_(ids),
+                PickupRequest.status == old_status
+            ).update({
+                PickupRequest.status: new_status,
+                PickupRequest.updated_at: db.func.current_timestamp()
+            }, synchronize_session=False)
+        
+        changed = [current[pickup_id] for ids in groups.values() for pickup_id in ids]
+        if updated != len(changed):
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Some pickup requests changed concurrently; none were applied'
+            }), 409
+        
+        record_pickup_changes(
+            ((row.wastepicker_id, row.status, row.payment_amount, row.estimated_weight),
+             (row.wastepicker_id, targets[row.id], row.payment_amount, row.estimated_weight))
+            for row in changed
+        )
+        record_completions(
+            (row.requester_id, row.id, row.estimated_weight)
+            for row in changed if targets[row.id] == 'completed'
+        )
+        db.session.commit()
+        
+        # One feed event per request that changed, named after its new status
+        for row in changed:
+            pickup_feed.publish(targets[row.id], {'id': row.id, 'status': targets[row.id]},
+                                row.pickup_latitude, row.pickup_longitude)
+        
+        # Users are only embedded when asked for, so this is a single SELECT by default
+        pickup_requests = PickupRequest.query.filter(PickupRequest.id.in_(list(targets))).options(
+            *PickupRequest.loader_options(fields, include or [])
+        ).all()
+        by_id = {pickup_request.id: pickup_request for pickup_request in pickup_requests}
+        
+        return jsonify({
+            'success': True,
+            'data': [by_id[pickup_id].to_dict(fields, include or []) for pickup_id in targets],
+            'updated': len(changed),
+            'message': f'{len(changed)} pickup request(s) updated'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @pickup_requests_bp.route('/pickup-requests/<int:request_id>', methods=['DELETE'])
 def cancel_pickup_request(request_id):
     """Cancel a pickup request"""
@@ -261,8 +614,11 @@ def cancel_pickup_request(request_id):
                 'error': 'Cannot cancel a completed or already cancelled request'
             }), 400
         
+        before = counter_state(pickup_request)
         pickup_request.status = 'cancelled'
+        record_pickup_change(before, counter_state(pickup_request))
         db.session.commit()
+        publish_pickup_event('cancelled', pickup_request)
         
         return jsonify({
             'success': True,
@@ -292,45 +648,19 @@ def get_wastepicker_stats(wastepicker_id):
                 'error': 'Wastepicker not found'
             }), 404
         
-        # Get pickup statistics
-        total_pickups = PickupRequest.query.filter_by(wastepicker_id=wastepicker_id).count()
-        completed_pickups = PickupRequest.query.filter_by(
-            wastepicker_id=wastepicker_id, 
-            status='completed'
-        ).count()
-        
-        active_pickups = PickupRequest.query.filter_by(
-            wastepicker_id=wastepicker_id, 
-            status='in_progress'
-        ).count()
-        
-        # Calculate total earnings (sum of payment amounts for completed pickups)
-        earnings_result = db.session.query(
-            db.func.sum(PickupRequest.payment_amount)
-        ).filter_by(
-            wastepicker_id=wastepicker_id, 
-            status='completed'
-        ).scalar()
-        
-        total_earnings = float(earnings_result) if earnings_result else 0.0
-        
-        # Calculate total weight collected
-        weight_result = db.session.query(
-            db.func.sum(PickupRequest.estimated_weight)
-        ).filter_by(
-            wastepicker_id=wastepicker_id, 
-            status='completed'
-        ).scalar()
-        
-        total_weight = float(weight_result) if weight_result else 0.0
-        
-        # Get recent activity (last 30 days)
+        # Running counters kept by accept/status/cancel: a primary-key read
+        counters = get_wastepicker_counters(wastepicker_id)
+        total_pickups = counters.total_pickups
+        completed_pickups = counters.completed_pickups
+        active_pickups = counters.active_pickups
+        total_earnings = float(counters.total_earnings or 0.0)
+        total_weight = float(counters.total_weight_collected or 0.0)
+        
+        # Get recent activity (last 30 days); a sliding window, so counted on
+        # the (wastepicker_id, created_at, id) index rather than kept as a counter
         from datetime import datetime, timedelta
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_pickups = PickupRequest.query.filter(
-            PickupRequest.wastepicker_id == wastepicker_id,
-            PickupRequest.created_at >= thirty_days_ago
-        ).count()
+        recent_pickups = recent_pickups_query(wastepicker_id, thirty_days_ago).scalar()
         
         return jsonify({
             'success': True,
@@ -350,3 +680,26 @@ def get_wastepicker_stats(wastepicker_id):
             'success': False,
             'error': str(e)
         }), 500
+
+@pickup_requests_bp.route('/admin/wastepicker-stats/reconcile', methods=['POST'])
+def reconcile_wastepicker_stats():
+    """Rebuild wastepicker counters from pickup_requests (all, or one via ?wastepicker_id=)"""
+    admin_token = current_app.config.get('ADMIN_SEED_TOKEN') or os.getenv('ADMIN_SEED_TOKEN')
+    if not admin_token or request.headers.get('X-ADMIN-TOKEN') != admin_token:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    try:
+        wastepicker_id = request.args.get('wastepicker_id', type=int)
+        rebuilt = rebuild_wastepicker_stats(wastepicker_id)
+        
+        return jsonify({
+            'success': True,
+            'data': {'rebuilt': rebuilt}
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
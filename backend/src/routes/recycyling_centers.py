@@ -1,24 +1,11 @@
 from flask import Blueprint, request, jsonify
 from src.models.user import db
-from src.models.recycling_center import RecyclingCenter
+from src.models.recycling_center import RecyclingCenter, active_centers_query
+from src.services.spatial_index import center_index
 import json
-import math
 
 recycling_centers_bp = Blueprint('recycling_centers', __name__)
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate the great circle distance between two points on the earth (specified in decimal degrees)"""
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # Radius of earth in kilometers
-    return c * r
-
 @recycling_centers_bp.route('/recycling-centers', methods=['GET'])
 def get_recycling_centers():
     """Get all recycling centers with optional filtering and location-based sorting"""
@@ -30,18 +17,36 @@ def get_recycling_centers():
         radius = request.args.get('radius', default=50, type=float)  # Default 50km radius
         limit = request.args.get('limit', default=20, type=int)
         
-        # Base query
-        query = RecyclingCenter.query.filter_by(is_active=True)
-        
-        # Get all centers
-        centers = query.all()
+        has_location = latitude is not None and longitude is not None
+        
+        # Active centers, filtered by material type if specified
+        query = active_centers_query(material_type)
+        
+        if has_location:
+            # Only load the centers the spatial index finds inside the radius, nearest first
+            nearby = center_index.within_radius(latitude, longitude, radius)
+            distances = dict(nearby)
+            # Look ids up `limit` at a time, nearest first, so IN (...) stays
+            # small; only a material filter rejecting some needs a second batch
+            centers = []
+            batch_size = max(limit, 1)
+            for start in range(0, len(nearby), batch_size):
+                batch = [center_id for center_id, _ in nearby[start:start + batch_size]]
+                found = {center.id: center for center in query.filter(RecyclingCenter.id.in_(batch)).all()}
+                centers.extend(found[center_id] for center_id in batch if center_id in found)
+                if len(centers) >= limit:
+                    break
+            centers = centers[:limit]
+        else:
+            distances = {}
+            centers = query.limit(limit).all()
         
         # Convert to dict and add distance if location provided
         centers_data = []
         for center in centers:
             center_dict = center.to_dict()
             
-            # Parse accepted materials for filtering
+            # Parse accepted materials
             if center.accepted_materials:
                 try:
                     accepted_materials = json.loads(center.accepted_materials)
@@ -61,30 +66,11 @@ def get_recycling_centers():
             else:
                 center_dict['operating_hours'] = {}
             
-            # Calculate distance if user location provided
-            if latitude and longitude:
-                distance = calculate_distance(latitude, longitude, center.latitude, center.longitude)
-                center_dict['distance'] = round(distance, 2)
-                
-                # Filter by radius
-                if distance <= radius:
-                    centers_data.append(center_dict)
-            else:
-                centers_data.append(center_dict)
-        
-        # Filter by material type if specified
-        if material_type:
-            centers_data = [
-                center for center in centers_data
-                if material_type.lower() in [material.lower() for material in center['accepted_materials']]
-            ]
-        
-        # Sort by distance if location provided
-        if latitude and longitude:
-            centers_data.sort(key=lambda x: x.get('distance', float('inf')))
-        
-        # Limit results
-        centers_data = centers_data[:limit]
+            # Add distance if user location provided
+            if has_location:
+                center_dict['distance'] = round(distances[center.id], 2)
+            
+            centers_data.append(center_dict)
         
         return jsonify({
             'success': True,
@@ -18,8 +18,6 @@ Notes:
 """
 
 from flask import Blueprint, current_app, request, jsonify
-from bs4 import BeautifulSoup
-import requests
 import time
 import urllib.parse
 import os
@@ -42,6 +40,7 @@ def geocode_address(address, api_key):
     encoded = urllib.parse.quote_plus(address)
     url = f"https://maps.googleapis.com/maps/api/geocode/json?address={encoded}&key={api_key}"
     try:
+        import requests
         resp = requests.get(url, timeout=10)
         data = resp.json()
         if data.get('status') == 'OK' and data.get('results'):
@@ -65,6 +64,14 @@ def seed_petco_centres():
 
     summary = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': []}
 
+    # Scraping dependencies are only needed by this admin-only route, so they
+    # are imported here rather than by every worker at startup
+    try:
+        import requests
+        from bs4 import BeautifulSoup
+    except ImportError as e:
+        return jsonify({'success': False, 'error': f'Scraping dependencies not installed: {e}'}), 500
+
     try:
         resp = requests.get(PETCO_URL, timeout=15)
         resp.raise_for_status()
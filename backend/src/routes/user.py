@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import check_password_hash
 from werkzeug.security import generate_password_hash
-from src.models.user import db, User
+from src.models.user import db, User, with_points_totals
 
 user_bp = Blueprint('user', __name__)
 
@@ -45,7 +45,7 @@ def login_user():
     if not data.get('email') or not data.get('password'):
         return jsonify({'error': 'Email and password are required'}), 400
 
-    user = User.query.filter_by(email=data['email']).first()
+    user = User.query.options(with_points_totals()).filter_by(email=data['email']).first()
     if not user or not check_password_hash(user.password_hash, data['password']):
         return jsonify({'error': 'Invalid email or password'}), 401
 
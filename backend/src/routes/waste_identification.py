@@ -1,19 +1,76 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 import os
+import threading
 import uuid
 from datetime import datetime
 from src.models.user import db
-from src.models.waste_item import WasteItem
-from src.models.recycling_center import RecyclingCenter
-from src.services.mock_ai_classifier import MockAIWasteClassifier, save_uploaded_image
-import math
-import json
+from src.models.waste_item import (
+    WasteItem, WasteCategoryRollup, category_aggregates_query, recent_waste_items_query, waste_history_query
+)
+from src.services.uploads import MAX_UPLOAD_BYTES, UploadRejected, store_upload, store_upload_stream
+from src.services.classification_cache import ClassificationCache
+from src.services.batching import ClassificationCoalescer
+from src.services.image_preprocessing import prepare_image
+from src.services.recommendation_cache import recommendation_cache
+from src.services.classification_jobs import ClassificationJobQueue, QueueFullError
+from src.services.pagination import InvalidCursor, keyset_page, keyset_pagination
 
 waste_identification_bp = Blueprint('waste_identification', __name__)
 
-# Initialize AI classifier
-ai_classifier = MockAIWasteClassifier()
+# The classifier and its batching front end are built on first use, so
+# importing this blueprint (and booting a worker) stays cheap
+_classifier_lock = threading.Lock()
+_ai_classifier = None
+_classification_coalescer = None
+
+def get_ai_classifier():
+    """The shared waste classifier, constructed on the first call."""
+    global _ai_classifier
+    if _ai_classifier is None:
+        with _classifier_lock:
+            if _ai_classifier is None:
+                from src.services.mock_ai_classifier import MockAIWasteClassifier
+                _ai_classifier = MockAIWasteClassifier(
+                    latency=float(os.getenv('MOCK_CLASSIFIER_LATENCY', '0')),
+                    per_image_latency=float(os.getenv('MOCK_CLASSIFIER_PER_IMAGE_LATENCY', '0'))
+                )
+    return _ai_classifier
+
+def get_classification_coalescer():
+    """
+    Front end for classifications; constructed on the first call.
+    
+    Batching is opt-in: with CLASSIFICATION_BATCH_SIZE above 1, concurrent
+    requests wait up to CLASSIFICATION_BATCH_WAIT_MS to share one
+    classify_batch() call. Otherwise each request calls the classifier directly.
+    """
+    global _classification_coalescer
+    if _classification_coalescer is None:
+        classifier = get_ai_classifier()
+        with _classifier_lock:
+            if _classification_coalescer is None:
+                _classification_coalescer = ClassificationCoalescer(
+                    classifier,
+                    max_batch_size=int(os.getenv('CLASSIFICATION_BATCH_SIZE', '1')),
+                    max_wait_ms=float(os.getenv('CLASSIFICATION_BATCH_WAIT_MS', '10'))
+                )
+    return _classification_coalescer
+
+# Classification results of previously seen images, keyed by content hash
+classification_cache = ClassificationCache(
+    maxsize=int(os.getenv('CLASSIFICATION_CACHE_SIZE', '4096')),
+    ttl=float(os.getenv('CLASSIFICATION_CACHE_TTL', '86400'))
+)
+
+# Longest time a client may hold a long-poll request for a job result
+MAX_JOB_WAIT_SECONDS = 30
+
+# Longest time a request waits for its (possibly batched) classification
+CLASSIFICATION_TIMEOUT_SECONDS = float(os.getenv('CLASSIFICATION_TIMEOUT_SECONDS', '60'))
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), '..', 'static')
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -21,22 +78,104 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points using Haversine formula."""
-    R = 6371  # Earth's radius in kilometers
+def static_url(file_path):
+    """URL under /static for a file stored in the static folder."""
+    return f'/static/{os.path.relpath(file_path, STATIC_DIR)}'
+
+def process_waste_image(image_path, user_id=None, user_latitude=None, user_longitude=None,
+                        content_hash=None):
+    """
+    Classify a saved upload, pick a recommended center and record the WasteItem.
+    
+    Shared by the synchronous endpoint and the background job workers.
+    
+    Returns:
+        Response data for the identification
+    """
+    # Downscale once, make the history thumbnail (both cached next to the upload)
+    # and take the perceptual hash from the same decode
+    prepared_image = prepare_image(image_path)
+    perceptual_hash = prepared_image.perceptual_hash
     
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
+    # Reuse the result of an identical or near-identical image seen before
+    classification_result = None
+    if content_hash:
+        classification_result = classification_cache.lookup(content_hash, perceptual_hash)
     
-    dlat = lat2_rad - lat1_rad
-    dlon = lon2_rad - lon1_rad
+    # Classify the waste using AI
+    if classification_result is None:
+        classification_result = get_classification_coalescer().classify(
+            image_path, timeout=CLASSIFICATION_TIMEOUT_SECONDS
+        )
+        if content_hash:
+            classification_cache.store(content_hash, perceptual_hash, classification_result)
+    
+    # Find recommended recycling center if location provided
+    recommended_center = None
+    if user_latitude and user_longitude and classification_result.get('recyclable'):
+        recommended_center = recommendation_cache.recommend(
+            classification_result.get('material_category'), user_latitude, user_longitude
+        )
     
-    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-    c = 2 * math.asin(math.sqrt(a))
+    thumbnail_path = static_url(prepared_image.thumbnail_path) if prepared_image.thumbnail_path else None
     
-    return R * c
+    # Save to database if user_id provided
+    waste_item_id = None
+    if user_id:
+        try:
+            waste_item = WasteItem(
+                user_id=user_id,
+                image_path=static_url(image_path),
+                thumbnail_path=thumbnail_path,
+                identified_type=classification_result.get('identified_type'),
+                confidence_score=classification_result.get('confidence_score', 0.0),
+                material_category=classification_result.get('material_category'),
+                recyclable=classification_result.get('recyclable', False),
+                disposal_method=classification_result.get('disposal_method'),
+                recommended_center_id=recommended_center['id'] if recommended_center else None
+            )
+            
+            db.session.add(waste_item)
+            db.session.commit()
+            waste_item_id = waste_item.id
+            
+        except Exception:
+            current_app.logger.exception('Error saving waste item for user %s', user_id)
+            db.session.rollback()
+            # Continue without saving to database
+    
+    # Get enhanced recommendations
+    user_location = None
+    if user_latitude and user_longitude:
+        user_location = {'latitude': user_latitude, 'longitude': user_longitude}
+    
+    recommendations = get_ai_classifier().get_disposal_recommendations(
+        classification_result, user_location
+    )
+    
+    # Build response
+    response_data = {
+        'id': waste_item_id,
+        'identified_type': classification_result.get('identified_type'),
+        'confidence_score': classification_result.get('confidence_score', 0.0),
+        'material_category': classification_result.get('material_category'),
+        'recyclable': classification_result.get('recyclable', False),
+        'disposal_method': classification_result.get('disposal_method'),
+        'preparation_tips': classification_result.get('preparation_tips'),
+        'environmental_impact': recommendations.get('environmental_impact'),
+        'alternatives': recommendations.get('alternatives', []),
+        'image_path': static_url(image_path),
+        'thumbnail_path': thumbnail_path,
+        'recommended_center': recommended_center
+    }
+    
+    return response_data
+
+classification_jobs = ClassificationJobQueue(
+    process_waste_image,
+    max_workers=int(os.getenv('CLASSIFICATION_WORKERS', '4')),
+    max_pending=int(os.getenv('CLASSIFICATION_MAX_PENDING', '100'))
+)
 
 @waste_identification_bp.route('/identify-waste', methods=['POST'])
 def identify_waste():
@@ -48,153 +187,162 @@ def identify_waste():
     - user_id: ID of the user (optional)
     - latitude: User's latitude (optional)
     - longitude: User's longitude (optional)
+    - mode: "job" to queue classification and return a job id right away (optional)
+    
+    The image may also be sent as the raw request body with an image/* or
+    application/octet-stream Content-Type, passing the other fields as query
+    parameters. It is then streamed to disk without multipart buffering.
     """
     try:
-        # Check if image file is present
-        if 'image' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No image file provided'
-            }), 400
+        upload_dir = os.path.join(STATIC_DIR, 'uploads')
+        max_bytes = current_app.config.get('MAX_CONTENT_LENGTH') or MAX_UPLOAD_BYTES
         
-        file = request.files['image']
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'error': 'No file selected'
-            }), 400
+        if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+            # Raw image body: hash, sniff and write it chunk by chunk as it arrives
+            params = request.args
+            upload = store_upload_stream(request.stream, upload_dir, max_bytes=max_bytes)
+        else:
+            # Check if image file is present
+            if 'image' not in request.files:
+                return jsonify({
+                    'success': False,
+                    'error': 'No image file provided'
+                }), 400
+            
+            file = request.files['image']
+            if file.filename == '':
+                return jsonify({
+                    'success': False,
+                    'error': 'No file selected'
+                }), 400
+            
+            if not allowed_file(file.filename):
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid file type. Supported formats: PNG, JPG, JPEG, GIF, WebP'
+                }), 400
+            
+            params = request.form
+            upload = store_upload(file, upload_dir, max_bytes=max_bytes)
         
-        if not allowed_file(file.filename):
-            return jsonify({
-                'success': False,
-                'error': 'Invalid file type. Supported formats: PNG, JPG, JPEG, GIF, WebP'
-            }), 400
+        image_path = upload.path
         
         # Get optional parameters
-        user_id = request.form.get('user_id', type=int)
-        user_latitude = request.form.get('latitude', type=float)
-        user_longitude = request.form.get('longitude', type=float)
-        
-        # Save uploaded image
-        upload_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'uploads')
-        image_path = save_uploaded_image(file, upload_dir)
-        
-        # Classify the waste using AI
-        classification_result = ai_classifier.classify_waste(image_path)
-        
-        # Find recommended recycling center if location provided
-        recommended_center = None
-        if user_latitude and user_longitude and classification_result.get('recyclable'):
-            material_category = classification_result.get('material_category')
-            centers = RecyclingCenter.query.filter_by(is_active=True).all()
-            
-            # Find centers that accept this material type
-            suitable_centers = []
-            for center in centers:
-                if center.accepted_materials:
-                    try:
-                        # Handle both JSON string and list formats
-                        if isinstance(center.accepted_materials, str):
-                            accepted_materials = json.loads(center.accepted_materials)
-                        else:
-                            accepted_materials = center.accepted_materials
-                        
-                        if material_category in accepted_materials:
-                            distance = calculate_distance(
-                                user_latitude, user_longitude,
-                                center.latitude, center.longitude
-                            )
-                            suitable_centers.append((center, distance))
-                    except (json.JSONDecodeError, TypeError):
-                        continue
-            
-            # Sort by distance and get the closest one
-            if suitable_centers:
-                suitable_centers.sort(key=lambda x: x[1])
-                closest_center, distance = suitable_centers[0]
-                recommended_center = {
-                    'id': closest_center.id,
-                    'name': closest_center.name,
-                    'address': closest_center.address,
-                    'distance': round(distance, 1),
-                    'phone': closest_center.phone,
-                    'operating_hours': closest_center.operating_hours
-                }
+        user_id = params.get('user_id', type=int)
+        user_latitude = params.get('latitude', type=float)
+        user_longitude = params.get('longitude', type=float)
         
-        # Save to database if user_id provided
-        waste_item_id = None
-        if user_id:
+        # Job mode: classify on the worker pool and let the client poll for the result
+        if request.values.get('mode') == 'job':
             try:
-                # Create relative path for database storage
-                relative_path = os.path.relpath(image_path, os.path.join(os.path.dirname(__file__), '..', 'static'))
-                
-                waste_item = WasteItem(
+                job = classification_jobs.submit(
+                    current_app._get_current_object(),
+                    image_path=image_path,
                     user_id=user_id,
-                    image_path=f'/static/{relative_path}',
-                    identified_type=classification_result.get('identified_type'),
-                    confidence_score=classification_result.get('confidence_score', 0.0),
-                    material_category=classification_result.get('material_category'),
-                    recyclable=classification_result.get('recyclable', False),
-                    disposal_method=classification_result.get('disposal_method'),
-                    recommended_center_id=recommended_center['id'] if recommended_center else None
+                    user_latitude=user_latitude,
+                    user_longitude=user_longitude,
+                    content_hash=upload.sha256
                 )
-                
-                db.session.add(waste_item)
-                db.session.commit()
-                waste_item_id = waste_item.id
-                
-            except Exception as e:
-                print(f"Error saving waste item: {e}")
-                db.session.rollback()
-                # Continue without saving to database
-        
-        # Get enhanced recommendations
-        user_location = None
-        if user_latitude and user_longitude:
-            user_location = {'latitude': user_latitude, 'longitude': user_longitude}
+            except QueueFullError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 503
+            
+            return jsonify({
+                'success': True,
+                'data': {
+                    'job_id': job.id,
+                    'status': job.status,
+                    'status_url': f'/api/identify-waste/jobs/{job.id}'
+                },
+                'message': 'Waste identification queued'
+            }), 202
         
-        recommendations = ai_classifier.get_disposal_recommendations(
-            classification_result, user_location
+        response_data = process_waste_image(
+            image_path, user_id, user_latitude, user_longitude,
+            content_hash=upload.sha256
         )
         
-        # Build response
-        response_data = {
-            'id': waste_item_id,
-            'identified_type': classification_result.get('identified_type'),
-            'confidence_score': classification_result.get('confidence_score', 0.0),
-            'material_category': classification_result.get('material_category'),
-            'recyclable': classification_result.get('recyclable', False),
-            'disposal_method': classification_result.get('disposal_method'),
-            'preparation_tips': classification_result.get('preparation_tips'),
-            'environmental_impact': recommendations.get('environmental_impact'),
-            'alternatives': recommendations.get('alternatives', []),
-            'image_path': f'/static/{os.path.relpath(image_path, os.path.join(os.path.dirname(__file__), "..", "static"))}',
-            'recommended_center': recommended_center
-        }
-        
         return jsonify({
             'success': True,
             'data': response_data,
             'message': 'Waste identified successfully'
         })
         
+    except UploadRejected as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), e.status_code
+        
+    except RequestEntityTooLarge:
+        return jsonify({
+            'success': False,
+            'error': 'Image exceeds the upload size limit'
+        }), 413
+        
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Classification failed: {str(e)}'
         }), 500
 
+@waste_identification_bp.route('/identify-waste/jobs/<job_id>', methods=['GET'])
+def get_identification_job(job_id):
+    """
+    Get the status of a queued identification.
+    
+    Query parameters:
+    - wait: Seconds to long-poll for the job to finish (optional, max 30)
+    """
+    wait = min(request.args.get('wait', 0, type=float), MAX_JOB_WAIT_SECONDS)
+    job = classification_jobs.wait(job_id, wait)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    })
+
 @waste_identification_bp.route('/waste-history/<int:user_id>', methods=['GET'])
 def get_waste_history(user_id):
-    """Get waste identification history for a user."""
+    """
+    Get waste identification history for a user.
+    
+    Pages by page/per_page by default. Passing `cursor` (empty for the first
+    page) switches to keyset pagination on (created_at, id), following the
+    returned next_cursor/prev_cursor; cursor pages add a total unless
+    include_total=false.
+    """
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', 'true').lower() != 'false'
         
-        # Query waste items for the user
-        waste_items = WasteItem.query.filter_by(user_id=user_id)\
-                                   .order_by(WasteItem.created_at.desc())\
-                                   .paginate(page=page, per_page=per_page, error_out=False)
+        # One query per page, recommended center included
+        history_query = waste_history_query(user_id)
+        
+        if cursor is not None:
+            waste_items = keyset_page(history_query, WasteItem.created_at, WasteItem.id, per_page, cursor)
+            total = history_query.order_by(None).count() if include_total else None
+            pagination = keyset_pagination(waste_items, per_page, total)
+        else:
+            waste_items = history_query.order_by(WasteItem.created_at.desc(), WasteItem.id.desc())\
+                                       .paginate(page=page, per_page=per_page, error_out=False)
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': waste_items.total,
+                'pages': waste_items.pages,
+                'has_next': waste_items.has_next,
+                'has_prev': waste_items.has_prev
+            }
         
         # Format response
         items = []
@@ -207,34 +355,31 @@ def get_waste_history(user_id):
                 'recyclable': item.recyclable,
                 'disposal_method': item.disposal_method,
                 'image_path': item.image_path,
+                'thumbnail_path': item.thumbnail_path,
                 'created_at': item.created_at.isoformat(),
             }
             
             # Add recommended center info if available
-            if item.recommended_center_id:
-                center = RecyclingCenter.query.get(item.recommended_center_id)
-                if center:
-                    item_data['recommended_center'] = {
-                        'id': center.id,
-                        'name': center.name,
-                        'address': center.address
-                    }
+            if item.center_id is not None:
+                item_data['recommended_center'] = {
+                    'id': item.center_id,
+                    'name': item.center_name,
+                    'address': item.center_address
+                }
             
             items.append(item_data)
         
         return jsonify({
             'success': True,
             'data': items,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': waste_items.total,
-                'pages': waste_items.pages,
-                'has_next': waste_items.has_next,
-                'has_prev': waste_items.has_prev
-            }
+            'pagination': pagination
         })
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -245,24 +390,28 @@ def get_waste_history(user_id):
 def get_waste_stats(user_id):
     """Get waste statistics for a user."""
     try:
-        # Get all waste items for the user
-        waste_items = WasteItem.query.filter_by(user_id=user_id).all()
+        # Per-category counters maintained on insert: one small indexed read
+        rollups = WasteCategoryRollup.query.filter_by(user_id=user_id).all()
+        if rollups:
+            category_rows = [(row.material_category, row.item_count, row.recyclable_count) for row in rollups]
+        else:
+            # No rollup yet (e.g. rows written before the table existed): aggregate in SQL
+            category_rows = [
+                (row.material_category, row.item_count, row.recyclable_count or 0)
+                for row in category_aggregates_query().filter(WasteItem.user_id == user_id)
+            ]
         
-        total_scanned = len(waste_items)
-        recyclable_count = sum(1 for item in waste_items if item.recyclable)
+        total_scanned = sum(item_count for _, item_count, _ in category_rows)
+        recyclable_count = sum(recyclable for _, _, recyclable in category_rows)
         non_recyclable_count = total_scanned - recyclable_count
         
         # Category breakdown
-        category_breakdown = {}
-        for item in waste_items:
-            category = item.material_category or 'unknown'
-            category_breakdown[category] = category_breakdown.get(category, 0) + 1
+        category_breakdown = {category: item_count for category, item_count, _ in category_rows}
         
-        # Recent activity (last 30 days)
+        # Recent activity (last 30 days), a range count on the (user_id, created_at) index
         from datetime import datetime, timedelta
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_items = [item for item in waste_items if item.created_at >= thirty_days_ago]
-        recent_activity_30_days = len(recent_items)
+        recent_activity_30_days = recent_waste_items_query(user_id, thirty_days_ago).scalar()
         
         # Calculate recycling rate
         recycling_rate = (recyclable_count / total_scanned * 100) if total_scanned > 0 else 0
@@ -289,7 +438,7 @@ def get_waste_stats(user_id):
 def get_waste_categories():
     """Get information about supported waste categories."""
     try:
-        categories = ai_classifier.waste_categories
+        categories = get_ai_classifier().waste_categories
         
         return jsonify({
             'success': True,
@@ -301,3 +450,27 @@ def get_waste_categories():
             'success': False,
             'error': str(e)
         }), 500
+
+@waste_identification_bp.route('/recommendation-cache/stats', methods=['GET'])
+def get_recommendation_cache_stats():
+    """Get hit/miss counters of the recommended center cache."""
+    return jsonify({
+        'success': True,
+        'data': recommendation_cache.stats()
+    })
+
+@waste_identification_bp.route('/classification-batching/stats', methods=['GET'])
+def get_classification_batching_stats():
+    """Get batch size histogram and latency percentiles of classification calls."""
+    return jsonify({
+        'success': True,
+        'data': get_classification_coalescer().stats()
+    })
+
+@waste_identification_bp.route('/classification-cache/stats', methods=['GET'])
+def get_classification_cache_stats():
+    """Get hit/miss counters of the image classification cache."""
+    return jsonify({
+        'success': True,
+        'data': classification_cache.stats()
+    })
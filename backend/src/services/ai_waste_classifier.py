@@ -1,8 +1,9 @@
 import os
 import base64
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from openai import OpenAI
+from src.services.image_preprocessing import prepare_image
 
 class AIWasteClassifier:
     """
@@ -76,6 +77,11 @@ class AIWasteClassifier:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
     
+    def image_data_url(self, image_path: str) -> str:
+        """Downscale the image for the model and return it as a data URL with the right MIME type."""
+        prepared = prepare_image(image_path)
+        return f"data:{prepared.mime_type};base64,{self.encode_image(prepared.path)}"
+    
     def classify_waste(self, image_path: str) -> Dict[str, Any]:
         """
         Classify waste from image using OpenAI Vision API.
@@ -87,8 +93,8 @@ class AIWasteClassifier:
             Dictionary containing classification results
         """
         try:
-            # Encode the image
-            base64_image = self.encode_image(image_path)
+            # Encode the downscaled image
+            image_url = self.image_data_url(image_path)
             
             # Create the prompt for waste classification
             prompt = """
@@ -120,7 +126,7 @@ class AIWasteClassifier:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                    "url": image_url
                                 }
                             }
                         ]
@@ -152,32 +158,99 @@ class AIWasteClassifier:
                     "additional_notes": "Classification failed, manual review needed"
                 }
             
-            # Enhance with category information
-            category = classification_result.get('material_category', 'non_recyclable')
-            category_info = self.waste_categories.get(category, self.waste_categories['non_recyclable'])
+            return self._enhance_result(classification_result)
             
-            # Build final result
-            final_result = {
-                **classification_result,
-                'recyclable': category_info['recyclable'],
-                'disposal_method': category_info['disposal_method'],
-                'preparation_tips': category_info['preparation_tips'],
-                'category_color': category_info['color']
-            }
+        except Exception as e:
+            return self._error_result(e)
+    
+    def classify_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Classify several images with a single OpenAI Vision API call.
+        
+        Args:
+            image_paths: Paths to the waste image files
+            
+        Returns:
+            List of classification results in the same order as image_paths
+        """
+        if not image_paths:
+            return []
+        if len(image_paths) == 1:
+            return [self.classify_waste(image_paths[0])]
+        
+        try:
+            prompt = f"""
+            You are an expert waste management AI. You are given {len(image_paths)} images, each showing
+            a separate waste item. Analyze every image independently.
             
-            return final_result
+            Respond with a JSON array containing exactly {len(image_paths)} objects, in the same order as
+            the images, each with the following structure:
+            {{
+                "identified_type": "Specific item name (e.g., 'Plastic Water Bottle', 'Aluminum Can')",
+                "confidence_score": 0.95,
+                "material_category": "One of: plastic, paper, glass, metal, organic, electronics, hazardous, textile, non_recyclable",
+                "specific_material": "More specific material type if applicable",
+                "condition": "Description of item condition",
+                "size_estimate": "Small/Medium/Large",
+                "additional_notes": "Any other relevant observations"
+            }}
+            """
             
-        except Exception as e:
-            # Return error result
-            return {
-                "identified_type": "Classification Error",
-                "confidence_score": 0.0,
-                "material_category": "non_recyclable",
-                "recyclable": False,
-                "disposal_method": "Unable to classify - please consult local waste guidelines",
-                "preparation_tips": "Manual classification needed",
-                "error": str(e)
-            }
+            content = [{"type": "text", "text": prompt}]
+            for image_path in image_paths:
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": self.image_data_url(image_path)
+                    }
+                })
+            
+            response = self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": content}],
+                max_tokens=300 * len(image_paths),
+                temperature=0.1
+            )
+            
+            result_text = response.choices[0].message.content
+            start_idx = result_text.find('[')
+            end_idx = result_text.rfind(']') + 1
+            classification_results = json.loads(result_text[start_idx:end_idx])
+            if not isinstance(classification_results, list) or len(classification_results) != len(image_paths):
+                raise ValueError('Batch response does not match the number of images')
+            
+        except Exception:
+            # Fall back to one call per image so a malformed batch reply loses nothing
+            return [self.classify_waste(image_path) for image_path in image_paths]
+        
+        return [
+            self._enhance_result(result if isinstance(result, dict) else {})
+            for result in classification_results
+        ]
+    
+    def _enhance_result(self, classification_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add recyclability and disposal information for the classified category."""
+        category = classification_result.get('material_category', 'non_recyclable')
+        category_info = self.waste_categories.get(category, self.waste_categories['non_recyclable'])
+        
+        return {
+            **classification_result,
+            'recyclable': category_info['recyclable'],
+            'disposal_method': category_info['disposal_method'],
+            'preparation_tips': category_info['preparation_tips'],
+            'category_color': category_info['color']
+        }
+    
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "identified_type": "Classification Error",
+            "confidence_score": 0.0,
+            "material_category": "non_recyclable",
+            "recyclable": False,
+            "disposal_method": "Unable to classify - please consult local waste guidelines",
+            "preparation_tips": "Manual classification needed",
+            "error": str(error)
+        }
     
     def get_disposal_recommendations(self, classification_result: Dict[str, Any], 
                                    user_location: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
@@ -278,20 +351,7 @@ class AIWasteClassifier:
 
 # Utility functions for the service
 def save_uploaded_image(image_file, upload_dir: str = '/tmp/uploads') -> str:
-    """Save uploaded image file and return the path."""
-    import os
-    import uuid
-    from werkzeug.utils import secure_filename
-    
-    # Create upload directory if it doesn't exist
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    filename = secure_filename(image_file.filename)
-    unique_filename = f"{uuid.uuid4()}_{filename}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save the file
-    image_file.save(file_path)
+    """Save uploaded image file under its content hash and return the path."""
+    from src.services.uploads import store_upload
     
-    return file_path
\ No newline at end of file
+    return store_upload(image_file, upload_dir).path
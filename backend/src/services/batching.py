@@ -0,0 +1,134 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LatencyRecorder:
+    """Keeps the most recent latency samples and reports percentiles in milliseconds."""
+
+    def __init__(self, max_samples: int = 10000):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentiles(self, points=(50, 90, 99)) -> Dict[str, Optional[float]]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {f'p{point}': None for point in points}
+        return {
+            f'p{point}': round(samples[min(len(samples) - 1, int(len(samples) * point / 100))] * 1000, 2)
+            for point in points
+        }
+
+
+class ClassificationCoalescer:
+    """
+    Gathers concurrent single-image classification requests into batches.
+
+    Callers block in classify() as before. A dispatcher thread collects requests
+    until max_batch_size images are waiting or max_wait_ms has passed since the
+    first one arrived, then sends them to the classifier's classify_batch() as
+    one call.
+    """
+
+    def __init__(self, classifier, max_batch_size: int = 8, max_wait_ms: float = 10,
+                 max_concurrent_batches: int = 4):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: 'queue.Queue[Tuple[str, Future, float]]' = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.latency = LatencyRecorder()
+        self.batch_sizes: Counter = Counter()
+        self._stats_lock = threading.Lock()
+
+    def classify(self, image_path: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Classify one image, sharing the backend call with other concurrent requests."""
+        if self.max_batch_size <= 1:
+            started = time.monotonic()
+            result = self.classifier.classify_waste(image_path)
+            self._count_batch(1)
+            self.latency.record(time.monotonic() - started)
+            return result
+
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((image_path, future, time.monotonic()))
+        return future.result(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._dispatcher is not None:
+            return
+        with self._start_lock:
+            if self._dispatcher is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                                    thread_name_prefix='classification-batch')
+                self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                    name='classification-coalescer', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+
+    def _count_batch(self, size: int) -> None:
+        with self._stats_lock:
+            self.batch_sizes[size] += 1
+
+    def _run_batch(self, batch: List[Tuple[str, Future, float]]) -> None:
+        self._count_batch(len(batch))
+        try:
+            results = self.classifier.classify_batch([image_path for image_path, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            # Results are matched to requests by position, so a short or long
+            # answer cannot be paired up; fail every caller rather than leave
+            # some of them waiting on a future nobody resolves
+            error = RuntimeError(f'classify_batch returned {len(results)} results for {len(batch)} images')
+            for _, future, _ in batch:
+                future.set_exception(error)
+            return
+
+        finished = time.monotonic()
+        for (_, future, enqueued), result in zip(batch, results):
+            self.latency.record(finished - enqueued)
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            batch_sizes = dict(self.batch_sizes)
+        batches = sum(batch_sizes.values())
+        images = sum(size * count for size, count in batch_sizes.items())
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'images': images,
+            'mean_batch_size': round(images / batches, 2) if batches else 0.0,
+            'batch_size_histogram': {str(size): count for size, count in sorted(batch_sizes.items())},
+            'latency_ms': self.latency.percentiles()
+        }
@@ -0,0 +1,65 @@
+import threading
+from typing import Any, Dict, Optional
+
+from src.services.cache import LRUCache
+
+
+class ClassificationCache:
+    """
+    Classification results keyed by image content.
+
+    Results are stored under the upload's SHA-256 and, when available, its
+    perceptual hash, so both exact re-submissions and re-encoded copies of the
+    same photo skip the classifier.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = 24 * 3600):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        # Guards the counters; a lookup and its count happen under it together
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_duplicate_hits = 0
+        self.misses = 0
+
+    def lookup(self, sha256: str, perceptual_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._cache.get(('sha256', sha256))
+            if result is not None:
+                self.hits += 1
+                return dict(result)
+
+            if perceptual_hash:
+                result = self._cache.get(('phash', perceptual_hash))
+                if result is not None:
+                    self.near_duplicate_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def store(self, sha256: str, perceptual_hash: Optional[str], result: Dict[str, Any]) -> None:
+        # Never cache failed classifications, they should be retried
+        if result.get('error'):
+            return
+        self._cache.set(('sha256', sha256), dict(result))
+        if perceptual_hash:
+            self._cache.set(('phash', perceptual_hash), dict(result))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cache_stats = self._cache.stats()
+            hits, near_duplicate_hits, misses = self.hits, self.near_duplicate_hits, self.misses
+        lookups = hits + near_duplicate_hits + misses
+        return {
+            'size': cache_stats['size'],
+            'maxsize': cache_stats['maxsize'],
+            'ttl': cache_stats['ttl'],
+            'evictions': cache_stats['evictions'],
+            'hits': hits,
+            'near_duplicate_hits': near_duplicate_hits,
+            'misses': misses,
+            'hit_rate': round((hits + near_duplicate_hits) / lookups, 4) if lookups else 0.0
+        }
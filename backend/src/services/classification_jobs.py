@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+
+from src.models.user import db
+from src.models.classification_job import ClassificationJobRecord
+
+# Seconds between reads of a job another process is running, while waiting on it
+JOB_POLL_SECONDS = 0.25
+
+
+class QueueFullError(Exception):
+    """Raised when the classification queue has no room for another job."""
+
+
+class ClassificationJob:
+    """State of a single queued waste classification."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'  # queued, running, completed, failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    @classmethod
+    def from_record(cls, record: ClassificationJobRecord) -> 'ClassificationJob':
+        """A read-only copy of a job stored by this or another process."""
+        job = cls()
+        job.id = record.id
+        job.status = record.status
+        job.result = json.loads(record.result) if record.result is not None else None
+        job.error = record.error
+        job.created_at = record.created_at
+        job.started_at = record.started_at
+        job.finished_at = record.finished_at
+        if job.finished_at is not None:
+            job.done.set()
+        return job
+
+    def to_record(self) -> ClassificationJobRecord:
+        return ClassificationJobRecord(
+            id=self.id,
+            status=self.status,
+            result=json.dumps(self.result) if self.result is not None else None,
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'queued_seconds': round((self.started_at or time.time()) - self.created_at, 3),
+            'run_seconds': round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None
+        }
+
+
+class ClassificationJobQueue:
+    """
+    Bounded worker pool running waste classification outside the request thread.
+
+    Jobs run the handler inside the Flask app context they were submitted from,
+    so the handler can use the database session as a request would. Each
+    state change is also written to the classification_jobs table, so under
+    a pre-fork server a poll landing on another worker still finds the job.
+    Finished jobs are kept for `retention` seconds so clients can poll for
+    the result.
+    """
+
+    def __init__(self, handler: Callable[..., Dict[str, Any]], max_workers: int = 4,
+                 max_pending: int = 100, retention: float = 600):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._jobs: Dict[str, ClassificationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, app, **kwargs) -> ClassificationJob:
+        """
+        Queue a classification.
+
+        Must be called inside an app context, e.g. from a request.
+
+        Args:
+            app: Flask application whose context the job runs in
+            **kwargs: Keyword arguments passed to the handler
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If max_workers + max_pending jobs are already in flight
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError('Classification queue is full, try again later')
+
+        job = ClassificationJob()
+        try:
+            self._prune_records()
+            self._save(job)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='classification')
+        self._executor.submit(self._run, job, app, kwargs)
+        return job
+
+    def _run(self, job: ClassificationJob, app, kwargs):
+        with app.app_context():
+            try:
+                job.status = 'running'
+                job.started_at = time.time()
+                self._record(job)
+                try:
+                    job.result = self.handler(**kwargs)
+                    job.status = 'completed'
+                except Exception as e:
+                    db.session.rollback()
+                    job.error = str(e)
+                    job.status = 'failed'
+                job.finished_at = time.time()
+                self._record(job)
+            finally:
+                job.done.set()
+                self._slots.release()
+
+    @staticmethod
+    def _save(job: ClassificationJob) -> None:
+        db.session.merge(job.to_record())
+        db.session.commit()
+
+    def _record(self, job: ClassificationJob) -> None:
+        """Save a state change; if the database refuses it, polls served by this process still see the job."""
+        try:
+            self._save(job)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception('Could not record classification job %s', job.id)
+
+    @staticmethod
+    def _load(job_id: str) -> Optional[ClassificationJob]:
+        # Read fresh on every poll, not from the session's identity map
+        record = db.session.get(ClassificationJobRecord, job_id, populate_existing=True)
+        return ClassificationJob.from_record(record) if record is not None else None
+
+    def get(self, job_id: str) -> Optional[ClassificationJob]:
+        """The job, from this process's memory or, when another process took it, the database."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[ClassificationJob]:
+        """Block until the job finishes or the timeout passes, then return it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            if timeout > 0:
+                job.done.wait(timeout)
+            return job
+
+        # Another process runs it: poll its record
+        deadline = time.monotonic() + timeout
+        job = self._load(job_id)
+        while job is not None and not job.done.is_set() and time.monotonic() < deadline:
+            time.sleep(min(JOB_POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+            job = self._load(job_id)
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _prune_records(self):
+        ClassificationJobRecord.query.filter(
+            ClassificationJobRecord.finished_at < time.time() - self.retention
+        ).delete(synchronize_session=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'jobs': counts
+        }
@@ -0,0 +1,374 @@
+import math
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.models.user import db, User
+from src.models.pickup_request import PickupRequest
+from src.models.pickup_suggestion import PickupSuggestion
+from src.services.geo import KM_PER_DEGREE, as_coordinate_arrays, paired_distances
+
+# Wastepickers further than this from a pickup are never suggested for it
+DISPATCH_RADIUS_KM = 15.0
+
+# Nearest wastepickers considered per pickup request
+CANDIDATES_PER_REQUEST = 8
+
+# Accepted plus in-progress pickups a wastepicker can hold, suggestions included
+MAX_ACTIVE_PICKUPS = 5
+
+# Each kg of estimated weight adds this fraction to the per-km cost
+WEIGHT_COST_PER_KG = 0.02
+
+# Fixed surcharge per waste category, in km-equivalents
+CATEGORY_COST = {
+    'hazardous': 2.0,
+    'mixed': 0.5,
+}
+
+# The candidate search walks this many grid rings per level, then retries the
+# still-unsettled requests on a grid with cells CELL_GROWTH times larger
+RINGS_PER_LEVEL = 4
+CELL_GROWTH = 3.0
+
+_KEY_STRIDE = 1 << 32
+
+IndexArrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class DispatchPlan(NamedTuple):
+    request_indices: np.ndarray      # Into the request arrays given to solve_dispatch
+    wastepicker_indices: np.ndarray  # Into the wastepicker arrays
+    distances: np.ndarray            # km
+    costs: np.ndarray
+
+
+def _ring_offsets(ring: int) -> Iterable[Tuple[int, int]]:
+    if ring == 0:
+        yield 0, 0
+        return
+    for offset in range(-ring, ring + 1):
+        yield -ring, offset
+        yield ring, offset
+    for offset in range(-ring + 1, ring):
+        yield offset, -ring
+        yield offset, ring
+
+
+class _Grid:
+    """Wastepickers bucketed into lat/lon cells at least cell_km across, sorted by cell key."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_km: float, widest: float):
+        self.cell_km = cell_km
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        # Size longitude cells for the widest latitude, so no cell is narrower than cell_km
+        self.cell_lon = self.cell_lat / math.cos(math.radians(widest))
+        keys = self.cells(lats, lons)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def rows_cols(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.floor(lats / self.cell_lat).astype(np.int64),
+                np.floor(lons / self.cell_lon).astype(np.int64))
+
+    def cells(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        rows, cols = self.rows_cols(lats, lons)
+        return rows * _KEY_STRIDE + cols
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(start, count) of each key's slice of the sorted wastepickers."""
+        starts = np.searchsorted(self.sorted_keys, keys, 'left')
+        return starts, np.searchsorted(self.sorted_keys, keys, 'right') - starts
+
+
+def _initial_cell_km(request_lats, request_lons, wastepicker_lats, wastepicker_lons,
+                     widest: float, radius_km: float) -> float:
+    """Cell size putting about one wastepicker in the cells of busy requests."""
+    reference = _Grid(wastepicker_lats, wastepicker_lons, 1.0, widest)
+    _, occupancy = reference.lookup(reference.cells(request_lats, request_lons))
+    occupied = occupancy[occupancy > 0]
+    if len(occupied) == 0:
+        return radius_km / RINGS_PER_LEVEL
+    busy = float(np.percentile(occupied, 90))
+    return min(radius_km / RINGS_PER_LEVEL, max(0.05, 1.0 / math.sqrt(busy)))
+
+
+def _search_level(grid: _Grid, active: np.ndarray, request_lats, request_lons, wastepicker_lats,
+                  wastepicker_lons, k: int, radius_km: float, max_ring: int):
+    """Ring search for the active requests on one grid; returns their pairs and the unsettled requests."""
+    request_rows, request_cols = grid.rows_cols(request_lats[active], request_lons[active])
+    # Sorted query keys stay sorted under every offset, which keeps searchsorted cache-friendly
+    by_cell = np.lexsort((request_cols, request_rows))
+    active, request_rows, request_cols = active[by_cell], request_rows[by_cell], request_cols[by_cell]
+    chunks = [(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0))]
+    pending = np.arange(len(active))  # positions in `active` still expanding
+    settled = np.zeros(len(active), dtype=bool)
+
+    for ring in range(max_ring + 1):
+        for row_offset, col_offset in _ring_offsets(ring):
+            keys = (request_rows[pending] + row_offset) * _KEY_STRIDE + request_cols[pending] + col_offset
+            starts, counts = grid.lookup(keys)
+            hit = counts > 0
+            if not hit.any():
+                continue
+
+            # Expand each request's slice of the sorted wastepickers into pairs
+            counts = counts[hit]
+            requests = np.repeat(pending[hit], counts)
+            positions = np.repeat(starts[hit] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            wastepickers = grid.order[positions]
+            distances = paired_distances(request_lats[active[requests]], request_lons[active[requests]],
+                                         wastepicker_lats[wastepickers], wastepicker_lons[wastepickers],
+                                         fast=True)
+            inside = distances <= radius_km
+            chunks.append((requests[inside], wastepickers[inside], distances[inside]))
+
+        # After ring r every wastepicker within r cells' width has been seen
+        covered = ring * grid.cell_km
+        if covered >= radius_km:
+            settled[pending] = True
+            break
+        found_requests, found_wastepickers, found_distances = (np.concatenate(parts) for parts in zip(*chunks))
+        chunks = [(found_requests, found_wastepickers, found_distances)]
+        close = np.bincount(found_requests[found_distances <= covered], minlength=len(active))
+        done = close[pending] >= k
+        settled[pending[done]] = True
+        pending = pending[~done]
+        if len(pending) == 0:
+            break
+
+    found_requests, found_wastepickers, found_distances = (np.concatenate(parts) for parts in zip(*chunks))
+    keep = settled[found_requests]
+    return active[found_requests[keep]], found_wastepickers[keep], found_distances[keep], active[~settled]
+
+
+def candidate_pairs(request_lats, request_lons, wastepicker_lats, wastepicker_lons,
+                    k: int = CANDIDATES_PER_REQUEST, radius_km: float = DISPATCH_RADIUS_KM) -> IndexArrays:
+    """
+    Up to k nearest wastepickers within radius_km of every request.
+
+    Wastepickers are bucketed into a sorted lat/lon grid, and all requests
+    look up their surrounding cells ring by ring with searchsorted. A request
+    stops as soon as its k nearest are known for certain. Requests still
+    open after RINGS_PER_LEVEL rings are retried on a coarser grid, so dense
+    city centres and sparse rural areas both settle within a few rings.
+
+    Returns:
+        (request_indices, wastepicker_indices, distances_km) of the candidate pairs
+    """
+    request_lats, request_lons = as_coordinate_arrays(request_lats, request_lons)
+    wastepicker_lats, wastepicker_lons = as_coordinate_arrays(wastepicker_lats, wastepicker_lons)
+    if len(request_lats) == 0 or len(wastepicker_lats) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+    widest = min(89.0, max(np.abs(request_lats).max(), np.abs(wastepicker_lats).max()))
+    cell_km = _initial_cell_km(request_lats, request_lons, wastepicker_lats, wastepicker_lons,
+                               widest, radius_km)
+    active = np.arange(len(request_lats))
+    parts = []
+
+    while len(active):
+        grid = _Grid(wastepicker_lats, wastepicker_lons, cell_km, widest)
+        # The last level walks as far as the radius, so every request settles
+        final = cell_km * RINGS_PER_LEVEL * CELL_GROWTH > radius_km
+        max_ring = math.ceil(radius_km / cell_km) if final else RINGS_PER_LEVEL
+        requests, wastepickers, distances, active = _search_level(
+            grid, active, request_lats, request_lons, wastepicker_lats, wastepicker_lons,
+            k, radius_km, max_ring
+        )
+        parts.append((requests, wastepickers, distances))
+        cell_km *= CELL_GROWTH
+
+    found_requests, found_wastepickers, found_distances = (np.concatenate(arrays) for arrays in zip(*parts))
+
+    # Keep the k nearest per request
+    order = np.lexsort((found_distances, found_requests))
+    found_requests, found_wastepickers, found_distances = (
+        found_requests[order], found_wastepickers[order], found_distances[order]
+    )
+    rank = np.arange(len(found_requests)) - np.searchsorted(found_requests, found_requests, 'left')
+    keep = rank < k
+    return found_requests[keep], found_wastepickers[keep], found_distances[keep]
+
+
+def assignment_costs(distances: np.ndarray, weights: np.ndarray, surcharges: np.ndarray) -> np.ndarray:
+    """Travel distance scaled by load weight, plus the request's category surcharge."""
+    return distances * (1.0 + WEIGHT_COST_PER_KG * weights) + surcharges
+
+
+def greedy_assign(request_indices: np.ndarray, wastepicker_indices: np.ndarray, costs: np.ndarray,
+                  capacities: np.ndarray, request_count: int) -> np.ndarray:
+    """
+    Take candidate pairs cheapest first while the request is free and the wastepicker has room.
+
+    Returns:
+        Positions of the chosen pairs in the input arrays
+    """
+    order = np.argsort(costs, kind='stable')
+    remaining = [int(capacity) for capacity in capacities]
+    open_slots = sum(capacity for capacity in remaining if capacity > 0)
+    assigned = bytearray(request_count)
+    chosen = []
+
+    for position, request, wastepicker in zip(order.tolist(), request_indices[order].tolist(),
+                                              wastepicker_indices[order].tolist()):
+        if open_slots == 0:
+            break
+        if assigned[request] or remaining[wastepicker] <= 0:
+            continue
+        assigned[request] = 1
+        remaining[wastepicker] -= 1
+        open_slots -= 1
+        chosen.append(position)
+
+    return np.asarray(chosen, dtype=np.int64)
+
+
+def solve_dispatch(request_lats, request_lons, request_weights, request_categories,
+                   wastepicker_lats, wastepicker_lons, wastepicker_capacities,
+                   radius_km: float = DISPATCH_RADIUS_KM, k: int = CANDIDATES_PER_REQUEST) -> DispatchPlan:
+    """
+    Match pending pickups to nearby wastepickers.
+
+    Args:
+        request_lats, request_lons: Pickup coordinates
+        request_weights: Estimated weight per pickup in kg (NaN or None for unknown)
+        request_categories: Waste category per pickup (may be None)
+        wastepicker_lats, wastepicker_lons: Wastepicker coordinates
+        wastepicker_capacities: Further pickups each wastepicker can take
+        radius_km: Maximum pickup distance
+        k: Nearest wastepickers considered per pickup
+
+    Returns:
+        DispatchPlan with one entry per assigned pickup
+    """
+    requests, wastepickers, distances = candidate_pairs(
+        request_lats, request_lons, wastepicker_lats, wastepicker_lons, k, radius_km
+    )
+    weights = np.nan_to_num(np.asarray(request_weights, dtype=np.float64))
+    surcharges = np.array([CATEGORY_COST.get(category, 0.0) for category in request_categories])
+    costs = assignment_costs(distances, weights[requests], surcharges[requests]) if len(requests) else distances
+
+    chosen = greedy_assign(requests, wastepickers, costs,
+                           np.asarray(wastepicker_capacities), len(weights))
+    return DispatchPlan(requests[chosen], wastepickers[chosen], distances[chosen], costs[chosen])
+
+
+def pending_pickups_query():
+    """Location, weight and category of every pending pickup request."""
+    return db.session.query(
+        PickupRequest.id, PickupRequest.pickup_latitude, PickupRequest.pickup_longitude,
+        PickupRequest.estimated_weight, PickupRequest.waste_category
+    ).filter(PickupRequest.status == 'pending')
+
+
+def available_wastepickers_query():
+    """Location of every active wastepicker whose location is known."""
+    return db.session.query(User.id, User.latitude, User.longitude).filter(
+        User.user_type == 'wastepicker',
+        User.is_active.is_(True),
+        User.latitude.isnot(None),
+        User.longitude.isnot(None)
+    )
+
+
+def active_loads_query():
+    """(wastepicker_id, count) of accepted and in-progress pickups per wastepicker."""
+    return db.session.query(PickupRequest.wastepicker_id, db.func.count(PickupRequest.id)).filter(
+        PickupRequest.status.in_(['accepted', 'in_progress']),
+        PickupRequest.wastepicker_id.isnot(None)
+    ).group_by(PickupRequest.wastepicker_id)
+
+
+def run_dispatch(radius_km: float = DISPATCH_RADIUS_KM) -> Dict[str, Any]:
+    """
+    Suggest a nearby wastepicker for every pending pickup request.
+
+    Replaces the previous run's suggestions with one bulk insert. Must run
+    inside an application context.
+
+    Returns:
+        Summary of the run, including per-phase timings in milliseconds
+    """
+    started = time.perf_counter()
+    pending = pending_pickups_query().all()
+    wastepickers = available_wastepickers_query().all()
+    active_loads = dict(active_loads_query().all())
+    loaded = time.perf_counter()
+
+    plan = solve_dispatch(
+        [row.pickup_latitude for row in pending],
+        [row.pickup_longitude for row in pending],
+        [row.estimated_weight if row.estimated_weight is not None else np.nan for row in pending],
+        [row.waste_category for row in pending],
+        [row.latitude for row in wastepickers],
+        [row.longitude for row in wastepickers],
+        [MAX_ACTIVE_PICKUPS - active_loads.get(row.id, 0) for row in wastepickers],
+        radius_km
+    )
+    solved = time.perf_counter()
+
+    dispatch_run = uuid.uuid4().hex
+    suggestions = [
+        {
+            'pickup_request_id': pending[request].id,
+            'wastepicker_id': wastepickers[wastepicker].id,
+            'distance_km': distance,
+            'cost': cost,
+            'dispatch_run': dispatch_run
+        }
+        for request, wastepicker, distance, cost in zip(
+            plan.request_indices.tolist(), plan.wastepicker_indices.tolist(),
+            plan.distances.tolist(), plan.costs.tolist()
+        )
+    ]
+    db.session.execute(PickupSuggestion.__table__.delete())
+    if suggestions:
+        db.session.execute(PickupSuggestion.__table__.insert(), suggestions)
+    db.session.commit()
+    written = time.perf_counter()
+
+    return {
+        'dispatch_run': dispatch_run,
+        'pending_requests': len(pending),
+        'wastepickers': len(wastepickers),
+        'suggestions': len(suggestions),
+        'timing_ms': {
+            'load': round((loaded - started) * 1000, 1),
+            'solve': round((solved - loaded) * 1000, 1),
+            'write': round((written - solved) * 1000, 1)
+        }
+    }
+
+
+class DispatchScheduler:
+    """Daemon thread running run_dispatch() every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, app) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='dispatch', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, app) -> None:
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.last_run = run_dispatch()
+                    self.last_error = None
+                except Exception as e:
+                    db.session.rollback()
+                    self.last_error = str(e)
@@ -0,0 +1,142 @@
+import math
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Below this distance the equirectangular approximation stays within 0.001% of haversine
+EQUIRECTANGULAR_MAX_KM = 50.0
+
+Coordinates = Union[np.ndarray, Iterable[float]]
+BoundingBox = Tuple[float, float, float, float]
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance in kilometers between two points given in decimal degrees."""
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def as_coordinate_arrays(latitudes: Coordinates, longitudes: Coordinates) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert latitude/longitude sequences into float64 arrays (missing values become NaN)."""
+    lats = np.asarray(latitudes, dtype=np.float64)
+    lons = np.asarray(longitudes, dtype=np.float64)
+    if lats.shape != lons.shape:
+        raise ValueError('latitudes and longitudes must have the same shape')
+    return lats, lons
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> BoundingBox:
+    """
+    Lat/lon box guaranteed to contain every point within radius_km of the origin.
+
+    Returns:
+        (min_lat, max_lat, min_lon, max_lon) in decimal degrees
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat = max(-90.0, latitude - lat_delta)
+    max_lat = min(90.0, latitude + lat_delta)
+
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 89.9:
+        return min_lat, max_lat, -180.0, 180.0
+
+    lon_delta = lat_delta / math.cos(math.radians(widest))
+    return min_lat, max_lat, max(-180.0, longitude - lon_delta), min(180.0, longitude + lon_delta)
+
+
+def within_bounding_box(latitudes: Coordinates, longitudes: Coordinates, box: BoundingBox) -> np.ndarray:
+    """Boolean mask of the points that fall inside a bounding box."""
+    lats, lons = as_coordinate_arrays(latitudes, longitudes)
+    min_lat, max_lat, min_lon, max_lon = box
+    return (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+
+
+def _haversine_arrays(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = np.radians(lat1), np.radians(lon1), np.radians(lat2), np.radians(lon2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _equirectangular_arrays(lat1, lon1, lat2, lon2) -> np.ndarray:
+    x = np.radians(lon2 - lon1) * np.cos(np.radians((lat1 + lat2) / 2))
+    y = np.radians(lat2 - lat1)
+    return EARTH_RADIUS_KM * np.hypot(x, y)
+
+
+def distances_from(latitude: float, longitude: float, latitudes: Coordinates,
+                   longitudes: Coordinates, fast: bool = False) -> np.ndarray:
+    """
+    Distances in kilometers from one origin to N points.
+
+    Args:
+        latitude: Origin latitude in decimal degrees
+        longitude: Origin longitude in decimal degrees
+        latitudes: N point latitudes
+        longitudes: N point longitudes
+        fast: Use the equirectangular approximation (only accurate for short distances)
+
+    Returns:
+        Array of N distances (NaN where a point has no coordinates)
+    """
+    lats, lons = as_coordinate_arrays(latitudes, longitudes)
+    if fast:
+        return _equirectangular_arrays(latitude, longitude, lats, lons)
+    return _haversine_arrays(latitude, longitude, lats, lons)
+
+
+def paired_distances(latitudes1: Coordinates, longitudes1: Coordinates,
+                     latitudes2: Coordinates, longitudes2: Coordinates, fast: bool = False) -> np.ndarray:
+    """Distances in kilometers between the i-th point of the first set and the i-th of the second."""
+    lats1, lons1 = as_coordinate_arrays(latitudes1, longitudes1)
+    lats2, lons2 = as_coordinate_arrays(latitudes2, longitudes2)
+    if fast:
+        return _equirectangular_arrays(lats1, lons1, lats2, lons2)
+    return _haversine_arrays(lats1, lons1, lats2, lons2)
+
+
+def distance_matrix(origin_latitudes: Coordinates, origin_longitudes: Coordinates,
+                    latitudes: Coordinates, longitudes: Coordinates, fast: bool = False) -> np.ndarray:
+    """
+    Distances in kilometers from M origins to N points.
+
+    Returns:
+        (M, N) array where [i, j] is the distance from origin i to point j
+    """
+    origin_lats, origin_lons = as_coordinate_arrays(origin_latitudes, origin_longitudes)
+    lats, lons = as_coordinate_arrays(latitudes, longitudes)
+    origin_lats = origin_lats.reshape(-1, 1)
+    origin_lons = origin_lons.reshape(-1, 1)
+    if fast:
+        return _equirectangular_arrays(origin_lats, origin_lons, lats, lons)
+    return _haversine_arrays(origin_lats, origin_lons, lats, lons)
+
+
+def points_within_radius(latitude: float, longitude: float, latitudes: Coordinates,
+                         longitudes: Coordinates, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the points within a radius of one origin, nearest first.
+
+    Points outside the bounding box are discarded before any trigonometry, and
+    small radii use the equirectangular fast path for the exact check.
+
+    Returns:
+        (indices, distances_km) arrays into the input sequences, sorted by distance
+    """
+    lats, lons = as_coordinate_arrays(latitudes, longitudes)
+    candidates = np.flatnonzero(within_bounding_box(lats, lons, bounding_box(latitude, longitude, radius_km)))
+
+    distances = distances_from(
+        latitude, longitude, lats[candidates], lons[candidates],
+        fast=radius_km <= EQUIRECTANGULAR_MAX_KM
+    )
+    inside = distances <= radius_km
+    candidates, distances = candidates[inside], distances[inside]
+
+    order = np.argsort(distances, kind='stable')
+    return candidates[order], distances[order]
@@ -0,0 +1,130 @@
+import mimetypes
+import os
+import tempfile
+from typing import NamedTuple, Optional
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Without Pillow the original upload is used as-is
+    Image = None
+
+# Longest edge the vision model gets; larger photos only cost payload bytes and tokens
+CLASSIFIER_MAX_EDGE = 1024
+CLASSIFIER_QUALITY = 85
+
+# Longest edge of the history UI thumbnail
+THUMBNAIL_MAX_EDGE = 256
+THUMBNAIL_QUALITY = 75
+
+CLASSIFIER_SUFFIX = '.classify'
+THUMBNAIL_SUFFIX = '.thumb'
+
+
+# Side of the difference hash grid; 8 gives a 64-bit hash
+PERCEPTUAL_HASH_SIZE = 8
+
+
+class PreparedImage(NamedTuple):
+    path: str                       # Image to send to the classifier
+    mime_type: str                  # MIME type of `path`
+    thumbnail_path: Optional[str]   # Small preview for the history UI, if one could be made
+    perceptual_hash: Optional[str] = None  # dHash for near-duplicate lookups, if the image could be decoded
+
+
+def _derivative_format():
+    """WebP when Pillow was built with it, JPEG otherwise."""
+    if features.check('webp'):
+        return 'WEBP', '.webp', 'image/webp'
+    return 'JPEG', '.jpg', 'image/jpeg'
+
+
+def derivative_path(image_path: str, suffix: str) -> str:
+    """Path of a derivative stored next to the original upload."""
+    stem, _ = os.path.splitext(image_path)
+    extension = _derivative_format()[1] if Image is not None else '.jpg'
+    return f'{stem}{suffix}{extension}'
+
+
+def perceptual_hash(image, hash_size: int = PERCEPTUAL_HASH_SIZE) -> str:
+    """
+    Difference hash (dHash) of a decoded Pillow image as a hex string.
+
+    Re-encoded, resized or recompressed copies of the same photo share a dHash,
+    unlike their SHA-256.
+    """
+    pixels = image.convert('L').resize((hash_size + 1, hash_size)).tobytes()
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f'{bits:0{hash_size * hash_size // 4}x}'
+
+
+def prepare_image(image_path: str) -> PreparedImage:
+    """
+    Downscale an upload for classification, make its thumbnail and hash it.
+
+    The original is decoded once, and both derivatives are written next to it
+    and reused on later calls, so repeated scans of a content-addressed upload
+    cost a couple of stat calls. The perceptual hash comes from the same
+    decode; on later calls (byte-identical re-uploads, which the content hash
+    usually answers first) it is taken from the small stored thumbnail
+    rather than by decoding the original again.
+
+    Args:
+        image_path: Path to the original upload
+
+    Returns:
+        PreparedImage with the classifier input, its MIME type, the thumbnail
+        path and the perceptual hash
+    """
+    original_mime = mimetypes.guess_type(image_path)[0] or 'image/jpeg'
+    if Image is None:
+        return PreparedImage(image_path, original_mime, None)
+
+    image_format, _, mime_type = _derivative_format()
+    classifier_path = derivative_path(image_path, CLASSIFIER_SUFFIX)
+    thumbnail_path = derivative_path(image_path, THUMBNAIL_SUFFIX)
+
+    if os.path.exists(classifier_path) and os.path.exists(thumbnail_path):
+        return PreparedImage(classifier_path, mime_type, thumbnail_path, _thumbnail_hash(thumbnail_path))
+
+    try:
+        with Image.open(image_path) as image:
+            # Let the JPEG decoder skip detail we are about to throw away
+            image.draft('RGB', (CLASSIFIER_MAX_EDGE, CLASSIFIER_MAX_EDGE))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+
+            image.thumbnail((CLASSIFIER_MAX_EDGE, CLASSIFIER_MAX_EDGE))
+            _save_atomic(image, classifier_path, image_format, CLASSIFIER_QUALITY)
+
+            image.thumbnail((THUMBNAIL_MAX_EDGE, THUMBNAIL_MAX_EDGE))
+            _save_atomic(image, thumbnail_path, image_format, THUMBNAIL_QUALITY)
+            # Hashed before the lossy encode, which can flip bits between formats
+            image_hash = perceptual_hash(image)
+    except Exception:
+        # Undecodable uploads go to the classifier untouched
+        return PreparedImage(image_path, original_mime, None)
+
+    return PreparedImage(classifier_path, mime_type, thumbnail_path, image_hash)
+
+
+def _thumbnail_hash(thumbnail_path: str) -> Optional[str]:
+    try:
+        with Image.open(thumbnail_path) as thumbnail:
+            return perceptual_hash(thumbnail)
+    except Exception:
+        return None
+
+
+def _save_atomic(image, path: str, image_format: str, quality: int) -> None:
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.derivative-')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            image.save(output, format=image_format, quality=quality)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
@@ -1,15 +1,22 @@
 import os
 import uuid
 import random
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional
 
 class MockAIWasteClassifier:
     """
     Mock AI-powered waste classification service for deployment.
     Provides realistic mock responses without requiring OpenAI API.
+    A configurable latency stands in for the vision API round trip in tests and load runs.
     """
     
-    def __init__(self):
+    def __init__(self, latency: float = 0.0, per_image_latency: float = 0.0):
+        # Seconds each API call sleeps to simulate the real round trip (per-call overhead)
+        self.latency = latency
+        # Additional seconds each image in a call adds on top of the overhead
+        self.per_image_latency = per_image_latency
+        
         # Waste categories and their properties
         self.waste_categories = {
             'plastic': {
@@ -136,6 +143,32 @@ class MockAIWasteClassifier:
         Returns:
             Dictionary containing mock classification results
         """
+        return self.classify_batch([image_path])[0]
+    
+    def classify_batch(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Mock classify several images in one simulated API call.
+        
+        The call costs `latency` once plus `per_image_latency` for every image,
+        so the gain from batching can be measured offline.
+        
+        Args:
+            image_paths: Paths to the waste image files
+            
+        Returns:
+            List of mock classification results in the same order as image_paths
+        """
+        if not image_paths:
+            return []
+        
+        delay = self.latency + self.per_image_latency * len(image_paths)
+        if delay > 0:
+            time.sleep(delay)
+        
+        return [self._mock_classification() for _ in image_paths]
+    
+    def _mock_classification(self) -> Dict[str, Any]:
+        """Build one random mock classification result."""
         try:
             # Select a random mock result
             classification_result = random.choice(self.mock_results).copy()
@@ -263,20 +296,7 @@ class MockAIWasteClassifier:
 
 # Utility functions for the service
 def save_uploaded_image(image_file, upload_dir: str = '/tmp/uploads') -> str:
-    """Save uploaded image file and return the path."""
-    import os
-    import uuid
-    from werkzeug.utils import secure_filename
-    
-    # Create upload directory if it doesn't exist
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    filename = secure_filename(image_file.filename)
-    unique_filename = f"{uuid.uuid4()}_{filename}"
-    file_path = os.path.join(upload_dir, unique_filename)
-    
-    # Save the file
-    image_file.save(file_path)
+    """Save uploaded image file under its content hash and return the path."""
+    from src.services.uploads import store_upload
     
-    return file_path
\ No newline at end of file
+    return store_upload(image_file, upload_dir).path
@@ -0,0 +1,161 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DateTime, String, literal, tuple_
+from sqlalchemy.types import TypeDecorator
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class _CursorTimestamp(TypeDecorator):
+    """
+    Binds a cursor's timestamp in the form the sort column stores it.
+
+    SQLite keeps DateTime values as text. Rows defaulted by CURRENT_TIMESTAMP
+    hold 'YYYY-MM-DD HH:MM:SS', but SQLAlchemy binds a datetime as
+    '... HH:MM:SS.000000', which compares greater than every row of that
+    second. Other backends get a real timestamp parameter.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'sqlite':
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(DateTime())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'sqlite':
+            return value
+        return value.isoformat(' ', 'microseconds' if value.microsecond else 'seconds')
+
+
+class KeysetPage(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def encode_cursor(created_at: datetime, row_id: int, direction: str = 'next') -> str:
+    """Opaque, URL-safe token pointing just past (created_at, id) in the given direction."""
+    payload = json.dumps([created_at.isoformat(), row_id, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        InvalidCursor: If the token was not produced by encode_cursor
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return datetime.fromisoformat(created_at), int(row_id), direction
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid pagination cursor') from e
+
+
+def keyset_query(query, created_column, id_column, per_page: int, cursor: Optional[str] = None):
+    """
+    The statement keyset_page runs: rows past the cursor in its direction, plus one.
+
+    Args:
+        query: Filtered SQLAlchemy query, without ordering or limits
+        created_column: Timestamp column of the sort key
+        id_column: Primary key column breaking ties between equal timestamps
+        per_page: Maximum rows per page
+        cursor: Token from a previous page; None or empty for the first page
+
+    Returns:
+        (query, direction), direction being 'next' (newest first) or 'prev' (oldest first)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    sort_key = tuple_(created_column, id_column)
+
+    direction = 'next'
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+        cursor_key = tuple_(literal(created_at, _CursorTimestamp()), literal(row_id, id_column.type))
+        if direction == 'next':
+            query = query.filter(sort_key < cursor_key)
+        else:
+            query = query.filter(sort_key > cursor_key)
+
+    if direction == 'next':
+        query = query.order_by(created_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_column.asc(), id_column.asc())
+    return query.limit(per_page + 1), direction
+
+
+def keyset_page(query, created_column, id_column, per_page: int, cursor: Optional[str] = None,
+                key: Optional[Callable[[Any], Tuple[datetime, int]]] = None) -> KeysetPage:
+    """
+    Fetch one newest-first page of `query` ordered by (created_at, id).
+
+    Each page is a range scan on a (..., created_at, id) index starting at the
+    cursor, so it costs the same however deep the client has scrolled and
+    needs no COUNT(*).
+
+    Args:
+        query: Filtered SQLAlchemy query, without ordering or limits
+        created_column: Timestamp column of the sort key
+        id_column: Primary key column breaking ties between equal timestamps
+        per_page: Maximum rows per page
+        cursor: Token from a previous page's next_cursor/prev_cursor; None for the first page
+        key: Returns (created_at, id) for a result row; defaults to attribute access
+
+    Returns:
+        KeysetPage with the rows and the cursors of the neighbouring pages
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    key = key or (lambda row: (getattr(row, created_column.key), getattr(row, id_column.key)))
+    page_query, direction = keyset_query(query, created_column, id_column, per_page, cursor)
+    rows = page_query.all()
+    more = len(rows) > per_page
+
+    if direction == 'next':
+        rows = rows[:per_page]
+        has_next, has_prev = more, bool(cursor)
+    else:
+        # Walked backwards from the cursor, so restore newest-first order
+        rows = list(reversed(rows[:per_page]))
+        has_next, has_prev = True, more
+
+    next_cursor = encode_cursor(*key(rows[-1]), 'next') if rows and has_next else None
+    prev_cursor = encode_cursor(*key(rows[0]), 'prev') if rows and has_prev else None
+    return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+def keyset_pagination(page: KeysetPage, per_page: int, total: Optional[int] = None) -> Dict[str, Any]:
+    """Pagination block for cursor-mode responses."""
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': page.next_cursor,
+        'prev_cursor': page.prev_cursor,
+        'has_next': page.has_next,
+        'has_prev': page.has_prev
+    }
+    if total is not None:
+        pagination['total'] = total
+    return pagination
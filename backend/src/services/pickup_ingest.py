@@ -0,0 +1,276 @@
+import codecs
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from src.models.user import db, User
+from src.models.pickup_request import PickupRequest
+from src.services.pubsub import pickup_feed
+
+# Rows validated and inserted per transaction
+BULK_CHUNK_SIZE = 500
+
+# Bytes read from the request body per iteration
+READ_CHUNK_BYTES = 64 * 1024
+
+# Largest bulk body accepted. It is read in READ_CHUNK_BYTES pieces and
+# inserted BULK_CHUNK_SIZE rows at a time, so this bounds the work per
+# request rather than memory; it replaces the app-wide MAX_CONTENT_LENGTH
+BULK_MAX_BYTES = int(os.getenv('BULK_MAX_BYTES', 256 * 1024 * 1024))
+
+REQUIRED_FIELDS = ('requester_id', 'pickup_address', 'pickup_latitude', 'pickup_longitude')
+OPTIONAL_FIELDS = (
+    'waste_description', 'waste_category', 'estimated_weight', 'pickup_date',
+    'special_instructions', 'payment_amount'
+)
+
+
+class MalformedRow(NamedTuple):
+    """An input row that could not be decoded as JSON."""
+    error: str
+
+
+class _TextBuffer:
+    """Incrementally decoded UTF-8 text read from a binary stream."""
+
+    def __init__(self, stream, read_size: int):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        chunk = self.stream.read(self.read_size)
+        self.eof = not chunk
+        self.text = self.text[self.position:] + self.decoder.decode(chunk, final=self.eof)
+        self.position = 0
+
+    def next_char(self) -> str:
+        """First non-whitespace character at the read position, or '' at the end of the stream."""
+        while True:
+            while self.position < len(self.text) and self.text[self.position] in ' \t\r\n':
+                self.position += 1
+            if self.position < len(self.text) or self.eof:
+                return self.text[self.position:self.position + 1]
+            self.fill()
+
+
+def iter_json_array(stream, read_size: int = READ_CHUNK_BYTES) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array as they are read from a binary stream.
+
+    Only the element being decoded is held in memory. The opening bracket is
+    checked before this returns.
+
+    Raises:
+        ValueError: If the body is not a JSON array; once iterating, if it is malformed
+    """
+    buffer = _TextBuffer(stream, read_size)
+    decoder = json.JSONDecoder()
+    if buffer.next_char() != '[':
+        raise ValueError('Body must be a JSON array')
+    buffer.position += 1
+
+    def elements():
+        if buffer.next_char() == ']':
+            return
+        while True:
+            buffer.next_char()
+            try:
+                value, end = decoder.raw_decode(buffer.text, buffer.position)
+                # A number cut at the chunk boundary still decodes, so the value
+                # only counts once a separator is in the buffer after it
+                complete = buffer.eof or buffer.text[end:].lstrip()[:1] in (',', ']')
+            except json.JSONDecodeError as e:
+                if buffer.eof:
+                    raise ValueError(f'Malformed JSON array: {e.msg}')
+                complete = False
+            if not complete:
+                buffer.fill()
+                continue
+            buffer.position = end
+            yield value
+
+            separator = buffer.next_char()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError("Malformed JSON array: expected ',' or ']'")
+            buffer.position += 1
+
+    return elements()
+
+
+def _lines(stream, read_size: int) -> Iterator[bytes]:
+    # Request streams are unbuffered, so iterating them directly reads byte by byte
+    remainder = b''
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        *lines, remainder = (remainder + chunk).split(b'\n')
+        yield from lines
+    yield remainder
+
+
+def iter_ndjson(stream, read_size: int = READ_CHUNK_BYTES) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line, or MalformedRow for lines that are not JSON."""
+    for line in _lines(stream, read_size):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield MalformedRow(f'Invalid JSON: {e}')
+
+
+def _number(data: Dict[str, Any], field: str, low: float = -math.inf, high: float = math.inf) -> Optional[float]:
+    value = data.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise ValueError(f'Invalid {field}')
+    return float(value)
+
+
+def parse_pickup_row(data: Any) -> Dict[str, Any]:
+    """
+    Validate one bulk row and turn it into pickup_requests column values.
+
+    Raises:
+        ValueError: With the message reported for the row
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Row must be a JSON object')
+    for field in REQUIRED_FIELDS:
+        if data.get(field) is None:
+            raise ValueError(f'Missing required field: {field}')
+
+    requester_id = data['requester_id']
+    if isinstance(requester_id, bool) or not isinstance(requester_id, int):
+        raise ValueError('Invalid requester_id')
+    address = data['pickup_address']
+    if not isinstance(address, str) or not address.strip() or len(address) > 300:
+        raise ValueError('Invalid pickup_address')
+
+    pickup_date = None
+    if data.get('pickup_date') is not None:
+        try:
+            pickup_date = datetime.fromisoformat(str(data['pickup_date']).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError('Invalid pickup_date format. Use ISO format.')
+
+    row = {field: data.get(field) for field in OPTIONAL_FIELDS}
+    row.update(
+        requester_id=requester_id,
+        pickup_address=address,
+        pickup_latitude=_number(data, 'pickup_latitude', -90, 90),
+        pickup_longitude=_number(data, 'pickup_longitude', -180, 180),
+        estimated_weight=_number(data, 'estimated_weight', 0),
+        payment_amount=_number(data, 'payment_amount', 0),
+        pickup_date=pickup_date,
+        status='pending'
+    )
+    return row
+
+
+def _insert_chunk(chunk: List[Dict[str, Any]], known_requesters: set) -> Iterator[Dict[str, Any]]:
+    """Insert one chunk of parsed rows in a single transaction and yield their results in order."""
+    valid = None
+    ids = {}
+    error = None
+    try:
+        missing = {row['requester_id'] for _, row in chunk} - known_requesters
+        if missing:
+            known_requesters.update(db.session.scalars(db.select(User.id).where(User.id.in_(missing))))
+
+        valid = [(index, row) for index, row in chunk if row['requester_id'] in known_requesters]
+        if valid:
+            table = PickupRequest.__table__
+            inserted = db.session.execute(
+                table.insert().returning(table.c.id, sort_by_parameter_order=True),
+                [row for _, row in valid]
+            ).scalars().all()
+            db.session.commit()
+            ids = {index: pickup_id for (index, _), pickup_id in zip(valid, inserted)}
+    except Exception as e:
+        # Only this chunk fails; earlier chunks are committed and later ones still run
+        db.session.rollback()
+        error = str(e)
+
+    for index, row in chunk:
+        if index in ids:
+            pickup_feed.publish('created', dict(
+                row, id=ids[index], pickup_date=row['pickup_date'].isoformat() if row['pickup_date'] else None
+            ), row['pickup_latitude'], row['pickup_longitude'])
+            yield {'index': index, 'success': True, 'id': ids[index]}
+        elif valid is not None and row['requester_id'] not in known_requesters:
+            yield {'index': index, 'success': False, 'error': 'Requester not found'}
+        else:
+            yield {'index': index, 'success': False, 'error': error}
+
+
+def ingest_pickup_requests(rows: Iterable[Any], chunk_size: int = BULK_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Validate and insert pickup requests from an iterable of decoded rows.
+
+    Rows are consumed lazily and inserted chunk_size at a time with one
+    multi-row INSERT and commit per chunk, so memory stays bounded by the
+    chunk however long the input is. Chunks commit independently: a failure
+    reported for one row never undoes rows already reported as created.
+    A database error fails only the rows of its chunk, and an error reading
+    rows (a malformed body, one over the size limit) is reported at the index
+    it stopped at before the rows read so far are flushed.
+
+    Yields:
+        One result per input row, in input order: {'index', 'success', 'id'}
+        or {'index', 'success', 'error'}; then a final {'summary': {...}}
+    """
+    started = time.perf_counter()
+    known_requesters: set = set()
+    counts = {'received': 0, 'created': 0, 'failed': 0}
+    chunk: List = []
+    pending_errors: List[Dict[str, Any]] = []
+
+    def flush():
+        for result in sorted(list(_insert_chunk(chunk, known_requesters)) + pending_errors,
+                             key=lambda result: result['index']):
+            counts['created' if result['success'] else 'failed'] += 1
+            yield result
+        chunk.clear()
+        pending_errors.clear()
+
+    index = 0
+    iterator = iter(rows)
+    while True:
+        try:
+            data = next(iterator)
+        except StopIteration:
+            break
+        except Exception as e:
+            # The rest of the body cannot be read: it is malformed, over the
+            # size limit or the client went away. Rows before it still count.
+            pending_errors.append({'index': index, 'success': False, 'error': str(e)})
+            counts['received'] += 1
+            break
+
+        counts['received'] += 1
+        if isinstance(data, MalformedRow):
+            pending_errors.append({'index': index, 'success': False, 'error': data.error})
+        else:
+            try:
+                chunk.append((index, parse_pickup_row(data)))
+            except ValueError as e:
+                pending_errors.append({'index': index, 'success': False, 'error': str(e)})
+        index += 1
+
+        if len(chunk) + len(pending_errors) >= chunk_size:
+            yield from flush()
+
+    yield from flush()
+    yield {'summary': dict(counts, elapsed_ms=round((time.perf_counter() - started) * 1000, 2))}
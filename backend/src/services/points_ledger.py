@@ -0,0 +1,144 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.models.user import db, User, PointsLedgerEntry
+
+# Points credited per kg of completed pickup weight
+POINTS_PER_KG = 10
+
+# Ledger entries folded into user totals per transaction
+APPLY_BATCH_SIZE = 1000
+
+
+def unapplied_entries_query(batch_size: int = APPLY_BATCH_SIZE):
+    """SELECT of the oldest batch_size unapplied ledger entries."""
+    ledger = PointsLedgerEntry.__table__
+    return (
+        db.select(ledger.c.id, ledger.c.user_id, ledger.c.points, ledger.c.recycled_weight)
+        .where(ledger.c.applied.is_(False))
+        .order_by(ledger.c.id)
+        .limit(batch_size)
+    )
+
+
+def apply_points_ledger(batch_size: int = APPLY_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Fold unapplied ledger entries into User.points and User.total_recycled_weight.
+
+    Each batch takes the oldest unapplied entries, marks them applied and adds
+    their per-user sums to the user rows in the same transaction, so a user's
+    folded total plus unapplied entries never changes from a reader's point of
+    view. If another applier marked some of the batch first, it is rolled back
+    and retried.
+
+    Args:
+        batch_size: Entries per transaction
+
+    Returns:
+        Counts of entries applied, user rows updated and batches committed
+    """
+    ledger = PointsLedgerEntry.__table__
+    users = User.__table__
+    summary = {'entries': 0, 'users': 0, 'batches': 0}
+
+    while True:
+        entries = db.session.execute(unapplied_entries_query(batch_size)).all()
+        if not entries:
+            break
+
+        totals: Dict[int, Dict[str, Any]] = {}
+        for entry in entries:
+            user_totals = totals.setdefault(entry.user_id, {'user': entry.user_id, 'points': 0, 'weight': 0.0})
+            user_totals['points'] += entry.points
+            user_totals['weight'] += entry.recycled_weight
+
+        ids = [entry.id for entry in entries]
+        marked = db.session.execute(
+            ledger.update()
+            .where(ledger.c.id.in_(ids), ledger.c.applied.is_(False))
+            .values(applied=True)
+        ).rowcount
+        if marked != len(ids):
+            db.session.rollback()
+            continue
+
+        db.session.execute(
+            users.update()
+            .where(users.c.id == db.bindparam('user'))
+            .values(
+                points=db.func.coalesce(users.c.points, 0) + db.bindparam('points'),
+                total_recycled_weight=db.func.coalesce(users.c.total_recycled_weight, 0.0) + db.bindparam('weight')
+            ),
+            list(totals.values())
+        )
+        db.session.commit()
+
+        summary['entries'] += len(ids)
+        summary['users'] += len(totals)
+        summary['batches'] += 1
+
+    return summary
+
+
+def record_completions(completions: Iterable[Tuple[int, int, float]]) -> int:
+    """
+    Credit requesters for completed pickups with one ledger entry per requester.
+
+    Points are rounded per pickup, as for a single completion, before being
+    summed. Call before committing the status change.
+
+    Args:
+        completions: (requester_id, pickup_request_id, estimated_weight) per completed pickup
+
+    Returns:
+        Number of ledger entries written
+    """
+    totals: Dict[int, Dict[str, Any]] = {}
+    for requester_id, pickup_request_id, estimated_weight in completions:
+        if not estimated_weight:
+            continue
+        entry = totals.setdefault(requester_id, {
+            'user_id': requester_id, 'pickup_request_id': pickup_request_id,
+            'points': 0, 'recycled_weight': 0.0, 'applied': False
+        })
+        if entry['pickup_request_id'] != pickup_request_id:
+            # The entry covers several pickups
+            entry['pickup_request_id'] = None
+        entry['points'] += int(estimated_weight * POINTS_PER_KG)
+        entry['recycled_weight'] += estimated_weight
+
+    if totals:
+        db.session.execute(PointsLedgerEntry.__table__.insert(), list(totals.values()))
+    return len(totals)
+
+
+class PointsLedgerApplier:
+    """Daemon thread running apply_points_ledger() every `interval` seconds."""
+
+    def __init__(self, interval: float, batch_size: int = APPLY_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_run: Optional[Dict[str, int]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, app) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='points-ledger', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, app) -> None:
+        while not self._stop.wait(self.interval):
+            with app.app_context():
+                try:
+                    self.last_run = apply_points_ledger(self.batch_size)
+                    self.last_error = None
+                except Exception as e:
+                    db.session.rollback()
+                    self.last_error = str(e)
+
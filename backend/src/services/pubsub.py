@@ -0,0 +1,130 @@
+import itertools
+import math
+import queue
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.services import geo
+
+# Events a subscriber can fall behind by before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """One listener for events within radius_km of a point."""
+
+    def __init__(self, subscription_id: int, latitude: float, longitude: float, radius_km: float):
+        self.id = subscription_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_km = radius_km
+        self.cells: Tuple[Tuple[int, int], ...] = ()
+        self.dropped = 0
+        self._events: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        """Queue an event without blocking the publisher, dropping the oldest one if full."""
+        while True:
+            try:
+                self._events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def next_event(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait up to timeout seconds for the next event; None if there was none."""
+        try:
+            return self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class GeoPubSub:
+    """
+    In-process publish/subscribe keyed by lat/lon grid cell.
+
+    A subscription is registered in every cell its radius' bounding box
+    touches, so a publish only looks at the subscribers of the event's own
+    cell and checks their exact radius; subscribers elsewhere cost nothing.
+    Events are only seen by subscribers connected to the same process.
+    """
+
+    def __init__(self, cell_size: float = 0.25):
+        # Cell size in degrees (0.25 degrees is roughly 28km north-south)
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._event_ids = itertools.count(1)
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def subscribe(self, latitude: float, longitude: float, radius_km: float) -> Subscription:
+        subscription = Subscription(next(self._ids), latitude, longitude, radius_km)
+        min_lat, max_lat, min_lon, max_lon = geo.bounding_box(latitude, longitude, radius_km)
+        (min_row, min_col), (max_row, max_col) = self._cell_of(min_lat, min_lon), self._cell_of(max_lat, max_lon)
+        subscription.cells = tuple(
+            (row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)
+        )
+        with self._lock:
+            for cell in subscription.cells:
+                self._cells.setdefault(cell, set()).add(subscription)
+            self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if not subscription.cells:
+                return
+            for cell in subscription.cells:
+                members = self._cells.get(cell)
+                if members is not None:
+                    members.discard(subscription)
+                    if not members:
+                        del self._cells[cell]
+            subscription.cells = ()
+            self.subscribers -= 1
+
+    def publish(self, event_type: str, data: Dict[str, Any], latitude: float, longitude: float) -> int:
+        """
+        Send an event located at (latitude, longitude) to every subscriber in range.
+
+        Returns:
+            Number of subscribers it was delivered to
+        """
+        event = {'id': next(self._event_ids), 'event': event_type, 'data': data}
+        with self._lock:
+            candidates = list(self._cells.get(self._cell_of(latitude, longitude), ()))
+
+        delivered = 0
+        for subscription in candidates:
+            if geo.haversine(latitude, longitude, subscription.latitude, subscription.longitude) <= subscription.radius_km:
+                subscription.deliver(event)
+                delivered += 1
+
+        with self._lock:
+            self.published += 1
+            self.delivered += delivered
+        return delivered
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'cell_size': self.cell_size,
+                'subscribers': self.subscribers,
+                'cells': len(self._cells),
+                'published': self.published,
+                'delivered': self.delivered
+            }
+
+
+# Feed of pickup requests created or changing status
+pickup_feed = GeoPubSub()
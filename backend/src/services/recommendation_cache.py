@@ -0,0 +1,157 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.models.user import db
+from src.models.recycling_center import RecyclingCenter, RecyclingCenterMaterial
+from src.services import geo
+from src.services.cache import LRUCache
+from src.services.spatial_index import center_index
+
+# Half the earth's circumference: a search this wide covers every center
+MAX_SEARCH_RADIUS_KM = 20040.0
+
+
+class RecommendationCache:
+    """
+    Caches the candidate recycling centers for (material, location cell) pairs.
+
+    For every cell the cache stores each center that can be the closest one for
+    some point inside the cell: anything within the cell's nearest-center distance
+    plus the cell diagonal of its middle. A lookup then only ranks these few
+    candidates against the exact user location instead of scanning every center.
+    The cache is cleared whenever the center index sees a recycling center
+    created, updated or soft-deleted, including the bulk updates and other
+    workers' writes it picks up every refresh_seconds.
+    """
+
+    def __init__(self, cell_size: float = 0.05, search_radius_km: float = 25.0, maxsize: int = 4096):
+        # Cell size in degrees (0.05 degrees is roughly 5.5km north-south)
+        self.cell_size = cell_size
+        # First radius searched for a center accepting the material, widened until one is found
+        self.search_radius_km = search_radius_km
+        self._cache = LRUCache(maxsize=maxsize)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.invalidations = 0
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def recommend(self, material_category: str, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+        """
+        Find the closest active center accepting a material.
+
+        Args:
+            material_category: Material category from the classifier
+            latitude: User latitude in decimal degrees
+            longitude: User longitude in decimal degrees
+
+        Returns:
+            Recommended center summary with its distance, or None if no center accepts the material
+        """
+        # Hits check the index too, so changes it only notices on refresh
+        # (bulk updates, other workers) clear the cache through its callback
+        center_index.ensure_loaded()
+        material = (material_category or '').strip().lower()
+        key = (material, self._cell_of(latitude, longitude))
+
+        candidates = self._cache.get(key)
+        if candidates is None:
+            generation = self._generation
+            candidates = self._load_candidates(material, key[1])
+            with self._lock:
+                # Skip storing results computed from data that changed mid-lookup
+                if generation == self._generation:
+                    self._cache.set(key, candidates)
+
+        if not candidates:
+            return None
+
+        distances = geo.distances_from(
+            latitude, longitude,
+            [candidate['latitude'] for candidate in candidates],
+            [candidate['longitude'] for candidate in candidates]
+        )
+        closest_index = int(distances.argmin())
+        closest = candidates[closest_index]
+        return {
+            'id': closest['id'],
+            'name': closest['name'],
+            'address': closest['address'],
+            'distance': round(float(distances[closest_index]), 1),
+            'phone': closest['phone'],
+            'operating_hours': closest['operating_hours']
+        }
+
+    @staticmethod
+    def _accepting(material: str, nearby: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
+        """The (center_id, distance_km) pairs of nearby whose center accepts the material, in order."""
+        if not nearby:
+            return []
+        accepting = {
+            center_id for (center_id,) in db.session.query(RecyclingCenterMaterial.center_id).filter(
+                RecyclingCenterMaterial.material == material,
+                RecyclingCenterMaterial.center_id.in_([center_id for center_id, _ in nearby])
+            )
+        }
+        return [(center_id, distance) for center_id, distance in nearby if center_id in accepting]
+
+    def _load_candidates(self, material: str, cell: Tuple[int, int]) -> List[Dict[str, Any]]:
+        cell_latitude = (cell[0] + 0.5) * self.cell_size
+        cell_longitude = (cell[1] + 0.5) * self.cell_size
+
+        # Widen the search around the cell until a center accepting the material turns
+        # up, only ever asking the database about the centers inside the search area
+        radius_km = self.search_radius_km
+        while True:
+            suitable = self._accepting(material, center_index.within_radius(cell_latitude, cell_longitude, radius_km))
+            if suitable:
+                break
+            if radius_km >= MAX_SEARCH_RADIUS_KM:
+                return []
+            radius_km = min(radius_km * 4, MAX_SEARCH_RADIUS_KM)
+
+        # Any point in the cell is within half a diagonal of its middle, so its closest
+        # center is at most (nearest distance + full diagonal) away from the middle
+        equatorward = min(abs(cell[0]), abs(cell[0] + 1)) * self.cell_size
+        height_km = self.cell_size * geo.KM_PER_DEGREE
+        width_km = height_km * math.cos(math.radians(equatorward))
+        reach_km = suitable[0][1] + math.hypot(height_km, width_km)
+        if reach_km > radius_km:
+            suitable = self._accepting(material, center_index.within_radius(cell_latitude, cell_longitude, reach_km))
+
+        # Every center in reach is kept: any of them can be the closest for some point in the cell
+        candidate_ids = [center_id for center_id, distance in suitable if distance <= reach_km]
+        centers = RecyclingCenter.query.filter(RecyclingCenter.id.in_(candidate_ids)).all()
+        return [
+            {
+                'id': center.id,
+                'name': center.name,
+                'address': center.address,
+                'phone': center.phone,
+                'operating_hours': center.operating_hours,
+                'latitude': center.latitude,
+                'longitude': center.longitude
+            }
+            for center in centers
+        ]
+
+    def invalidate(self) -> None:
+        """Drop every cached recommendation."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            'invalidations': self.invalidations,
+            'cell_size': self.cell_size,
+            'search_radius_km': self.search_radius_km
+        }
+
+
+recommendation_cache = RecommendationCache()
+center_index.subscribe(recommendation_cache.invalidate)
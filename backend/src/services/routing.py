@@ -0,0 +1,180 @@
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Assumed average driving speed between stops
+AVERAGE_SPEED_KMH = 25.0
+
+# Time spent at each stop loading the waste
+SERVICE_MINUTES = 10.0
+
+# A pickup_date is treated as a window this many minutes either side of it
+PICKUP_WINDOW_MINUTES = 60.0
+
+# Each minute of arriving after a window closes costs this many minutes of route time
+LATE_PENALTY = 10.0
+
+# Default wall-clock budget for the improvement phase
+ROUTE_TIME_BUDGET_MS = 200
+
+# Longest segment Or-opt tries to move
+OR_OPT_MAX_SEGMENT = 3
+
+Window = Optional[Tuple[float, float]]  # (earliest, latest) arrival in minutes from departure
+
+
+class RoutePlan(NamedTuple):
+    order: List[int]              # Stops in visiting order, as indices into the input points
+    arrivals: List[float]         # Minutes from departure at which each stop is reached
+    late_minutes: List[float]     # Minutes after its window each stop is reached
+    distance_km: float
+    duration_minutes: float       # Until the last stop is finished, including waits
+    initial_distance_km: float    # Of the nearest-neighbour route before improvement
+    improvement_passes: int
+
+
+class _Evaluator:
+    """Scores visiting orders of stops 1..n from the start point 0."""
+
+    def __init__(self, distances: Sequence[Sequence[float]], windows: Sequence[Window],
+                 speed_kmh: float, service_minutes: float):
+        self.distances = distances
+        self.windows = windows
+        self.minutes_per_km = 60.0 / speed_kmh
+        self.service_minutes = service_minutes
+        self.has_windows = any(window is not None for window in windows)
+
+    def distance(self, route: List[int]) -> float:
+        distances = self.distances
+        total = 0.0
+        previous = 0
+        for stop in route:
+            total += distances[previous][stop]
+            previous = stop
+        return total
+
+    def cost(self, route: List[int]) -> float:
+        """Route duration plus the lateness penalty; travel distance alone when there are no windows."""
+        if not self.has_windows:
+            return self.distance(route)
+        return self.schedule(route)[0]
+
+    def schedule(self, route: List[int]) -> Tuple[float, List[float], List[float], float]:
+        distances, windows = self.distances, self.windows
+        clock = 0.0
+        late_total = 0.0
+        arrivals, lateness = [], []
+        previous = 0
+        for stop in route:
+            clock += distances[previous][stop] * self.minutes_per_km
+            window = windows[stop]
+            late = 0.0
+            if window is not None:
+                earliest, latest = window
+                if clock < earliest:
+                    clock = earliest
+                elif clock > latest:
+                    late = clock - latest
+            arrivals.append(clock)
+            lateness.append(late)
+            late_total += late
+            clock += self.service_minutes
+            previous = stop
+        return clock + LATE_PENALTY * late_total, arrivals, lateness, clock
+
+
+def nearest_neighbour_route(distances: Sequence[Sequence[float]]) -> List[int]:
+    """Visit the closest unvisited stop next, starting from point 0."""
+    unvisited = set(range(1, len(distances)))
+    route = []
+    current = 0
+    while unvisited:
+        row = distances[current]
+        current = min(unvisited, key=row.__getitem__)
+        unvisited.remove(current)
+        route.append(current)
+    return route
+
+
+def _two_opt_pass(route: List[int], cost: float, evaluator: _Evaluator, deadline: float) -> Tuple[List[int], float]:
+    """Reverse route[i:j + 1] wherever that lowers the cost."""
+    for i in range(len(route) - 1):
+        if time.perf_counter() > deadline:
+            break
+        for j in range(i + 1, len(route)):
+            candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+            candidate_cost = evaluator.cost(candidate)
+            if candidate_cost < cost - 1e-9:
+                route, cost = candidate, candidate_cost
+    return route, cost
+
+
+def _or_opt_pass(route: List[int], cost: float, evaluator: _Evaluator, deadline: float) -> Tuple[List[int], float]:
+    """Move runs of up to OR_OPT_MAX_SEGMENT stops elsewhere in the route wherever that lowers the cost."""
+    for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+        for i in range(len(route) - length + 1):
+            if time.perf_counter() > deadline:
+                return route, cost
+            segment = route[i:i + length]
+            rest = route[:i] + route[i + length:]
+            for position in range(len(rest) + 1):
+                if position == i:
+                    continue
+                candidate = rest[:position] + segment + rest[position:]
+                candidate_cost = evaluator.cost(candidate)
+                if candidate_cost < cost - 1e-9:
+                    route, cost = candidate, candidate_cost
+                    break
+    return route, cost
+
+
+def plan_route(distances: Sequence[Sequence[float]], windows: Optional[Sequence[Window]] = None,
+               time_budget_ms: float = ROUTE_TIME_BUDGET_MS, speed_kmh: float = AVERAGE_SPEED_KMH,
+               service_minutes: float = SERVICE_MINUTES) -> RoutePlan:
+    """
+    Order the stops of an open route starting at point 0.
+
+    Builds a nearest-neighbour route, then alternates 2-opt and Or-opt passes
+    until neither improves it or the time budget runs out. Without windows the
+    objective is travel distance; with them it is the time until the last
+    stop is done, waiting for windows to open included, plus LATE_PENALTY
+    times the minutes stops are reached after their window closes.
+
+    Args:
+        distances: (n + 1) x (n + 1) symmetric distances in km; row/column 0 is the start
+        windows: Per point (earliest, latest) arrival minutes from departure, or None
+        time_budget_ms: Wall-clock limit for the improvement phase
+        speed_kmh: Driving speed used to turn distances into minutes
+        service_minutes: Time spent at each stop
+
+    Returns:
+        RoutePlan over points 1..n
+    """
+    distances = [list(row) for row in distances]
+    windows = list(windows) if windows is not None else [None] * len(distances)
+    evaluator = _Evaluator(distances, windows, speed_kmh, service_minutes)
+
+    route = nearest_neighbour_route(distances)
+    initial_distance = evaluator.distance(route)
+    cost = evaluator.cost(route)
+
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    passes = 0
+    # The route is open, so even two stops can be worth swapping
+    while len(route) > 1 and time.perf_counter() < deadline:
+        passes += 1
+        previous_cost = cost
+        route, cost = _two_opt_pass(route, cost, evaluator, deadline)
+        route, cost = _or_opt_pass(route, cost, evaluator, deadline)
+        if cost >= previous_cost - 1e-9:
+            break
+
+    _, arrivals, lateness, duration = evaluator.schedule(route)
+    return RoutePlan(
+        order=route,
+        arrivals=arrivals,
+        late_minutes=lateness,
+        distance_km=evaluator.distance(route),
+        duration_minutes=duration,
+        initial_distance_km=initial_distance,
+        improvement_passes=passes
+    )
@@ -0,0 +1,346 @@
+import heapq
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.user import db
+from src.models.recycling_center import RecyclingCenter
+from src.services.geo import KM_PER_DEGREE, bounding_box, haversine
+
+
+class GeoGridIndex:
+    """
+    In-memory spatial index bucketing points into a uniform latitude/longitude grid.
+
+    Radius and k-nearest queries only visit the cells overlapping the search area,
+    so their cost grows with the number of nearby points rather than the total
+    number of indexed points.
+    """
+
+    def __init__(self, cell_size: float = 0.25):
+        # Cell size in degrees (0.25 degrees is roughly 28km north-south)
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+        # (min_row, max_row, min_col, max_col) of the occupied cells; None when
+        # empty or when a removal may have shrunk it and it must be recomputed
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def insert(self, key: Hashable, latitude: float, longitude: float) -> None:
+        """Add a point, replacing any previous position stored under the same key."""
+        self.remove(key)
+        row, col = cell = self._cell_of(latitude, longitude)
+        self._points[key] = (latitude, longitude)
+        self._cells.setdefault(cell, {})[key] = (latitude, longitude)
+        if self._bounds is not None:
+            min_row, max_row, min_col, max_col = self._bounds
+            self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+        elif len(self._cells) == 1:
+            self._bounds = (row, row, col, col)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a point if present."""
+        position = self._points.pop(key, None)
+        if position is None:
+            return
+        cell = self._cell_of(*position)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+                if self._bounds is not None and (cell[0] in self._bounds[:2] or cell[1] in self._bounds[2:]):
+                    self._bounds = None
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._points.clear()
+        self._bounds = None
+
+    def _occupied_bounds(self) -> Tuple[int, int, int, int]:
+        """Row and column range of the occupied cells, recomputed only after a boundary cell emptied."""
+        if self._bounds is None:
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        return self._bounds
+
+    def _cells_in_box(self, min_lat: float, max_lat: float,
+                      min_lon: float, max_lon: float) -> Iterable[Dict[Hashable, Tuple[float, float]]]:
+        """Yield the non-empty cell buckets overlapping a lat/lon box."""
+        min_row, min_col = self._cell_of(min_lat, min_lon)
+        max_row, max_col = self._cell_of(max_lat, max_lon)
+        box_cells = (max_row - min_row + 1) * (max_col - min_col + 1)
+
+        # A huge box over a sparse grid is cheaper to answer from the occupied cells
+        if box_cells > len(self._cells):
+            for (row, col), bucket in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield bucket
+            return
+
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                bucket = self._cells.get((row, col))
+                if bucket:
+                    yield bucket
+
+    def within_radius(self, latitude: float, longitude: float,
+                      radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        Find all points within a radius.
+
+        Args:
+            latitude: Query latitude in decimal degrees
+            longitude: Query longitude in decimal degrees
+            radius_km: Search radius in kilometers
+
+        Returns:
+            List of (key, distance_km) tuples sorted nearest first
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+
+        results = []
+        for bucket in self._cells_in_box(min_lat, max_lat, min_lon, max_lon):
+            for key, (lat, lon) in bucket.items():
+                distance = haversine(latitude, longitude, lat, lon)
+                if distance <= radius_km:
+                    results.append((key, distance))
+
+        results.sort(key=lambda item: item[1])
+        return results
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1,
+                max_distance_km: Optional[float] = None,
+                predicate: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Find the k nearest points, searching outward ring by ring from the query cell.
+
+        Args:
+            latitude: Query latitude in decimal degrees
+            longitude: Query longitude in decimal degrees
+            k: Maximum number of points to return
+            max_distance_km: Optional cut-off distance in kilometers
+            predicate: Optional filter called with each candidate key
+
+        Returns:
+            List of (key, distance_km) tuples sorted nearest first
+        """
+        if k <= 0 or not self._cells:
+            return []
+
+        center_row, center_col = self._cell_of(latitude, longitude)
+        min_row, max_row, min_col, max_col = self._occupied_bounds()
+        max_ring = max(
+            abs(center_row - min_row), abs(center_row - max_row),
+            abs(center_col - min_col), abs(center_col - max_col)
+        )
+
+        # Max-heap of the best k candidates seen so far, stored as (-distance, key)
+        best: List[Tuple[float, int, Hashable]] = []
+        counter = 0
+
+        for ring in range(max_ring + 1):
+            # Anything outside this ring is at least `ring` whole cells away from the query point
+            if ring > 0:
+                lower_bound = self._ring_lower_bound_km(latitude, ring)
+                if max_distance_km is not None and lower_bound > max_distance_km:
+                    break
+                if len(best) == k and lower_bound > -best[0][0]:
+                    break
+
+            for cell in self._ring_cells(center_row, center_col, ring):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for key, (lat, lon) in bucket.items():
+                    if predicate is not None and not predicate(key):
+                        continue
+                    distance = haversine(latitude, longitude, lat, lon)
+                    if max_distance_km is not None and distance > max_distance_km:
+                        continue
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, counter, key))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, counter, key))
+
+        return sorted(((key, -neg_distance) for neg_distance, _, key in best), key=lambda item: item[1])
+
+    def _ring_lower_bound_km(self, latitude: float, ring: int) -> float:
+        """Minimum distance from a point to any cell outside the given ring."""
+        degrees = (ring - 1) * self.cell_size if ring > 0 else 0.0
+        # East-west cells shrink towards the poles, so use the most poleward latitude in reach
+        widest = min(89.9, abs(latitude) + (ring + 1) * self.cell_size)
+        return degrees * KM_PER_DEGREE * math.cos(math.radians(widest))
+
+    @staticmethod
+    def _ring_cells(center_row: int, center_col: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield (center_row, center_col)
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield (center_row - ring, col)
+            yield (center_row + ring, col)
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield (row, center_col - ring)
+            yield (row, center_col + ring)
+
+
+class RecyclingCenterIndex:
+    """
+    Process-wide spatial index over active recycling centers.
+
+    The index is built lazily from the database on first use and kept in sync
+    with inserts, updates and soft deletes of RecyclingCenter rows committed by
+    this process's sessions. Writes those listeners never see (bulk
+    query.update(), raw SQL, other worker processes) are caught by comparing a
+    cheap summary of the table against the one taken at load time, at most
+    once every refresh_seconds, and rebuilding when it differs.
+    """
+
+    def __init__(self, cell_size: float = 0.25, refresh_seconds: float = 5.0):
+        self._grid = GeoGridIndex(cell_size)
+        self.refresh_seconds = refresh_seconds
+        self._loaded = False
+        self._version: Optional[Tuple] = None
+        self._next_check = 0.0
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[], None]] = []
+
+    @staticmethod
+    def _table_version() -> Tuple:
+        """Summary of the indexed columns that changes whenever a center is added, moved, toggled or removed."""
+        return tuple(db.session.query(
+            db.func.count(RecyclingCenter.id),
+            db.func.max(RecyclingCenter.id),
+            db.func.max(RecyclingCenter.updated_at),
+            db.func.sum(db.case((RecyclingCenter.is_active.is_(True), RecyclingCenter.id), else_=0)),
+            db.func.sum(RecyclingCenter.latitude),
+            db.func.sum(RecyclingCenter.longitude)
+        ).one())
+
+    def ensure_loaded(self) -> None:
+        """Build the index from the database, or rebuild it if the table changed behind its back."""
+        if self._loaded and time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            if self._loaded and time.monotonic() < self._next_check:
+                return
+            version = self._table_version()
+            self._next_check = time.monotonic() + self.refresh_seconds
+            if self._loaded and version == self._version:
+                return
+            stale = self._loaded
+            rows = db.session.query(
+                RecyclingCenter.id, RecyclingCenter.latitude, RecyclingCenter.longitude
+            ).filter(
+                RecyclingCenter.is_active.is_(True),
+                RecyclingCenter.latitude.isnot(None),
+                RecyclingCenter.longitude.isnot(None)
+            ).all()
+            self._grid.clear()
+            for center_id, latitude, longitude in rows:
+                self._grid.insert(center_id, latitude, longitude)
+            self._version = version
+            self._loaded = True
+        if stale:
+            self._notify()
+
+    def invalidate(self) -> None:
+        """Drop the index so it is rebuilt from the database on next use."""
+        with self._lock:
+            self._grid.clear()
+            self._loaded = False
+        self._notify()
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """Register a callback invoked whenever the set of indexed centers changes."""
+        self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            callback()
+
+    def apply_changes(self, changes: Dict[int, Optional[Tuple[float, float]]]) -> None:
+        """
+        Apply committed center changes.
+
+        Args:
+            changes: Mapping of center id to its (latitude, longitude), or None
+                when the center is deleted, inactive or has no coordinates
+        """
+        if not changes:
+            return
+        with self._lock:
+            if self._loaded:
+                for center_id, position in changes.items():
+                    if position is None:
+                        self._grid.remove(center_id)
+                    else:
+                        self._grid.insert(center_id, *position)
+        self._notify()
+
+    def within_radius(self, latitude: float, longitude: float,
+                      radius_km: float) -> List[Tuple[int, float]]:
+        """Return (center_id, distance_km) for active centers within the radius, nearest first."""
+        self.ensure_loaded()
+        with self._lock:
+            return self._grid.within_radius(latitude, longitude, radius_km)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 1,
+                max_distance_km: Optional[float] = None,
+                predicate: Optional[Callable[[int], bool]] = None) -> List[Tuple[int, float]]:
+        """Return up to k (center_id, distance_km) tuples for the nearest active centers."""
+        self.ensure_loaded()
+        with self._lock:
+            return self._grid.nearest(latitude, longitude, k, max_distance_km, predicate)
+
+
+center_index = RecyclingCenterIndex(refresh_seconds=float(os.getenv('CENTER_INDEX_REFRESH_SECONDS', 5)))
+
+_CHANGES_KEY = 'recycling_center_index_changes'
+
+
+def _center_position(center: RecyclingCenter) -> Optional[Tuple[float, float]]:
+    if not center.is_active or center.latitude is None or center.longitude is None:
+        return None
+    return (center.latitude, center.longitude)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_center_changes(session, flush_context):
+    """Remember which centers were written so the index can be updated once they commit."""
+    changes = session.info.setdefault(_CHANGES_KEY, {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, RecyclingCenter) and obj.id is not None:
+            changes[obj.id] = _center_position(obj)
+    for obj in session.deleted:
+        if isinstance(obj, RecyclingCenter) and obj.id is not None:
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_center_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        center_index.apply_changes(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_center_changes(session, previous_transaction):
+    session.info.pop(_CHANGES_KEY, None)
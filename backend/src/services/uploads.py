@@ -0,0 +1,172 @@
+import hashlib
+import io
+import os
+import tempfile
+from typing import NamedTuple, Optional
+
+# Bytes read from the upload stream per iteration
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Largest accepted upload; also used as the app-wide MAX_CONTENT_LENGTH default
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Uploads up to this size are hashed in memory, so small duplicates never touch
+# the disk; larger ones go through a temporary file, keeping memory per
+# concurrent upload at this size however large the upload is
+UPLOAD_SPOOL_SIZE = int(os.getenv('UPLOAD_SPOOL_BYTES', 1024 * 1024))
+
+# Leading bytes identifying each accepted image format
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+]
+SNIFF_BYTES = 12
+
+
+class UploadRejected(Exception):
+    """Raised when an upload is too large or is not an accepted image."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    sha256: str
+    duplicate: bool  # True when identical bytes were already stored
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Return the file extension matching an image's leading bytes, or None if unrecognized."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def store_upload(image_file, upload_dir: str, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredUpload:
+    """
+    Save an uploaded image under its content hash.
+
+    Args:
+        image_file: Werkzeug FileStorage from the request
+        upload_dir: Directory holding the content-addressed images
+        max_bytes: Reject uploads larger than this
+
+    Returns:
+        StoredUpload with the file path and content hash
+    """
+    return store_upload_stream(image_file.stream, upload_dir, max_bytes)
+
+
+class _Spool:
+    """
+    Upload buffer kept in memory up to spool_size, then in a temporary file in upload_dir.
+
+    Unlike tempfile.SpooledTemporaryFile, the overflow file is named, so a new
+    upload is moved into place instead of being copied a second time.
+    """
+
+    def __init__(self, upload_dir: str, spool_size: int):
+        self.upload_dir = upload_dir
+        self.spool_size = spool_size
+        self._memory = io.BytesIO()
+        self._file = None
+        self._temp_path = None
+
+    def write(self, chunk: bytes) -> None:
+        if self._file is None and self._memory.tell() + len(chunk) > self.spool_size:
+            fd, self._temp_path = tempfile.mkstemp(dir=self.upload_dir, prefix='.upload-')
+            self._file = os.fdopen(fd, 'wb')
+            self._file.write(self._memory.getbuffer())
+            self._memory = None
+        (self._file or self._memory).write(chunk)
+
+    def save(self, path: str) -> None:
+        """Move the buffered bytes to path atomically, so readers never see a partial file."""
+        if self._file is None:
+            fd, self._temp_path = tempfile.mkstemp(dir=self.upload_dir, prefix='.upload-')
+            self._file = os.fdopen(fd, 'wb')
+            self._file.write(self._memory.getbuffer())
+        self._file.close()
+        os.replace(self._temp_path, path)
+        self._temp_path = None
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self._temp_path is not None:
+            os.unlink(self._temp_path)
+            self._temp_path = None
+        self._memory = None
+
+
+def store_upload_stream(stream, upload_dir: str, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredUpload:
+    """
+    Stream an image into content-addressed storage in fixed-size chunks.
+
+    The payload is hashed and its magic bytes checked while it is read, so
+    non-images and oversize bodies are rejected as soon as they are detected,
+    and memory use stays bounded by UPLOAD_SPOOL_SIZE whatever the upload
+    size. Byte-identical re-submissions reuse the existing file; unless they
+    are larger than the spool they are never written to disk at all.
+
+    Args:
+        stream: Readable binary stream (request body or uploaded file)
+        upload_dir: Directory holding the content-addressed images
+        max_bytes: Reject uploads larger than this
+
+    Returns:
+        StoredUpload with the file path and content hash
+
+    Raises:
+        UploadRejected: With status 413 for oversize and 415 for non-image payloads
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+
+    hasher = hashlib.sha256()
+    header = b''
+    extension = None
+    size = 0
+
+    buffer = _Spool(upload_dir, UPLOAD_SPOOL_SIZE)
+    try:
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(f'Image exceeds the {max_bytes // (1024 * 1024)}MB upload limit', 413)
+
+            if extension is None and len(header) < SNIFF_BYTES:
+                header += chunk[:SNIFF_BYTES - len(header)]
+                if len(header) >= SNIFF_BYTES:
+                    extension = sniff_image_type(header)
+                    if extension is None:
+                        raise UploadRejected('Uploaded file is not a supported image', 415)
+
+            hasher.update(chunk)
+            buffer.write(chunk)
+
+        if extension is None:
+            # Bodies shorter than the sniff window still need a recognizable signature
+            extension = sniff_image_type(header)
+            if extension is None:
+                raise UploadRejected('Uploaded file is not a supported image', 415)
+
+        digest = hasher.hexdigest()
+        file_path = os.path.join(upload_dir, f'{digest}{extension}')
+        duplicate = os.path.exists(file_path)
+        if not duplicate:
+            buffer.save(file_path)
+    finally:
+        buffer.discard()
+
+    return StoredUpload(path=file_path, sha256=digest, duplicate=duplicate)
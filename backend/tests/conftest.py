@@ -0,0 +1,52 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.app import create_app
+from src.models.user import db, User
+from src.services.spatial_index import center_index
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on its own SQLite file, migrated, with no background jobs running."""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'MIGRATE_ON_STARTUP': True,
+        'DISPATCH_INTERVAL_SECONDS': 0,
+        'POINTS_LEDGER_INTERVAL_SECONDS': 0,
+    })
+    # Process-wide indexes and caches would otherwise carry rows over from the last test's database
+    center_index.invalidate()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+    center_index.invalidate()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Factory adding a committed user; keyword arguments override the defaults."""
+    created = []
+
+    def make_user(**fields):
+        index = len(created)
+        fields.setdefault('username', f'user{index}')
+        fields.setdefault('email', f'user{index}@example.com')
+        fields.setdefault('password_hash', 'x')
+        user = User(**fields)
+        db.session.add(user)
+        db.session.commit()
+        created.append(user)
+        return user
+
+    return make_user
@@ -0,0 +1,48 @@
+import threading
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.models.wastepicker_stats import WastepickerStats
+
+PICKERS = 16
+ROUNDS = 3
+
+
+def test_concurrent_accepts_have_exactly_one_winner(app, make_user):
+    requester_id = make_user().id
+    picker_ids = [make_user(user_type='wastepicker').id for _ in range(PICKERS)]
+
+    for _ in range(ROUNDS):
+        pickup = PickupRequest(requester_id=requester_id, pickup_address='1 Race Street',
+                               pickup_latitude=-26.2, pickup_longitude=28.05,
+                               payment_amount=25.0, estimated_weight=3.0)
+        db.session.add(pickup)
+        db.session.commit()
+        pickup_id = pickup.id
+
+        barrier = threading.Barrier(PICKERS)
+        statuses = {}
+
+        def accept(picker_id):
+            # Each thread runs its request in its own app context and session
+            with app.app_context():
+                client = app.test_client()
+                barrier.wait()
+                response = client.post(f'/api/pickup-requests/{pickup_id}/accept', json={'wastepicker_id': picker_id})
+                statuses[picker_id] = response.status_code
+
+        threads = [threading.Thread(target=accept, args=(picker_id,)) for picker_id in picker_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+
+        winners = [picker_id for picker_id, status in statuses.items() if status == 200]
+        assert len(winners) == 1
+        assert sorted(status for status in statuses.values() if status != 200) == [400] * (PICKERS - 1)
+
+        db.session.expire_all()
+        stored = db.session.get(PickupRequest, pickup_id)
+        assert (stored.status, stored.wastepicker_id) == ('accepted', winners[0])
+        assigned = PickupRequest.query.filter_by(wastepicker_id=winners[0]).count()
+        assert db.session.get(WastepickerStats, winners[0]).total_pickups == assigned
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from src.routes import waste_identification
+from src.services.batching import ClassificationCoalescer
+
+
+class ShortBatchClassifier:
+    """Drops the last image of every batch it is given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def classify_batch(self, image_paths):
+        self.batches.append(list(image_paths))
+        return [{'identified_type': path} for path in image_paths[:-1]]
+
+
+def test_short_batch_fails_every_caller_instead_of_hanging():
+    classifier = ShortBatchClassifier()
+    coalescer = ClassificationCoalescer(classifier, max_batch_size=4, max_wait_ms=50)
+    errors = []
+
+    def classify(path):
+        try:
+            coalescer.classify(path, timeout=5)
+        except Exception as e:
+            errors.append(e)
+
+    callers = [threading.Thread(target=classify, args=(f'image{index}.png',)) for index in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(10)
+
+    assert not any(caller.is_alive() for caller in callers)
+    assert len(errors) == 3
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+
+def test_batching_is_off_unless_configured(monkeypatch):
+    monkeypatch.delenv('CLASSIFICATION_BATCH_SIZE', raising=False)
+    monkeypatch.setattr(waste_identification, '_classification_coalescer', None)
+    assert waste_identification.get_classification_coalescer().max_batch_size == 1
+
+    monkeypatch.setenv('CLASSIFICATION_BATCH_SIZE', '8')
+    monkeypatch.setattr(waste_identification, '_classification_coalescer', None)
+    assert waste_identification.get_classification_coalescer().max_batch_size == 8
@@ -0,0 +1,105 @@
+import numpy as np
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.models.pickup_suggestion import PickupSuggestion
+from src.services import geo
+from src.services.dispatch import candidate_pairs, greedy_assign, solve_dispatch
+
+ADMIN_TOKEN = 'test-admin-token'
+
+
+def brute_force_pairs(request_lats, request_lons, wastepicker_lats, wastepicker_lons, k, radius_km):
+    distances = np.asarray(geo.distance_matrix(request_lats, request_lons, wastepicker_lats, wastepicker_lons,
+                                               fast=True))
+    expected = {}
+    for request, row in enumerate(distances):
+        inside = [(distance, wastepicker) for wastepicker, distance in enumerate(row) if distance <= radius_km]
+        expected[request] = sorted(inside)[:k]
+    return expected
+
+
+def test_candidate_pairs_match_brute_force_k_nearest():
+    rng = np.random.default_rng(7)
+    # A dense city cluster plus sparse outliers, so several grid levels are used
+    wastepicker_lats = np.concatenate([-26.2 + rng.normal(0, 0.02, 300), -26.2 + rng.uniform(-1, 1, 40)])
+    wastepicker_lons = np.concatenate([28.05 + rng.normal(0, 0.02, 300), 28.05 + rng.uniform(-1, 1, 40)])
+    request_lats = -26.2 + rng.uniform(-0.6, 0.6, 200)
+    request_lons = 28.05 + rng.uniform(-0.6, 0.6, 200)
+
+    for k, radius_km in ((1, 5.0), (8, 15.0), (20, 40.0)):
+        requests, wastepickers, distances = candidate_pairs(request_lats, request_lons,
+                                                            wastepicker_lats, wastepicker_lons, k, radius_km)
+        found = {}
+        for request, wastepicker, distance in zip(requests.tolist(), wastepickers.tolist(), distances.tolist()):
+            found.setdefault(request, []).append((distance, wastepicker))
+        expected = brute_force_pairs(request_lats, request_lons, wastepicker_lats, wastepicker_lons, k, radius_km)
+
+        for request in range(len(request_lats)):
+            got = sorted(found.get(request, []))
+            assert [wastepicker for _, wastepicker in got] == [wastepicker for _, wastepicker in expected[request]]
+            assert np.allclose([distance for distance, _ in got], [distance for distance, _ in expected[request]])
+
+
+def test_greedy_assign_stops_at_each_wastepicker_capacity():
+    # Five requests, all cheapest with wastepicker 0, which has room for two
+    requests = np.array([0, 1, 2, 3, 4, 0, 1, 2, 3, 4])
+    wastepickers = np.array([0, 0, 0, 0, 0, 1, 1, 1, 1, 1])
+    costs = np.array([1.0, 2.0, 3.0, 4.0, 5.0, 10.0, 11.0, 12.0, 13.0, 14.0])
+
+    chosen = greedy_assign(requests, wastepickers, costs, np.array([2, 1]), 5)
+
+    assert sorted(zip(requests[chosen].tolist(), wastepickers[chosen].tolist())) == [(0, 0), (1, 0), (2, 1)]
+    assert greedy_assign(requests, wastepickers, costs, np.array([0, 0]), 5).tolist() == []
+
+
+def test_solve_dispatch_skips_full_wastepickers():
+    plan = solve_dispatch([-26.2, -26.21], [28.05, 28.05], [None, 5.0], [None, 'mixed'],
+                          [-26.2, -26.3], [28.05, 28.05], [0, 2])
+
+    # The nearby wastepicker is full, so both go to the one ~10 km away
+    assert plan.wastepicker_indices.tolist() == [1, 1]
+    assert sorted(plan.request_indices.tolist()) == [0, 1]
+
+
+def test_dispatch_run_end_to_end(app, client, make_user):
+    app.config['ADMIN_SEED_TOKEN'] = ADMIN_TOKEN
+    requester = make_user()
+    near = make_user(user_type='wastepicker', latitude=-26.2, longitude=28.05)
+    far = make_user(user_type='wastepicker', latitude=-26.25, longitude=28.05)
+    make_user(user_type='wastepicker', latitude=-26.2, longitude=28.05, is_active=False)
+    pickups = [PickupRequest(requester_id=requester.id, pickup_address=f'{index} Dispatch Road',
+                             pickup_latitude=-26.2 + index * 0.001, pickup_longitude=28.05, status='pending')
+               for index in range(3)]
+    pickups.append(PickupRequest(requester_id=requester.id, pickup_address='Remote Farm',
+                                 pickup_latitude=-30.0, pickup_longitude=25.0, status='pending'))
+    db.session.add_all(pickups)
+    db.session.commit()
+    near_id, far_id = near.id, far.id
+    pickup_ids = [pickup.id for pickup in pickups]
+
+    assert client.post('/api/admin/dispatch/run').status_code == 401
+    assert client.post('/api/admin/dispatch/run', headers={'X-ADMIN-TOKEN': 'wrong'}).status_code == 401
+
+    runs = []
+    for _ in range(2):
+        response = client.post('/api/admin/dispatch/run', headers={'X-ADMIN-TOKEN': ADMIN_TOKEN})
+        assert response.status_code == 200
+        runs.append(response.get_json()['data'])
+    assert [run['suggestions'] for run in runs] == [3, 3]
+    assert runs[0]['wastepickers'] == 2
+
+    # The second run replaced the first one's rows
+    db.session.remove()
+    suggestions = PickupSuggestion.query.all()
+    assert {suggestion.dispatch_run for suggestion in suggestions} == {runs[1]['dispatch_run']}
+    assert sorted(suggestion.pickup_request_id for suggestion in suggestions) == pickup_ids[:3]
+    assert {suggestion.wastepicker_id for suggestion in suggestions} == {near_id}
+
+    accepted = client.post(f'/api/pickup-requests/{pickup_ids[0]}/accept', json={'wastepicker_id': far_id})
+    assert accepted.status_code == 200
+
+    # Accepted since the run, so no longer offered
+    listed = client.get(f'/api/wastepicker/{near_id}/suggestions').get_json()
+    assert sorted(item['id'] for item in listed['data']) == pickup_ids[1:3]
+    assert all(item['dispatch_run'] == runs[1]['dispatch_run'] for item in listed['data'])
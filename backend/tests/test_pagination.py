@@ -0,0 +1,68 @@
+import pytest
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.models.waste_item import WasteItem
+
+# Several rows per second, written the way CURRENT_TIMESTAMP stores them
+TIMESTAMPS = ['2024-05-01 10:00:00'] * 3 + ['2024-05-01 10:00:01'] * 2 + ['2024-05-01 10:00:02'] * 2
+
+
+def walk(client, url, direction, cursor=''):
+    """Follow next_cursor (or prev_cursor) from cursor, returning the ids of every page."""
+    pages = []
+    while cursor is not None and len(pages) < 20:
+        body = client.get(f'{url}&cursor={cursor}').get_json()
+        pages.append([item['id'] for item in body['data']])
+        cursor = body['pagination'][f'{direction}_cursor']
+    return pages, body
+
+
+def expected_order(rows):
+    return [row_id for _, row_id in sorted(rows, reverse=True)]
+
+
+def set_timestamps(table, ids):
+    for row_id, created_at in zip(ids, TIMESTAMPS):
+        db.session.execute(table.update().where(table.c.id == row_id).values(created_at=db.literal_column(f"'{created_at}'")))
+    db.session.commit()
+    return [(created_at, row_id) for row_id, created_at in zip(ids, TIMESTAMPS)]
+
+
+@pytest.fixture
+def pickups(make_user):
+    requester = make_user()
+    db.session.add_all([PickupRequest(requester_id=requester.id, pickup_address=f'{index} Page Street',
+                                      pickup_latitude=-26.2, pickup_longitude=28.05) for index in TIMESTAMPS])
+    db.session.commit()
+    ids = [row_id for (row_id,) in db.session.query(PickupRequest.id).order_by(PickupRequest.id)]
+    return set_timestamps(PickupRequest.__table__, ids)
+
+
+@pytest.fixture
+def history(make_user):
+    user = make_user()
+    db.session.add_all([WasteItem(user_id=user.id, identified_type='bottle') for _ in TIMESTAMPS])
+    db.session.commit()
+    ids = [row_id for (row_id,) in db.session.query(WasteItem.id).order_by(WasteItem.id)]
+    return user.id, set_timestamps(WasteItem.__table__, ids)
+
+
+def assert_walks_every_row(client, url, rows):
+    pages, last = walk(client, url, 'next')
+    walked = [row_id for page in pages for row_id in page]
+    assert walked == expected_order(rows)
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+    # And back again from the last page
+    back, _ = walk(client, url, 'prev', last['pagination']['prev_cursor'])
+    assert [row_id for page in reversed(back) for row_id in page] == walked[:-1]
+
+
+def test_pickup_cursor_pages_cover_rows_sharing_a_second(client, pickups):
+    assert_walks_every_row(client, '/api/pickup-requests?limit=3', pickups)
+
+
+def test_waste_history_cursor_pages_cover_rows_sharing_a_second(client, history):
+    user_id, rows = history
+    assert_walks_every_row(client, f'/api/waste-history/{user_id}?per_page=3', rows)
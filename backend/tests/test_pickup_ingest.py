@@ -0,0 +1,91 @@
+import json
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.services.pickup_ingest import BULK_CHUNK_SIZE, ingest_pickup_requests
+
+
+def pickup_row(requester_id, index=0, **fields):
+    return dict({'requester_id': requester_id, 'pickup_address': f'{index} Bulk Street',
+                 'pickup_latitude': -26.2, 'pickup_longitude': 28.05}, **fields)
+
+
+def post_bulk(client, body, mimetype='application/json'):
+    response = client.post('/api/pickup-requests/bulk', data=body, content_type=mimetype)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[:-1], lines[-1]
+
+
+def test_malformed_array_reports_the_row_it_stopped_at(client, make_user):
+    requester = make_user()
+    rows = [json.dumps(pickup_row(requester.id, index)) for index in range(2)]
+    results, summary = post_bulk(client, '[' + ','.join(rows) + ', {"requester_id": ')
+
+    assert [result['success'] for result in results] == [True, True, False]
+    assert results[2]['index'] == 2 and 'Malformed JSON array' in results[2]['error']
+    assert summary['summary']['created'] == 2 and summary['summary']['failed'] == 1
+    assert PickupRequest.query.count() == 2
+
+
+def test_body_that_is_not_an_array_is_rejected(client):
+    response = client.post('/api/pickup-requests/bulk', data='{"requester_id": 1}', content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_ndjson_line_error_fails_only_that_row(client, make_user):
+    requester = make_user()
+    body = '\n'.join([json.dumps(pickup_row(requester.id, 0)), '{not json',
+                      json.dumps(pickup_row(requester.id, 2)), json.dumps(pickup_row(requester.id + 1, 3))])
+    results, summary = post_bulk(client, body, 'application/x-ndjson')
+
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    assert [result['success'] for result in results] == [True, False, True, False]
+    assert results[1]['error'].startswith('Invalid JSON')
+    assert results[3]['error'] == 'Requester not found'
+    assert summary['summary'] == dict(summary['summary'], received=4, created=2, failed=2)
+
+
+def test_database_error_fails_only_its_chunk(client, make_user):
+    requester = make_user()
+    rows = [pickup_row(requester.id, index) for index in range(BULK_CHUNK_SIZE + 2)]
+    # Not a value SQLite can bind, so the second chunk's INSERT fails
+    rows[BULK_CHUNK_SIZE + 1]['waste_description'] = {'not': 'text'}
+    results, summary = post_bulk(client, '\n'.join(json.dumps(row) for row in rows), 'application/x-ndjson')
+
+    assert [result['index'] for result in results] == list(range(BULK_CHUNK_SIZE + 2))
+    assert all(result['success'] for result in results[:BULK_CHUNK_SIZE])
+    assert not any(result['success'] for result in results[BULK_CHUNK_SIZE:])
+    assert summary['summary']['created'] == BULK_CHUNK_SIZE
+    db.session.remove()
+    assert PickupRequest.query.count() == BULK_CHUNK_SIZE
+
+
+def test_bulk_body_has_its_own_size_limit(app, client, make_user):
+    requester = make_user()
+    body = '\n'.join(json.dumps(pickup_row(requester.id, index)) for index in range(20))
+    app.config['MAX_CONTENT_LENGTH'] = 100
+
+    results, _ = post_bulk(client, body, 'application/x-ndjson')
+    assert len(results) == 20 and all(result['success'] for result in results)
+
+    app.config['BULK_MAX_CONTENT_LENGTH'] = 100
+    response = client.post('/api/pickup-requests/bulk', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
+
+
+def test_read_error_mid_stream_ends_with_an_error_row_and_summary(app, make_user):
+    requester = make_user()
+
+    def rows():
+        yield pickup_row(requester.id, 0)
+        yield pickup_row(requester.id, 1)
+        raise RequestEntityTooLarge()
+
+    *results, summary = ingest_pickup_requests(rows())
+    assert [result['success'] for result in results] == [True, True, False]
+    assert '413' in results[2]['error']
+    assert summary['summary']['received'] == 3
@@ -0,0 +1,51 @@
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.database.migrations import applied_versions
+from src.database.query_plans import explain
+from src.services.pubsub import pickup_feed
+
+
+def add_pickups(requester, *rows):
+    pickups = [PickupRequest(requester_id=requester.id, pickup_address=f'{index} Test Street',
+                             pickup_latitude=latitude, pickup_longitude=longitude, status=status)
+               for index, (latitude, longitude, status) in enumerate(rows)]
+    db.session.add_all(pickups)
+    db.session.commit()
+    return pickups
+
+
+def test_nearby_search_without_status_uses_location_index(app, client, make_user):
+    assert 2 in applied_versions()
+    requester = make_user()
+    near, _, accepted = add_pickups(requester, (-26.20, 28.05, 'pending'), (-25.00, 28.05, 'pending'),
+                                    (-26.21, 28.05, 'accepted'))
+
+    response = client.get('/api/pickup-requests?latitude=-26.2&longitude=28.05&radius=10')
+    assert [item['id'] for item in response.get_json()['data']] == [near.id, accepted.id]
+
+    steps = explain(PickupRequest.query.filter(PickupRequest.pickup_latitude.between(-26.3, -26.1),
+                                               PickupRequest.pickup_longitude.between(27.9, 28.2)))
+    assert any('ix_pickup_requests_location' in step for step in steps)
+
+
+def test_batch_status_rejects_ids_that_are_not_a_list(client):
+    for body in ({'ids': 5, 'status': 'accepted'}, {'transitions': {'id': 1}}, [1, 2]):
+        response = client.put('/api/pickup-requests/status', json=body)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+def test_batch_status_publishes_every_change(app, client, make_user):
+    requester = make_user()
+    first, second = add_pickups(requester, (-26.20, 28.05, 'pending'), (-26.21, 28.05, 'pending'))
+    ids = [first.id, second.id]
+    subscription = pickup_feed.subscribe(-26.2, 28.05, 10)
+    try:
+        response = client.put('/api/pickup-requests/status', json={'ids': ids, 'status': 'accepted'})
+        assert response.status_code == 200
+        events = [subscription.next_event(timeout=1) for _ in ids]
+    finally:
+        pickup_feed.unsubscribe(subscription)
+
+    assert sorted(event['data']['id'] for event in events) == sorted(ids)
+    assert {event['event'] for event in events} == {'accepted'}
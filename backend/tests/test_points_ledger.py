@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import event
+
+from src.app import create_app
+from src.models.user import db, User, PointsLedgerEntry, with_points_totals
+from src.models.pickup_request import PickupRequest
+
+
+@pytest.fixture
+def statements(app):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_create_app_starts_no_applier_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('POINTS_LEDGER_INTERVAL_SECONDS', raising=False)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'default.db'}"})
+    assert 'points_ledger_applier' not in app.extensions
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_cli_applies_pending_entries_once(app, make_user):
+    user = make_user(points=5)
+    db.session.add(PointsLedgerEntry(user_id=user.id, points=30, recycled_weight=3.0))
+    db.session.commit()
+    user_id = user.id
+
+    result = app.test_cli_runner().invoke(args=['apply-points-ledger'])
+
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    user = User.query.options(with_points_totals()).filter_by(id=user_id).one()
+    assert (user.points, user.unapplied_points) == (35, 0)
+
+
+def test_totals_load_only_when_asked_for(make_user, statements):
+    user_id = make_user(points=5).id
+    db.session.add(PointsLedgerEntry(user_id=user_id, points=20, recycled_weight=2.0))
+    db.session.commit()
+    db.session.expire_all()
+    statements.clear()
+
+    User.query.filter_by(id=user_id).one()
+    assert 'points_ledger' not in statements[-1]
+
+    user = User.query.options(with_points_totals()).filter_by(id=user_id).one()
+    assert 'points_ledger' in statements[-1]
+    count = len(statements)
+    assert user.to_dict()['points'] == 25
+    assert len(statements) == count
+
+
+def test_embedded_users_show_totals_without_extra_queries(client, make_user, statements):
+    requesters = [make_user(points=index) for index in range(5)]
+    for requester in requesters:
+        db.session.add(PointsLedgerEntry(user_id=requester.id, points=10, recycled_weight=1.0))
+        db.session.add(PickupRequest(requester_id=requester.id, pickup_address='1 Ledger Street',
+                                     pickup_latitude=-26.2, pickup_longitude=28.05))
+    db.session.commit()
+    # Start from an empty identity map, like a request in its own session
+    db.session.remove()
+    statements.clear()
+
+    items = client.get('/api/pickup-requests?include=requester').get_json()['data']
+
+    assert sorted(item['requester']['points'] for item in items) == [10, 11, 12, 13, 14]
+    # The page and one IN query for the requesters with their totals
+    assert len(statements) == 2
+
+
+def test_repeated_completion_credits_the_requester_once(client, make_user):
+    requester = make_user()
+    pickup = PickupRequest(requester_id=requester.id, pickup_address='1 Ledger Street', pickup_latitude=-26.2,
+                           pickup_longitude=28.05, status='accepted', estimated_weight=4.0)
+    db.session.add(pickup)
+    db.session.commit()
+    pickup_id = pickup.id
+
+    for _ in range(2):
+        response = client.put(f'/api/pickup-requests/{pickup_id}/status', json={'status': 'completed'})
+        assert response.status_code == 200
+    reopened = client.put(f'/api/pickup-requests/{pickup_id}/status', json={'status': 'pending'})
+    assert reopened.status_code == 400
+
+    db.session.remove()
+    entries = PointsLedgerEntry.query.filter_by(pickup_request_id=pickup_id).all()
+    assert [(entry.points, entry.recycled_weight) for entry in entries] == [(40, 4.0)]
@@ -0,0 +1,77 @@
+import json
+
+from src.services import pubsub
+from src.services.pubsub import GeoPubSub, pickup_feed
+
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.next_event(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_events_reach_only_subscribers_in_radius():
+    feed = GeoPubSub()
+    # Both sit in the event's grid cell; only one has it inside its radius
+    near = feed.subscribe(-26.2, 28.05, 5)
+    short = feed.subscribe(-26.2, 28.15, 5)
+    far = feed.subscribe(-33.9, 18.4, 50)
+
+    assert feed.publish('created', {'id': 1}, -26.21, 28.05) == 1
+
+    assert [event['data'] for event in drain(near)] == [{'id': 1}]
+    assert drain(short) == [] and drain(far) == []
+    assert feed.stats()['delivered'] == 1
+
+
+def test_unsubscribe_removes_every_cell():
+    feed = GeoPubSub(cell_size=0.05)
+    wide = feed.subscribe(-26.2, 28.05, 20)
+    narrow = feed.subscribe(-26.2, 28.05, 1)
+    assert len(wide.cells) > 1
+
+    feed.unsubscribe(wide)
+    feed.unsubscribe(wide)  # A second call, e.g. from the response close hook, is a no-op
+
+    assert feed.stats()['subscribers'] == 1
+    assert feed.stats()['cells'] == len(narrow.cells)
+    feed.unsubscribe(narrow)
+    assert feed.stats() == dict(feed.stats(), subscribers=0, cells=0)
+    assert feed.publish('created', {'id': 1}, -26.2, 28.05) == 0
+
+
+def test_full_queue_drops_the_oldest_events(monkeypatch):
+    monkeypatch.setattr(pubsub, 'SUBSCRIBER_QUEUE_SIZE', 3)
+    feed = GeoPubSub()
+    subscription = feed.subscribe(-26.2, 28.05, 5)
+
+    for pickup_id in range(5):
+        feed.publish('created', {'id': pickup_id}, -26.2, 28.05)
+
+    assert [event['data']['id'] for event in drain(subscription)] == [2, 3, 4]
+    assert subscription.dropped == 2
+
+
+def test_stream_sends_nearby_events_and_unsubscribes_on_close(client):
+    subscribers = pickup_feed.stats()['subscribers']
+    response = client.get('/api/pickup-requests/stream?latitude=-26.2&longitude=28.05&radius=5', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert pickup_feed.stats()['subscribers'] == subscribers + 1
+
+    pickup_feed.publish('accepted', {'id': 7, 'status': 'accepted'}, -26.2, 28.05)
+    body = (chunk.decode() for chunk in response.response)
+    assert next(body).startswith('retry:')
+    event = next(body)
+    assert 'event: accepted\n' in event
+    assert json.loads(event.split('data: ', 1)[1]) == {'id': 7, 'status': 'accepted'}
+
+    response.close()
+    assert pickup_feed.stats()['subscribers'] == subscribers
+
+
+def test_stream_rejects_a_radius_out_of_range(client):
+    response = client.get('/api/pickup-requests/stream?latitude=-26.2&longitude=28.05&radius=500')
+    assert response.status_code == 400
@@ -0,0 +1,9 @@
+from src.database.query_plans import HOT_QUERIES, check_query_plans
+
+
+def test_hot_queries_use_an_index(app):
+    plans = check_query_plans()
+
+    assert [plan.name for plan in plans] == [name for name, _ in HOT_QUERIES]
+    assert {plan.name: plan.problems for plan in plans if plan.problems} == {}
+    assert all(plan.steps for plan in plans)
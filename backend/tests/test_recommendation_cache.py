@@ -0,0 +1,61 @@
+import json
+import random
+
+from src.models.user import db
+from src.models.recycling_center import RecyclingCenter
+from src.services.geo import haversine
+from src.services.recommendation_cache import RecommendationCache, recommendation_cache
+from src.services.spatial_index import center_index
+
+
+def test_recommendation_is_the_closest_accepting_center(app):
+    rng = random.Random(3)
+    centers = []
+    # A dense cluster: far more candidates than fit in any fixed top-k around a cell middle
+    for index in range(80):
+        materials = ['plastic'] if index % 3 else ['plastic', 'glass']
+        centers.append(RecyclingCenter(name=f'Center {index}', address=f'{index} Depot Road',
+                                       latitude=-26.2 + rng.uniform(-0.06, 0.06),
+                                       longitude=28.05 + rng.uniform(-0.06, 0.06),
+                                       accepted_materials=json.dumps(materials)))
+    db.session.add_all(centers)
+    db.session.commit()
+
+    cache = RecommendationCache(cell_size=0.05)
+    for _ in range(200):
+        latitude, longitude = -26.2 + rng.uniform(-0.1, 0.1), 28.05 + rng.uniform(-0.1, 0.1)
+        for material in ('plastic', 'glass'):
+            accepting = [center for center in centers if material in center.accepted_materials]
+            expected = min(accepting, key=lambda center: haversine(latitude, longitude,
+                                                                   center.latitude, center.longitude))
+            assert cache.recommend(material, latitude, longitude)['id'] == expected.id
+
+
+def test_recommendation_search_widens_until_a_center_is_found(app):
+    far = RecyclingCenter(name='Far', address='1 Remote Road', latitude=-33.9, longitude=18.4,
+                          accepted_materials=json.dumps(['metal']))
+    db.session.add(far)
+    db.session.commit()
+
+    cache = RecommendationCache()
+    assert cache.recommend('metal', -26.2, 28.05)['id'] == far.id
+    assert cache.recommend('paper', -26.2, 28.05) is None
+
+
+def test_bulk_deactivated_center_is_no_longer_recommended(app, monkeypatch):
+    nearest = RecyclingCenter(name='Nearest', address='1 Near Road', latitude=-26.2, longitude=28.05,
+                              accepted_materials=json.dumps(['plastic']))
+    other = RecyclingCenter(name='Other', address='2 Near Road', latitude=-26.22, longitude=28.05,
+                            accepted_materials=json.dumps(['plastic']))
+    db.session.add_all([nearest, other])
+    db.session.commit()
+    nearest_id, other_id = nearest.id, other.id
+    monkeypatch.setattr(center_index, 'refresh_seconds', 0)
+
+    assert recommendation_cache.recommend('plastic', -26.2, 28.05)['id'] == nearest_id
+
+    # Bypasses the session listeners, like a write from another worker
+    RecyclingCenter.query.filter_by(id=nearest_id).update({'is_active': False}, synchronize_session=False)
+    db.session.commit()
+
+    assert recommendation_cache.recommend('plastic', -26.2, 28.05)['id'] == other_id
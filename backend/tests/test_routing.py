@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.routes.dispatch import route_cache
+from src.services import geo
+from src.services.routing import nearest_neighbour_route, plan_route
+
+
+@pytest.fixture(autouse=True)
+def empty_route_cache():
+    route_cache.clear()
+    yield
+    route_cache.clear()
+
+
+def line_distances(positions):
+    """Distance matrix of points on a line, km apart by position."""
+    return [[abs(a - b) for b in positions] for a in positions]
+
+
+def test_improvement_never_lengthens_the_nearest_neighbour_route():
+    rng = random.Random(11)
+    for size in (3, 8, 25):
+        for _ in range(10):
+            lats = [-26.2 + rng.uniform(-0.1, 0.1) for _ in range(size + 1)]
+            lons = [28.05 + rng.uniform(-0.1, 0.1) for _ in range(size + 1)]
+            distances = geo.distance_matrix(lats, lons, lats, lons)
+
+            plan = plan_route(distances, time_budget_ms=1000)
+
+            assert sorted(plan.order) == list(range(1, size + 1))
+            nearest_neighbour = nearest_neighbour_route([list(row) for row in distances])
+            assert plan.initial_distance_km == pytest.approx(sum(
+                distances[a][b] for a, b in zip([0] + nearest_neighbour, nearest_neighbour)))
+            assert plan.distance_km <= plan.initial_distance_km + 1e-9
+
+
+def test_windows_reorder_stops_to_avoid_lateness():
+    # Stop 1 is 1 km east, stop 2 is 2 km west and must be reached within 2 minutes
+    distances = line_distances([0, 1, -2])
+    windows = [None, None, (0, 2)]
+
+    assert nearest_neighbour_route(distances) == [1, 2]
+    plan = plan_route(distances, windows, speed_kmh=60, service_minutes=0)
+
+    assert plan.order == [2, 1]
+    assert plan.late_minutes == [0.0, 0.0]
+    assert plan.arrivals == [2.0, 5.0]
+
+
+def test_unavoidable_lateness_is_reported_and_penalised():
+    distances = line_distances([0, 10])
+    plan = plan_route(distances, [None, (0, 4)], speed_kmh=60, service_minutes=0)
+
+    assert plan.late_minutes == [6.0]
+    # Early arrivals wait for the window to open
+    waiting = plan_route(distances, [None, (30, 90)], speed_kmh=60, service_minutes=5)
+    assert waiting.arrivals == [30.0] and waiting.duration_minutes == 35.0
+
+
+def test_route_endpoint_is_cached_until_the_assignments_change(app, client, make_user):
+    requester = make_user()
+    picker = make_user(user_type='wastepicker', latitude=-26.2, longitude=28.05)
+    stops = [PickupRequest(requester_id=requester.id, wastepicker_id=picker.id, status='accepted',
+                           pickup_address=f'{index} Route Road', pickup_latitude=-26.2 + offset,
+                           pickup_longitude=28.05)
+             for index, offset in enumerate((0.03, 0.01, 0.02))]
+    extra = PickupRequest(requester_id=requester.id, status='pending', pickup_address='4 Route Road',
+                          pickup_latitude=-26.2, pickup_longitude=28.06)
+    db.session.add_all(stops + [extra])
+    db.session.commit()
+    picker_id, extra_id = picker.id, extra.id
+    stop_ids = [stop.id for stop in stops]
+
+    first = client.get(f'/api/wastepicker/{picker_id}/route').get_json()['data']
+    assert first['cached'] is False
+    # Nearest first along the line north
+    assert [stop['pickup_request_id'] for stop in first['stops']] == [stop_ids[1], stop_ids[2], stop_ids[0]]
+
+    again = client.get(f'/api/wastepicker/{picker_id}/route').get_json()['data']
+    assert again['cached'] is True and again['stops'] == first['stops']
+
+    accepted = client.post(f'/api/pickup-requests/{extra_id}/accept', json={'wastepicker_id': picker_id})
+    assert accepted.status_code == 200
+
+    changed = client.get(f'/api/wastepicker/{picker_id}/route').get_json()['data']
+    assert changed['cached'] is False
+    assert sorted(stop['pickup_request_id'] for stop in changed['stops']) == sorted(stop_ids + [extra_id])
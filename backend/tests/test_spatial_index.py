@@ -0,0 +1,71 @@
+import json
+import random
+
+from src.models.user import db
+from src.models.recycling_center import RecyclingCenter
+from src.services.spatial_index import GeoGridIndex, center_index
+
+
+def brute_force_nearest(points, latitude, longitude, k):
+    from src.services.geo import haversine
+    ranked = sorted(points.items(), key=lambda item: haversine(latitude, longitude, *item[1]))
+    return [key for key, _ in ranked[:k]]
+
+
+def test_nearest_matches_brute_force_after_inserts_and_removals():
+    rng = random.Random(7)
+    grid = GeoGridIndex(cell_size=0.25)
+    points = {}
+    for key in range(300):
+        points[key] = (rng.uniform(-30, -20), rng.uniform(20, 35))
+        grid.insert(key, *points[key])
+    # Empty the outermost cells so the tracked bounds have to shrink
+    for key in sorted(points, key=lambda key: points[key][0])[:40]:
+        grid.remove(key)
+        del points[key]
+
+    for _ in range(50):
+        latitude, longitude = rng.uniform(-35, -15), rng.uniform(15, 40)
+        found = [key for key, _ in grid.nearest(latitude, longitude, k=5)]
+        assert found == brute_force_nearest(points, latitude, longitude, 5)
+
+
+def test_nearest_on_empty_grid():
+    grid = GeoGridIndex()
+    grid.insert('a', 1.0, 1.0)
+    grid.remove('a')
+    assert grid.nearest(1.0, 1.0) == []
+
+
+def add_center(name, latitude, longitude, materials=('plastic',)):
+    center = RecyclingCenter(name=name, address=f'{name} Road', latitude=latitude, longitude=longitude,
+                             accepted_materials=json.dumps(list(materials)))
+    db.session.add(center)
+    db.session.commit()
+    return center
+
+
+def test_center_index_sees_bulk_updates(app, monkeypatch):
+    monkeypatch.setattr(center_index, 'refresh_seconds', 0)
+    near = add_center('Near', -26.20, 28.05)
+    add_center('Far', -26.30, 28.05)
+    assert center_index.nearest(-26.2, 28.05)[0][0] == near.id
+
+    # Bulk updates skip the session events that keep the index in sync
+    RecyclingCenter.query.filter_by(id=near.id).update({'is_active': False}, synchronize_session=False)
+    db.session.commit()
+
+    assert near.id not in [center_id for center_id, _ in center_index.within_radius(-26.2, 28.05, 50)]
+
+
+def test_recycling_centers_route_returns_nearest_matching_within_limit(client):
+    for index in range(6):
+        add_center(f'Glass {index}', -26.2 + index * 0.01, 28.05, materials=('glass',))
+    for index in range(6):
+        add_center(f'Paper {index}', -26.2 + index * 0.01 + 0.001, 28.05, materials=('paper',))
+
+    response = client.get('/api/recycling-centers?latitude=-26.2&longitude=28.05&material_type=paper&limit=4')
+    data = response.get_json()['data']
+
+    assert [center['name'] for center in data] == ['Paper 0', 'Paper 1', 'Paper 2', 'Paper 3']
+    assert [center['distance'] for center in data] == sorted(center['distance'] for center in data)
@@ -0,0 +1,88 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from src.services import uploads
+from src.services.image_preprocessing import prepare_image
+from src.services.uploads import UploadRejected, store_upload_stream
+
+
+def png_bytes(size=(64, 48), color=(200, 30, 30), noise=False):
+    if noise:
+        image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    else:
+        image = Image.new('RGB', size, color)
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+def test_duplicate_upload_reuses_the_stored_file(tmp_path):
+    body = png_bytes()
+    first = store_upload_stream(io.BytesIO(body), str(tmp_path))
+    second = store_upload_stream(io.BytesIO(body), str(tmp_path))
+
+    assert not first.duplicate and second.duplicate
+    assert first.path == second.path
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(first.path)]
+
+
+def test_small_duplicate_is_not_written_to_disk(tmp_path, monkeypatch):
+    body = png_bytes(size=(200, 200), noise=True)
+    assert len(body) < uploads.UPLOAD_SPOOL_SIZE
+    store_upload_stream(io.BytesIO(body), str(tmp_path))
+
+    written = []
+    real_mkstemp = uploads.tempfile.mkstemp
+    monkeypatch.setattr(uploads.tempfile, 'mkstemp', lambda **kwargs: written.append(kwargs) or real_mkstemp(**kwargs))
+    assert store_upload_stream(io.BytesIO(body), str(tmp_path)).duplicate
+    assert written == []
+
+
+def test_large_upload_is_spooled_to_disk_not_memory(tmp_path, monkeypatch):
+    body = png_bytes(size=(1200, 1200), noise=True)
+    assert len(body) > uploads.UPLOAD_SPOOL_SIZE
+    first = store_upload_stream(io.BytesIO(body), str(tmp_path))
+
+    written = []
+    real_mkstemp = uploads.tempfile.mkstemp
+    monkeypatch.setattr(uploads.tempfile, 'mkstemp', lambda **kwargs: written.append(kwargs) or real_mkstemp(**kwargs))
+    assert store_upload_stream(io.BytesIO(body), str(tmp_path)).duplicate
+    # Hashed through a temporary file, which is removed once it turns out to be a duplicate
+    assert len(written) == 1
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(first.path)]
+
+
+def test_upload_over_the_spool_is_moved_into_place(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, 'UPLOAD_SPOOL_SIZE', 1024)
+    body = png_bytes(size=(200, 200), noise=True)
+    stored = store_upload_stream(io.BytesIO(body), str(tmp_path))
+
+    with open(stored.path, 'rb') as stored_file:
+        assert stored_file.read() == body
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(stored.path)]
+
+
+def test_rejected_upload_leaves_no_temporary_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, 'UPLOAD_SPOOL_SIZE', 1024)
+    with pytest.raises(UploadRejected) as rejected:
+        store_upload_stream(io.BytesIO(png_bytes(size=(200, 200), noise=True)), str(tmp_path), max_bytes=4096)
+    assert rejected.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_prepare_image_hashes_from_its_own_decode(tmp_path, monkeypatch):
+    path = tmp_path / 'photo.png'
+    path.write_bytes(png_bytes(size=(640, 480), noise=True))
+
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, 'open', lambda fp, *args, **kwargs: opened.append(str(fp)) or real_open(fp, *args, **kwargs))
+    prepared = prepare_image(str(path))
+    cached = prepare_image(str(path))
+
+    assert prepared.perceptual_hash is not None and cached.perceptual_hash is not None
+    # The original is decoded once; the cached call only reads the thumbnail
+    assert opened == [str(path), prepared.thumbnail_path]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from sqlalchemy import event, inspect
+
+from src.models.user import db
+from src.models.recycling_center import RecyclingCenter
+from src.models.waste_item import WasteItem
+from src.database.migrations import add_columns
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements executed while the test runs, in order."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_history(user, count):
+    center = RecyclingCenter(name='Depot', address='1 Depot Road', latitude=-26.2, longitude=28.05,
+                             accepted_materials=json.dumps(['plastic']))
+    db.session.add(center)
+    db.session.flush()
+    db.session.add_all([
+        WasteItem(user_id=user.id, identified_type=f'item {index}', material_category='plastic',
+                  image_path=f'/static/uploads/{index}.png', thumbnail_path=f'/static/uploads/{index}.thumb.webp',
+                  recommended_center_id=center.id if index % 2 else None)
+        for index in range(count)
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('per_page', [5, 20])
+def test_history_page_runs_a_constant_number_of_statements(client, make_user, statements, per_page):
+    user = make_user()
+    add_history(user, 30)
+    user_id = user.id
+    statements.clear()
+
+    response = client.get(f'/api/waste-history/{user_id}?per_page={per_page}')
+    items = response.get_json()['data']
+
+    assert len(items) == per_page
+    # The page itself and its total count
+    assert len(statements) == 2
+    assert sum('recommended_center' in item for item in items) == (per_page + 1) // 2
+    assert all(item['thumbnail_path'].endswith('.thumb.webp') for item in items)
+
+
+def test_thumbnail_column_is_added_to_existing_tables(app):
+    with db.engine.begin() as connection:
+        connection.execute(db.text('ALTER TABLE waste_items DROP COLUMN thumbnail_path'))
+        add_columns('waste_items', 'thumbnail_path')(connection)
+        # Running it again is a no-op
+        add_columns('waste_items', 'thumbnail_path')(connection)
+    assert 'thumbnail_path' in {column['name'] for column in inspect(db.engine).get_columns('waste_items')}
@@ -0,0 +1,112 @@
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from src.routes import waste_identification
+from src.services.classification_cache import ClassificationCache
+from src.services.classification_jobs import ClassificationJobQueue
+
+RESULT = {
+    'identified_type': 'plastic bottle', 'confidence_score': 0.9, 'material_category': 'plastic',
+    'recyclable': True, 'disposal_method': 'Recycle', 'preparation_tips': []
+}
+
+
+class CountingCoalescer:
+    def __init__(self):
+        self.calls = []
+
+    def classify(self, image_path, timeout=None):
+        self.calls.append(image_path)
+        return dict(RESULT)
+
+
+@pytest.fixture
+def classifier(app, tmp_path, monkeypatch):
+    """Uploads go to a temporary static folder and classifications are counted."""
+    monkeypatch.setattr(waste_identification, 'STATIC_DIR', str(tmp_path))
+    monkeypatch.setattr(waste_identification, 'classification_cache', ClassificationCache())
+    coalescer = CountingCoalescer()
+    monkeypatch.setattr(waste_identification, 'get_classification_coalescer', lambda: coalescer)
+    return coalescer
+
+
+def encoded(image, image_format):
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=90)
+    return output.getvalue()
+
+
+def photo():
+    # Smooth gradients, like a real photo; flat areas make dHash bits unstable
+    return Image.merge('RGB', [Image.linear_gradient('L').resize((400, 300)),
+                               Image.radial_gradient('L').resize((400, 300)),
+                               Image.linear_gradient('L').rotate(90).resize((400, 300))])
+
+
+def test_reencoded_copy_reuses_the_classification(client, classifier):
+    first = client.post('/api/identify-waste', data=encoded(photo(), 'PNG'), content_type='image/png')
+    second = client.post('/api/identify-waste', data=encoded(photo(), 'JPEG'), content_type='image/jpeg')
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json()['data']['identified_type'] == 'plastic bottle'
+    assert len(classifier.calls) == 1
+
+
+def test_job_mode_is_polled_to_completion(client, classifier):
+    queued = client.post('/api/identify-waste?mode=job', data=encoded(photo(), 'PNG'), content_type='image/png')
+    assert queued.status_code == 202
+    job_id = queued.get_json()['data']['job_id']
+
+    job = client.get(f'/api/identify-waste/jobs/{job_id}?wait=10').get_json()['data']
+    assert job['status'] == 'completed'
+    assert job['result']['identified_type'] == 'plastic bottle'
+    assert client.get('/api/identify-waste/jobs/unknown').status_code == 404
+
+
+def test_job_is_found_by_a_process_that_did_not_run_it(app, client, classifier):
+    queued = client.post('/api/identify-waste?mode=job', data=encoded(photo(), 'PNG'), content_type='image/png')
+    job_id = queued.get_json()['data']['job_id']
+    waste_identification.classification_jobs.wait(job_id, 10)
+
+    # A fresh queue knows the job only through the classification_jobs table, like another worker
+    other_worker = ClassificationJobQueue(waste_identification.process_waste_image)
+    job = other_worker.wait(job_id, 1)
+    assert job.status == 'completed'
+    assert job.result['identified_type'] == 'plastic bottle'
+    assert other_worker.get('unknown') is None
+
+
+def test_failed_save_is_logged_and_still_answered(client, classifier, make_user, monkeypatch, caplog):
+    user = make_user()
+
+    def failing_item(**fields):
+        raise ValueError('disk full')
+    monkeypatch.setattr(waste_identification, 'WasteItem', failing_item)
+
+    response = client.post(f'/api/identify-waste?user_id={user.id}', data=encoded(photo(), 'PNG'),
+                           content_type='image/png')
+    assert response.status_code == 200
+    assert response.get_json()['data']['id'] is None
+    assert any(record.exc_info and 'Error saving waste item' in record.getMessage() for record in caplog.records)
+
+
+def test_cache_counters_survive_concurrent_lookups():
+    cache = ClassificationCache()
+    cache.store('hit', 'phash-hit', dict(RESULT))
+
+    def lookups():
+        for _ in range(2000):
+            cache.lookup('hit')
+            cache.lookup('other', 'phash-hit')
+            cache.lookup('missing')
+    workers = [threading.Thread(target=lookups) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['near_duplicate_hits'], stats['misses']) == (16000, 16000, 16000)
@@ -0,0 +1,60 @@
+from src.app import init_database
+from src.database.migrations import applied_versions, run_backfill
+from src.models.user import db
+from src.models.waste_item import WasteCategoryRollup, WasteItem, backfill_waste_rollups
+
+
+def rollup_counts(user_id):
+    return {
+        rollup.material_category: (rollup.item_count, rollup.recyclable_count)
+        for rollup in WasteCategoryRollup.query.filter_by(user_id=user_id)
+    }
+
+
+def test_inserts_fold_into_rollups(make_user):
+    user = make_user()
+    db.session.add_all([
+        WasteItem(user_id=user.id, identified_type='bottle', material_category='plastic', recyclable=True),
+        WasteItem(user_id=user.id, identified_type='bag', material_category='plastic', recyclable=False),
+        WasteItem(user_id=user.id, identified_type='peel', material_category=None, recyclable=False),
+    ])
+    db.session.commit()
+    db.session.add(WasteItem(user_id=user.id, identified_type='tray', material_category='plastic', recyclable=True))
+    db.session.commit()
+
+    assert rollup_counts(user.id) == {'plastic': (3, 2), 'unknown': (1, 0)}
+
+
+def test_backfill_fills_missing_pairs_only(make_user):
+    user, other = make_user(), make_user()
+    # Core inserts skip the ORM listener, like data written before the rollups existed
+    db.session.execute(WasteItem.__table__.insert(), [
+        {'user_id': user.id, 'identified_type': 'jar', 'material_category': 'glass', 'recyclable': True},
+        {'user_id': user.id, 'identified_type': 'can', 'material_category': 'metal', 'recyclable': True},
+        {'user_id': other.id, 'identified_type': 'box', 'material_category': 'paper', 'recyclable': True},
+    ])
+    db.session.add(WasteCategoryRollup(user_id=user.id, material_category='glass', item_count=5, recyclable_count=5))
+    db.session.commit()
+
+    assert backfill_waste_rollups() == 2
+    assert rollup_counts(user.id) == {'glass': (5, 5), 'metal': (1, 1)}
+    assert rollup_counts(other.id) == {'paper': (1, 1)}
+    assert backfill_waste_rollups() == 0
+
+
+def test_backfill_runs_as_a_migration_not_on_every_boot(app, make_user):
+    user = make_user()
+    db.session.execute(WasteItem.__table__.insert(), [
+        {'user_id': user.id, 'identified_type': 'jar', 'material_category': 'glass', 'recyclable': True},
+    ])
+    db.session.commit()
+    assert 5 in applied_versions()
+
+    # Already applied to this database, so a worker boot leaves the gap alone
+    init_database(app)
+    assert rollup_counts(user.id) == {}
+
+    with db.engine.begin() as connection:
+        run_backfill(backfill_waste_rollups)(connection)
+    db.session.remove()
+    assert rollup_counts(user.id) == {'glass': (1, 1)}
@@ -0,0 +1,75 @@
+from sqlalchemy import event
+
+from src.models.user import db
+from src.models.pickup_request import PickupRequest
+from src.models.wastepicker_stats import WastepickerStats, _upsert_from_aggregate, apply_counter_deltas
+
+
+def add_pickup(requester, **fields):
+    pickup = PickupRequest(requester_id=requester.id, pickup_address='1 Stats Street',
+                           pickup_latitude=-26.2, pickup_longitude=28.05, **fields)
+    db.session.add(pickup)
+    db.session.commit()
+    return pickup
+
+
+def test_stats_for_a_picker_without_a_row_write_nothing(client, make_user):
+    picker = make_user(user_type='wastepicker')
+    requester = make_user()
+    # Assigned directly, so no counters row was made for the picker
+    add_pickup(requester, wastepicker_id=picker.id, status='completed', payment_amount=20.0, estimated_weight=4.0)
+    picker_id = picker.id
+
+    writes = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        data = client.get(f'/api/wastepicker/{picker_id}/stats').get_json()['data']
+        empty = client.get(f'/api/wastepicker/{make_user(user_type="wastepicker").id}/stats').get_json()['data']
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert (data['total_pickups'], data['completed_pickups'], data['total_earnings']) == (1, 1, 20.0)
+    assert (empty['total_pickups'], empty['completed_pickups'], empty['total_earnings']) == (0, 0, 0.0)
+    assert [statement for statement in writes if 'wastepicker_stats' in statement] == []
+    assert WastepickerStats.query.count() == 0
+
+
+def test_accept_creates_the_counters_row(client, make_user):
+    picker = make_user(user_type='wastepicker')
+    pickup = add_pickup(make_user())
+
+    response = client.post(f'/api/pickup-requests/{pickup.id}/accept', json={'wastepicker_id': picker.id})
+
+    assert response.status_code == 200
+    assert db.session.get(WastepickerStats, picker.id).total_pickups == 1
+
+
+def test_row_created_concurrently_gets_this_transactions_deltas(make_user):
+    picker = make_user(user_type='wastepicker')
+    requester = make_user()
+    add_pickup(requester, wastepicker_id=picker.id, status='accepted')
+    # Another transaction created the row before this one's pickup was counted
+    db.session.add(WastepickerStats(wastepicker_id=picker.id, total_pickups=1))
+    db.session.commit()
+
+    add_pickup(requester, wastepicker_id=picker.id, status='accepted')
+    _upsert_from_aggregate(picker.id, {'total_pickups': 1})
+    db.session.commit()
+
+    assert db.session.get(WastepickerStats, picker.id).total_pickups == 2
+
+
+def test_missing_row_is_built_from_pickups(make_user):
+    picker = make_user(user_type='wastepicker')
+    requester = make_user()
+    add_pickup(requester, wastepicker_id=picker.id, status='completed', payment_amount=10.0, estimated_weight=2.0)
+    add_pickup(requester, wastepicker_id=picker.id, status='in_progress')
+
+    apply_counter_deltas({picker.id: {'active_pickups': 1}})
+    db.session.commit()
+
+    stats = db.session.get(WastepickerStats, picker.id)
+    assert (stats.total_pickups, stats.completed_pickups, stats.active_pickups, stats.total_earnings) == (2, 1, 1, 10.0)